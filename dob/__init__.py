@@ -20,8 +20,6 @@
 import os
 import sys
 
-from nark import get_version as _get_version
-
 __all__ = (
     'get_version',
     '__arg0name__',
@@ -44,6 +42,10 @@ __package_name__ = 'dob'
 
 
 def get_version(include_head=False):
+    # Import nark lazily, so that the tiny dob-status command can import
+    # dob.status_line without loading nark (see setup.cfg).
+    from nark import get_version as _get_version
+
     return _get_version(
         package_name=__package_name__,
         reference_file=__file__,
@@ -22,6 +22,7 @@ import click_hotoffthehamster as click
 __all__ = (
     'cmd_options_edit_item',
     'cmd_options_fact_add',
+    'cmd_options_fact_add_batch',
     'cmd_options_fact_dryable',
     'cmd_options_fact_edit',
     'cmd_options_fact_import',
@@ -33,6 +34,7 @@ __all__ = (
     'cmd_options_rule_name',
     'cmd_options_styles_internal',
     'cmd_options_styles_named',
+    'cmd_options_watch',
 )
 
 
@@ -160,6 +162,24 @@ def cmd_options_fact_add(func):
     return func
 
 
+_cmd_options_fact_add_batch = [
+    click.option(
+        '--batch', is_flag=True,
+        help=_('Read “<command> <factoid>” lines from stdin, and add them all.'),
+    ),
+    click.option(
+        '-z', '--null', is_flag=True,
+        help=_('With --batch, Factoids are separated by NUL, not by newline.'),
+    ),
+]
+
+
+def cmd_options_fact_add_batch(func):
+    for option in reversed(_cmd_options_fact_add_batch):
+        func = option(func)
+    return func
+
+
 # ***
 # *** [IMPORT FACTS] Options.
 # ***
@@ -172,6 +192,22 @@ _cmd_options_fact_import = [
         '-E', '--no-editor', is_flag=True,
         help=_('Skip interactive editor after import. Save Facts and exit.'),
     ),
+    click.option(
+        '--resume', is_flag=True,
+        help=_('Skip Facts already saved by an interrupted import of the same file.'),
+    ),
+    click.option(
+        '--skip-existing', is_flag=True,
+        help=_('Skip Facts that match Facts already in the store.'),
+    ),
+    click.option(
+        '--follow', is_flag=True,
+        help=_('Keep importing Facts as they are added to the file, until ^C.'),
+    ),
+    click.option(
+        '--progress-fd', type=int, metavar='FD',
+        help=_('Also write progress to file descriptor FD, as JSON lines.'),
+    ),
 ]
 
 
@@ -308,3 +344,20 @@ def cmd_options_rule_name(func):
         func = option(func)
     return func
 
+
+# ***
+# *** [WATCH] Options.
+# ***
+
+_cmd_options_watch = [
+    click.option(
+        '--watch', is_flag=True,
+        help=_('Keep running, and print again whenever the store changes.'),
+    ),
+]
+
+
+def cmd_options_watch(func):
+    for option in reversed(_cmd_options_watch):
+        func = option(func)
+    return func
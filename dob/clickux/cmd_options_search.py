@@ -45,6 +45,7 @@ __all__ = (
     #   '_cmd_options_results_output_path',
     #   '_cmd_options_results_sort_order',
     #   '_cmd_options_search_time_window',
+    #   '_postprocess_options_deleted',
     #   '_postprocess_options_grouping',
     #   '_postprocess_options_match_activities',
     #   '_postprocess_options_match_categories',
@@ -141,6 +142,54 @@ _cmd_options_search_deleted_hidden = [
 ]
 
 
+def _postprocess_options_deleted(kwargs):
+    if 'deleted' not in kwargs:
+        return
+
+    # QueryTerms.deleted=True would show only the deleted Facts, but
+    # --deleted shows them along with the rest (deleted=None).
+    if kwargs['deleted']:
+        kwargs['deleted'] = None
+    else:
+        del kwargs['deleted']
+
+
+# ***
+# *** [SEARCH QUERY] Fact Lineage.
+# ***
+
+_cmd_options_search_lineage = [
+    click.option(
+        '--lineage',
+        type=int,
+        metavar='ID',
+        help=_(
+            'Restrict results to the versions of the Fact with this key'
+            ' (use with --deleted to include the old, edited versions).'
+        ),
+    ),
+]
+
+
+# ***
+# *** [SEARCH QUERY] Other Stores.
+# ***
+
+_cmd_options_search_stores = [
+    click.option(
+        '--store',
+        'stores',
+        multiple=True,
+        type=click.Path(exists=True, dir_okay=False),
+        metavar='PATH',
+        help=_(
+            'Include the Facts of another dob database, e.g., a copy from'
+            ' another machine (may be repeated).'
+        ),
+    ),
+]
+
+
 # ***
 # *** [SEARCH MATCH] Activity.
 # ***
@@ -205,6 +254,10 @@ _cmd_options_search_match_tags = [
         '-t', '--tag', multiple=True,
         help=_('Restrict results by exact tag name(s).'),
     ),
+    click.option(
+        '--all-tags', is_flag=True,
+        help=_('Only match Facts that have all of the --tag names (not just one).'),
+    ),
 ]
 
 
@@ -233,6 +286,29 @@ _cmd_options_search_broad_match = [
     ),
 ]
 
+_cmd_options_search_fts_query = [
+    click.option(
+        '--fts', 'fts_query',
+        is_flag=True,
+        help=_(
+            'Use SEARCH_TERM as full-text query syntax, e.g., "a phrase",'
+            ' or AND, OR and NOT, and allow --sort rank'
+            ' (after `store optimize`).'
+        ),
+    ),
+]
+
+_cmd_options_search_fuzzy_match = [
+    click.option(
+        '--fuzzy',
+        is_flag=True,
+        help=_(
+            'Also match names similar to SEARCH_TERM, e.g., to find a misspelling'
+            ' (otherwise SEARCH_TERM must be part of the name).'
+        ),
+    ),
+]
+
 
 # ***
 # *** [RESULTS GROUP] Option.
@@ -376,6 +452,8 @@ def _cmd_options_results_sort_order(item, command, group):
         # Sorts by Fact PK. (lb): Not sure how useful.
         # - Because Momentaneous Facts, potentially useful.
         choices.append('fact')
+        # Sorts by search relevance, best first (see store.fts_index).
+        choices.append('rank')
 
     return [
         click.option(
@@ -1022,6 +1100,7 @@ def _postprocess_options_matching(kwargs):
 
 
 def postprocess_options_normalize_search_args(kwargs, cmd_journal=False):
+    _postprocess_options_deleted(kwargs)
     _postprocess_options_matching(kwargs)
     _postprocess_options_grouping(kwargs, cmd_journal=cmd_journal)
     _postprocess_options_sort_cols(kwargs)
@@ -1043,7 +1122,9 @@ def cmd_options_any_search_query(command='', item='', match=False, group=False):
     def _cmd_options_any_search_query():
         options = []
         append_cmd_options_filter_by_pk(options)
+        append_cmd_options_filter_by_deleted(options)
         append_cmd_options_filter_by_time(options)
+        append_cmd_options_filter_by_store(options)
         append_cmd_options_matching(options)
         append_cmd_options_group_by(options)
         append_cmd_options_results_sort_limit(options)
@@ -1068,9 +1149,22 @@ def cmd_options_any_search_query(command='', item='', match=False, group=False):
 
         options.extend(_cmd_options_search_item_key)
 
+    def append_cmd_options_filter_by_deleted(options):
+        if item != 'fact':
+            return
+
+        options.extend(_cmd_options_search_deleted_hidden)
+        options.extend(_cmd_options_search_lineage)
+
     def append_cmd_options_filter_by_time(options):
         options.extend(_cmd_options_search_time_window(command))
 
+    def append_cmd_options_filter_by_store(options):
+        if command == 'export':
+            return
+
+        options.extend(_cmd_options_search_stores)
+
     def append_cmd_options_filter_by_search_terms(options):
         options.extend(_cmd_options_search_search_term)
 
@@ -1092,6 +1186,9 @@ def cmd_options_any_search_query(command='', item='', match=False, group=False):
         if item == 'fact':
             options.extend(_cmd_options_search_match_tags)
             options.extend(_cmd_options_search_broad_match)
+            options.extend(_cmd_options_search_fts_query)
+        else:
+            options.extend(_cmd_options_search_fuzzy_match)
 
     # +++
 
@@ -240,6 +240,22 @@ def ADD_FACT_COMMON(ctx):
         or you can use the {codehi}to{reset}
         command with a relative negative time.
 
+        {underlined}Adding Many Facts at Once{reset}
+
+        To add many Facts from a script, rather than calling {rawname}
+        once per Fact, pipe the commands to {codehi}{rawname} add --batch{reset},
+        one Add Fact command per line, e.g.,
+
+         \b
+         {codehi}printf 'from 9:00 to 10:00 Coding@Work\\nat 10:00 Lunch\\n' \\{reset}
+             {codehi}| {rawname} add --batch{reset}
+
+        All the Facts are saved in one transaction, and conflicts are
+        resolved as if you specified {codehi}--yes{reset}. The result of
+        each line is printed as a JSON object. Use {codehi}--null{reset} if
+        the commands are separated by NUL characters (e.g., to add Facts
+        with multi-line descriptions).
+
         {underlined}How to Use Activity, Category, and Tags{reset}
 
         Each Fact can be assigned to one Activity, and each Activity
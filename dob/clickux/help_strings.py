@@ -288,7 +288,7 @@ DETAILS_HELP = _(
 
 DETAILS_TMI_HELP = _(
     """
-    Show AppDirs paths, too.
+    Show AppDirs paths, and plugin load and post-processor times, too.
     """
 )
 
@@ -934,6 +934,152 @@ STORE_URL_HELP = _(
 )
 
 
+STORE_OPTIMIZE_HELP = _(
+    """
+    Speed up the database: add missing indexes, and update its statistics.
+
+    \b
+    Creates any of the indexes dob uses to list and search Facts that are
+    missing (including the full-text index that `dob find` uses to match
+    search terms, and the trigram indexes that `dob list tags`, etc., and
+    tab completion use to match names), and runs ANALYZE, so SQLite knows
+    which indexes to use. With
+    --vacuum, also rebuilds the database file, to reclaim unused space
+    (e.g., after many Facts were edited and deleted).
+
+    \b
+    Prints the database size, and the time of some common queries,
+    from before and after.
+    """
+)
+
+
+STORE_OPTIMIZE_VACUUM_HELP = _(
+    """
+    Also rebuild the database file (can be slow on a large database).
+    """
+)
+
+
+STORE_COMPACT_HELP = _(
+    """
+    Move old, deleted Fact versions out of the database, to speed it up.
+
+    \b
+    When you edit a Fact, dob saves a new copy of it, and marks the old
+    version deleted (so nothing is ever lost). Over time, the database
+    can fill up with more deleted versions than Facts, which every query
+    has to skip over.
+
+    \b
+    This moves the deleted Facts that started more than --keep-history
+    days ago to a history database, next to the database file (or see
+    --history-db), or, with --discard, deletes them. The newer versions of
+    those Facts are unlinked from them, and the database file is rebuilt,
+    to reclaim the space.
+    """
+)
+
+
+STORE_COMPACT_KEEP_HISTORY_HELP = _(
+    """
+    Keep the deleted Facts that started within this many days.
+    """
+)
+
+
+STORE_COMPACT_HISTORY_DB_HELP = _(
+    """
+    The history database to move deleted Facts to (default: the database
+    path, with “-history” added to its name).
+    """
+)
+
+
+STORE_COMPACT_DISCARD_HELP = _(
+    """
+    Delete the old Fact versions, rather than moving them to the history database.
+    """
+)
+
+
+STORE_ARCHIVE_HELP = _(
+    """
+    Move old Facts to an archive database, to keep the database small.
+
+    \b
+    Moves the Facts that ended before --before DATE to an archive database,
+    next to the database file (or see --archive-db). The commands you use
+    day to day, which look at recent Facts, only read the (smaller)
+    database, but any list, search, or usage report that reaches back
+    before DATE (or that has no --since) includes the archived Facts.
+
+    \b
+    Archived Facts can be listed, but not edited.
+    """
+)
+
+
+STORE_ARCHIVE_BEFORE_HELP = _(
+    """
+    Archive the Facts that ended before this date.
+    """
+)
+
+
+STORE_ARCHIVE_ARCHIVE_DB_HELP = _(
+    """
+    The archive database (default: the database path, with “-archive”
+    added to its name). Once a database is archived, it always uses the
+    same archive.
+    """
+)
+
+
+STORE_PARTITION_HELP = _(
+    """
+    Move the Facts of past years (or months) to a database for each.
+
+    \b
+    Moves each Fact that started before the current year (or month, or
+    --before DATE) to a database for the year (or month) it started in,
+    next to the database file (or see --partition-dir). Any list, search,
+    or usage report includes the databases that its --since and --until
+    overlap, so it reads the same amount of data however many years the
+    Facts go back.
+
+    \b
+    New Facts are always saved to the database, even a Fact from a past
+    year. Run this command again to move them to their partition.
+    Partitioned Facts can be listed, but not edited.
+    """
+)
+
+
+STORE_PARTITION_BY_HELP = _(
+    """
+    Make a database for each year, or for each month.
+    """
+)
+
+
+STORE_PARTITION_BEFORE_HELP = _(
+    """
+    Partition the Facts that started before this date
+    (default: the start of the current year, or month).
+    """
+)
+
+
+STORE_PARTITION_PARTITION_DIR_HELP = _(
+    """
+    The directory for new partition databases (default: the database
+    directory). Each is named after the database and its year or month,
+    e.g., “dob-2015.sqlite”.
+    """
+)
+
+
 STORE_UPGRADE_LEGACY_HELP = _(
     """
     Migrate a legacy “Hamster” database to dob.
@@ -1077,6 +1223,12 @@ SEARCH_HELP = _(
 Show all Facts, or those matching a search criteria.
 
 {results_processing_help}
+
+After you run `store optimize`, the SEARCH_TERMs are matched using a
+full-text index, which is quick, and still matches any part of a word.
+Add --fts to use full-text query syntax: a "quoted phrase" matches words
+in order, and AND, OR and NOT combine words. With --fts, use --sort rank
+to show the best matches first.
     """
 ).format(results_processing_help=RESULTS_PROCESSING_HELP)
 
@@ -1158,6 +1310,9 @@ CANCEL_HELP = _(
 CURRENT_HELP = _(
     """
     Print the active Fact, if there is one.
+
+    To show the active Fact in a shell prompt or a status bar,
+    try the dob-status command, which prints it without loading dob.
     """
 )
 
@@ -1182,6 +1337,15 @@ LATEST_HELP = _(
 HELP_CMD_SHOW = _(
     """
     Print the active Fact, if any, otherwise the latest Fact.
+
+    Or print the Fact with the database KEY.
+    """
+)
+
+
+HELP_CMD_SHOW_HISTORY = _(
+    """
+    Print every version of the Fact, from the original to the latest edit.
     """
 )
 
@@ -1404,6 +1568,25 @@ HINT: To read from stdin, you can pipe to dob:
 
       For the last option, dob processes input as you type it,
       until you press ^D.
+
+HINT: If an import from a file is interrupted, run the same import
+      again with --resume to skip the Facts that were already saved.
+
+HINT: If you keep adding to the same file and import it again and
+      again, use --skip-existing to skip the Facts that are already
+      in the store. (Only Facts with explicit start and end times
+      are matched.)
+
+HINT: To import Facts from a file as they're written to it (say, a
+      file you log to from your phone that's synced to your machine),
+      use --follow. Each Fact is saved once the next Fact starts, or
+      once the file stops changing. Run it again and it picks up after
+      the last Fact it saved. (Install inotify_simple to avoid polling.)
+
+HINT: To track a long import from a script, use --progress-fd, e.g.,
+      `dob import --progress-fd 3 facts.txt 3>progress.jsonl`. Each
+      line is a JSON object with the task, the count done and the
+      total, the rate, and the ETA in seconds.
     """
 )
 
@@ -1419,6 +1602,21 @@ COMPLETE_HELP = _(
 )
 
 
+# ***
+# *** [POST-PROCESS] Command help.
+# ***
+
+POST_PROCESS_HELP = _(
+    """
+    Run the plugin post-processors on the Facts with the given PKs.
+
+    \b
+    This is the background worker that dob starts after saving Facts
+    when the `hooks.detached` config option is enabled.
+    """
+)
+
+
 # ***
 # *** [MIGRATE] Commands help.
 # ***
@@ -23,12 +23,19 @@ from dob_bright.crud.fact_dressed import FactDressed
 from dob_bright.termio import click_echo, dob_in_user_exit, echo_block_header
 
 from .. import __arg0name__, migrate
+from ..status_line import read_status_state, status_state, write_status_state
+from ..store.head_record import HeadRecord
+from ..store.indexes import ensure_endless_facts_index
+from ..store.integrity_stamp import IntegrityStamp
+from ..store.read_only import open_store_read_only
 
 __all__ = (
     'induct_newbies',
     'insist_germinated',
+    'read_only_store',
     # Private:
     #  'backend_integrity',
+    #  'refresh_head_and_status',
 )
 
 
@@ -39,12 +46,30 @@ def backend_integrity(func):
     (lb): I wonder if the backend should enforce this better.
     In any case, telling the user at the CLI level is better
     than not telling the user at all, I suppose.
+
+    The checks are skipped if the store has not changed since the last
+    dob command finished (see IntegrityStamp). After the command, the
+    head record and the status file are refreshed if the store changed.
     """
 
     def wrapper(ctx, controller, *args, **kwargs):
-        version_must_be_latest(controller)
-        time_must_be_gapless(controller)
+        integrity_stamp = IntegrityStamp(controller)
+        checked = not integrity_stamp.is_fresh()
+        if checked:
+            version_must_be_latest(controller)
+            ensure_endless_facts_index(controller)
+            time_must_be_gapless(controller)
         func(ctx, controller, *args, **kwargs)
+        # Stamp the store as changed by dob, so the next command skips the checks.
+        # - But if the checks were skipped, and the store changed (whether by
+        #   this command, or by another process meanwhile), the change is not
+        #   known to be good, so check the Facts again (which the endless Facts
+        #   index makes cheap). The version cannot change but by a migration.
+        if not checked and not integrity_stamp.is_unchanged():
+            time_must_be_gapless(controller)
+        integrity_stamp.save()
+        # Record the ongoing and latest Facts, if the command changed them.
+        refresh_head_and_status(controller)
 
     # ***
 
@@ -94,6 +119,20 @@ def backend_integrity(func):
     return wrapper
 
 
+def refresh_head_and_status(controller):
+    """Records the latest Facts, and writes the status file for dob-status."""
+    head_record = HeadRecord(controller)
+    if head_record.path is None:
+        # Not a store file, e.g., an in-memory test store.
+        return
+    if not head_record.refresh() and read_status_state() is not None:
+        return
+    ongoing = controller.find_latest_fact(restrict='ongoing')
+    write_status_state(status_state(ongoing, utc=controller.config['time.tz_aware']))
+
+
+# ***
+
 def insist_germinated(func):
     """
     """
@@ -115,3 +154,17 @@ def induct_newbies(func):
 
     return update_wrapper(wrapper, func)
 
+
+def read_only_store(func):
+    """
+    Opens the store read-only, for a command that only reports on it.
+
+    Must decorate the command before ``induct_newbies``, which stands up the
+    store. The ``reports.immutable`` setting is not applied to ``--watch``.
+    """
+
+    def wrapper(ctx, controller, *args, **kwargs):
+        open_store_read_only(controller, immutable_ok=not kwargs.get('watch'))
+        func(ctx, controller, *args, **kwargs)
+
+    return update_wrapper(wrapper, func)
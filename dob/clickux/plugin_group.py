@@ -19,26 +19,43 @@
 
 from functools import update_wrapper
 import glob
+import json
 import os
 
 from gettext import gettext as _
 
 import click_hotoffthehamster as click
 
-from dob_bright.config.app_dirs import AppDirs
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+from dob_bright.controller import Controller
 from dob_bright.termio import dob_in_user_warning
 
 from ..helpers.path import compile_and_eval_source
 
 __all__ = (
     'ensure_plugged_in',
+    'load_plugin_timings',
+    'plugin_hook_path',
+    'record_plugin_timings',
     'ClickPluginGroup',
     'PLUGINS_DIRNAME',
+    # Private:
+    #  'plugin_timings_path',
 )
 
 
 PLUGINS_DIRNAME = 'plugins'
 
+# Remembers if the plugins register post-processors, so that commands that
+# only load plugins to run post-processors can skip loading them if not.
+PLUGINS_HOOKS_BASENAME = 'hooks.json'
+
+# Remembers how long each plugin takes to load, and to run its post-processors.
+PLUGINS_TIMINGS_BASENAME = 'timings.json'
+
+# The plugin file that registered each post-processor, to charge it the time.
+PLUGIN_HOOK_PATHS = {}
+
 
 class ClickPluginGroup(click.Group):
 
@@ -48,6 +65,7 @@ class ClickPluginGroup(click.Group):
             AppDirs.user_config_dir, PLUGINS_DIRNAME,
         )
         self.has_loaded = False
+        self.load_timings = {}
 
     @property
     def plugin_paths(self):
@@ -85,8 +103,68 @@ class ClickPluginGroup(click.Group):
         # first read the config, the plugins had not added their definitions
         # yet, so any user plugin config was previously ignored).
         controller.replay_config()
+        self.warn_plugins_over_budget(controller)
+
+    def warn_plugins_over_budget(self, controller):
+        budget_ms = controller.config['hooks.plugin_budget_ms']
+        if budget_ms <= 0:
+            return
+        for py_path, timings in sorted(self.load_timings.items()):
+            load_secs = timings.get('compile_secs', 0) + timings.get('eval_secs', 0)
+            if load_secs * 1000 > budget_ms:
+                controller.client_logger.warning(_(
+                    'Plugin “{}” took {:.3f} secs to load (budget: {} ms).'
+                ).format(py_path, load_secs, budget_ms))
+
+    def ensure_hooks_plugged_in(self, controller):
+        """Loads the plugins, unless they're known not to add post-processors.
+
+        Whether the plugins register any post-processors is remembered in
+        the user cache directory, along with the path, size and modified
+        time of each plugin, so any change to the plugins is noticed.
+        """
+        if self.has_loaded:
+            return
+        plugins_stamp = self.plugins_stamp()
+        if not plugins_stamp:
+            return
+        hooks_path = get_appdirs_subdir_file_path(
+            file_basename=PLUGINS_HOOKS_BASENAME,
+            dir_dirname=PLUGINS_DIRNAME,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+        try:
+            with open(hooks_path, 'r') as hooks_f:
+                saved = json.load(hooks_f)
+        except (OSError, ValueError):
+            saved = {}
+        if saved.get('stamp') == plugins_stamp and not saved.get('hooks', True):
+            return
+        n_post_processors = len(controller.POST_PROCESSORS)
+        self.ensure_plugged_in(controller)
+        has_hooks = len(controller.POST_PROCESSORS) > n_post_processors
+        temp_path = '{}.tmp'.format(hooks_path)
+        try:
+            with open(temp_path, 'w') as hooks_f:
+                json.dump({'stamp': plugins_stamp, 'hooks': has_hooks}, hooks_f)
+            os.replace(temp_path, hooks_path)
+        except OSError:
+            # The plugins are loaded again next time; no reason to bother the user.
+            pass
+
+    def plugins_stamp(self):
+        stamp = []
+        for py_path in sorted(self.plugin_paths):
+            try:
+                stat = os.stat(py_path)
+            except OSError:
+                continue
+            stamp.append([py_path, stat.st_size, stat.st_mtime_ns])
+        return stamp
 
     def get_commands_from_plugins(self, ctx, name):
+        # Only time the first load: the plugins' commands are registered by then.
+        timing = not self.has_loaded
         cmds = set()
         for py_path in self.plugin_paths:
             try:
@@ -102,6 +180,8 @@ class ClickPluginGroup(click.Group):
                 ).format(py_path, str(err))
                 dob_in_user_warning(msg)
         self.has_loaded = True
+        if timing and self.load_timings:
+            record_plugin_timings(loads=self.load_timings)
         return list(cmds)
 
     def open_source_eval_and_poke_around(self, py_path, name):
@@ -109,7 +189,17 @@ class ClickPluginGroup(click.Group):
         #       (Or anything else!)
         # NOTE: This source *should* be trusted -- the user had to run
         #       `dob plugin install` to wire it. At least I think so. -lb.
-        eval_globals = compile_and_eval_source(py_path)
+        n_commands = len(self.commands)
+        n_post_processors = len(Controller.POST_PROCESSORS)
+        timings = {}
+        eval_globals = compile_and_eval_source(py_path, timings=timings)
+        hooks = Controller.POST_PROCESSORS[n_post_processors:]
+        for hook in hooks:
+            PLUGIN_HOOK_PATHS[hook] = py_path
+        if not self.has_loaded:
+            timings['commands'] = len(self.commands) - n_commands
+            timings['hooks'] = len(hooks)
+            self.load_timings[py_path] = timings
         cmds = self.probe_source_for_commands(eval_globals, name)
         return cmds
 
@@ -131,6 +221,58 @@ class ClickPluginGroup(click.Group):
         return cmds
 
 
+# ***
+
+def plugin_hook_path(hook):
+    """Returns the path of the plugin that registered the post-processor, or None."""
+    return PLUGIN_HOOK_PATHS.get(hook)
+
+
+def plugin_timings_path():
+    return get_appdirs_subdir_file_path(
+        file_basename=PLUGINS_TIMINGS_BASENAME,
+        dir_dirname=PLUGINS_DIRNAME,
+        appdirs_dir=AppDirs.user_cache_dir,
+    )
+
+
+def load_plugin_timings():
+    """Returns the saved timings of each plugin, keyed by plugin path."""
+    try:
+        with open(plugin_timings_path(), 'r') as timings_f:
+            return json.load(timings_f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_plugin_timings(loads=None, hooks=None):
+    """Saves the load timings, and adds to the post-processor timings, of plugins.
+
+    - ``loads`` maps each plugin path to its latest 'compile_secs', 'eval_secs',
+      and number of 'commands' and 'hooks' registered.
+
+    - ``hooks`` maps each plugin path to the seconds its post-processors just
+      took, which is added to its cumulative 'hook_secs' (and 'hook_calls').
+    """
+    saved = load_plugin_timings()
+    for py_path, timings in (loads or {}).items():
+        saved.setdefault(py_path, {}).update(timings)
+    for py_path, secs in (hooks or {}).items():
+        plugin = saved.setdefault(py_path, {})
+        plugin['hook_secs'] = plugin.get('hook_secs', 0) + secs
+        plugin['hook_calls'] = plugin.get('hook_calls', 0) + 1
+        plugin['last_hook_secs'] = secs
+    timings_path = plugin_timings_path()
+    temp_path = '{}.tmp'.format(timings_path)
+    try:
+        with open(temp_path, 'w') as timings_f:
+            json.dump(saved, timings_f, indent=1, sort_keys=True)
+        os.replace(temp_path, timings_path)
+    except OSError:
+        # The timings are just informative; no reason to bother the user.
+        pass
+
+
 # ***
 
 def ensure_plugged_in(func):
@@ -15,13 +15,83 @@
 # You can find the GNU General Public License reprinted in the file titled 'LICENSE',
 # or visit <http://www.gnu.org/licenses/>.
 
+import os
+import subprocess
+import sys
+import time
 from functools import update_wrapper
+from gettext import gettext as _
+
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from nark.config import ConfigRoot
+
+from ..helpers.hook_pool import HookOutcome, run_hooks
+from ..store.tag_bitmaps import refresh_tag_bitmaps
+from .plugin_group import plugin_hook_path, record_plugin_timings
 
 __all__ = (
+    'DobConfigurableHooks',
+    'add_fact_post_processor',
     'post_processor',
+    'run_post_processors',
+    # Private:
+    #  'detach_post_processors',
+    #  'log_hook_outcome',
+    #  'record_hook_outcomes',
+    #  'thread_local_store_session',
 )
 
 
+# ***
+
+@ConfigRoot.section('hooks')
+class DobConfigurableHooks(object):
+    """"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("The most plugin post-processors to run at once, each on its own thread."),
+    )
+    def max_workers(self):
+        return 4
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("Seconds to wait on a plugin post-processor before abandoning it"
+          " (0 waits forever)."),
+    )
+    def timeout(self):
+        return 30
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("If True, hand saved Facts to a background dob process that runs"
+          " the plugin post-processors, so the command returns immediately."),
+    )
+    def detached(self):
+        return False
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("Milliseconds a plugin may take to load, or to run its post-processors,"
+          " before dob logs a warning (0 disables the warning)."),
+    )
+    def plugin_budget_ms(self):
+        return 1000
+
+
 # ***
 
 def post_processor(func):
@@ -35,7 +105,205 @@ def post_processor(func):
         #   ctx.parent.command is <ClickAliasableBunchyPluginGroup run>.
         ctx.parent.command.ensure_plugged_in(controller)
         facts = func(ctx, controller, *args, **kwargs)
+        facts and refresh_tag_bitmaps(controller)
+        controller.post_process(controller, facts, show_plugin_error=None)
+
+    return update_wrapper(wrapper, func)
+
+
+def add_fact_post_processor(func):
+    """Like post_processor, but only loads plugins if they add post-processors.
+
+    Unless the user is editing the Fact interactively, loading plugins is
+    only necessary to run their post-processors, so if the plugins are
+    known not to register any, skip loading them.
+    """
+
+    def wrapper(ctx, controller, *args, **kwargs):
+        plugin_group = ctx.parent.command
+        if (
+            kwargs.get('editor')
+            or kwargs.get('edit_text')
+            or kwargs.get('edit_meta')
+        ):
+            plugin_group.ensure_plugged_in(controller)
+        else:
+            plugin_group.ensure_hooks_plugged_in(controller)
+        facts = func(ctx, controller, *args, **kwargs)
+        facts and refresh_tag_bitmaps(controller)
         controller.post_process(controller, facts, show_plugin_error=None)
 
     return update_wrapper(wrapper, func)
 
+
+# ***
+
+def run_post_processors(
+    controller,
+    handlers,
+    fact_facts_or_true,
+    show_plugin_error=None,
+    carousel_active=False,
+):
+    """Runs the plugin post-processors on a bounded pool of threads.
+
+    Each post-processor is given ``hooks.timeout`` seconds, after which
+    it's abandoned, so that a slow plugin cannot keep the command from
+    exiting. The time each takes, and any failure, is written to the log.
+
+    If ``hooks.detached``, the Facts are instead handed off to a new dob
+    process, by PK, to be post-processed in the background.
+
+    From the Carousel, the post-processors are called one after another,
+    on the calling thread (the interactive session is already waiting).
+    """
+
+    def _run_post_processors():
+        if not handlers:
+            return
+        if carousel_active:
+            outcomes = [call_timed(handler) for handler in handlers]
+        elif (
+            controller.config['hooks.detached']
+            and detach_post_processors(controller, fact_facts_or_true)
+        ):
+            return
+        else:
+            thread_local_store_session(controller)
+            outcomes = run_hooks(
+                handlers,
+                call_threaded,
+                max_workers=controller.config['hooks.max_workers'],
+                timeout=controller.config['hooks.timeout'],
+            )
+        record_hook_outcomes(controller, outcomes)
+
+    def call_timed(handler):
+        began = time.monotonic()
+        call_handler(handler)
+        return HookOutcome(handler, time.monotonic() - began, None, False)
+
+    def call_threaded(handler):
+        try:
+            call_handler(handler)
+        finally:
+            # Close the thread's own session (see thread_local_store_session).
+            controller.store.session.remove()
+
+    def call_handler(handler):
+        handler(
+            controller.ctx,
+            controller,
+            fact_facts_or_true,
+            show_plugin_error=show_plugin_error,
+            carousel_active=carousel_active,
+        )
+
+    return _run_post_processors()
+
+
+def thread_local_store_session(controller):
+    """Gives each thread that uses the store its own session, from now on.
+
+    A SQLite connection can only be used on the thread that opened it, so a
+    post-processor that queries the store cannot share the command's session.
+    The store's session is replaced with a scoped session, which is still the
+    command's session on this thread, but is a new session (on a connection
+    of its own) on each other thread. The command's session is never handed
+    back, because an abandoned post-processor may still be running.
+    """
+    session = getattr(controller.store, 'session', None)
+    if session is None or isinstance(session, scoped_session):
+        return
+    scoped = scoped_session(sessionmaker(bind=session.get_bind()))
+    scoped.registry.set(session)
+    controller.store.session = scoped
+
+
+def record_hook_outcomes(controller, outcomes):
+    plugin_secs = {}
+    for outcome in outcomes:
+        log_hook_outcome(controller, outcome)
+        py_path = plugin_hook_path(outcome.hook)
+        if py_path is not None:
+            plugin_secs[py_path] = plugin_secs.get(py_path, 0) + outcome.elapsed
+    if not plugin_secs:
+        return
+    record_plugin_timings(hooks=plugin_secs)
+    budget_ms = controller.config['hooks.plugin_budget_ms']
+    if budget_ms <= 0:
+        return
+    for py_path, secs in sorted(plugin_secs.items()):
+        if secs * 1000 > budget_ms:
+            controller.client_logger.warning(_(
+                'Plugin “{}” post-processors took {:.3f} secs (budget: {} ms).'
+            ).format(py_path, secs, budget_ms))
+
+
+def log_hook_outcome(controller, outcome):
+    name = getattr(outcome.hook, '__qualname__', None) or repr(outcome.hook)
+    if outcome.timed_out:
+        msg = _(
+            'Abandoned post-processor “{}” after {:.3f} secs.'
+        ).format(name, outcome.elapsed)
+        controller.client_logger.warning(msg)
+    elif outcome.error is not None:
+        msg = _(
+            'Post-processor “{}” failed after {:.3f} secs: {}'
+        ).format(name, outcome.elapsed, outcome.error)
+        controller.client_logger.error(msg)
+    else:
+        controller.client_logger.info(
+            'Post-processor “{}” finished in {:.3f} secs.'.format(
+                name, outcome.elapsed,
+            )
+        )
+
+
+def detach_post_processors(controller, fact_facts_or_true):
+    """Runs `dob post-process PK...` in the background, and returns True.
+
+    Returns False if the Facts cannot be handed off, i.e., the upgrade-legacy
+    True, or Facts that were not saved (and have no PK), so that the caller
+    runs the post-processors in-process.
+    """
+    facts = fact_facts_or_true
+    if not isinstance(facts, (list, tuple)):
+        facts = [facts]
+    pks = [getattr(fact, 'pk', None) for fact in facts]
+    if not pks or any(not isinstance(pk, int) or pk <= 0 for pk in pks):
+        return False
+    argv = [sys.executable, '-c', 'from dob.dob import run; run()']
+    if controller.configfile_path:
+        argv += ['-F', controller.configfile_path]
+    for keyval in controller.config_keyvals or ():
+        if keyval.split('=', 1)[0].strip() == 'hooks.detached':
+            continue
+        argv += ['-C', keyval]
+    # Run the post-processors in the worker, rather than detaching again.
+    # - A -C keyval outranks the environment, so say so on the command line.
+    argv += ['-C', 'hooks.detached=False']
+    argv += ['post-process'] + [str(pk) for pk in pks]
+    # Log to the file, because the worker has no terminal.
+    env = dict(os.environ, DOB_HOOKS_DETACHED='False', DOB_LOG_USE_CONSOLE='False')
+    try:
+        worker = subprocess.Popen(
+            argv,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            start_new_session=True,
+        )
+    except OSError as err:
+        controller.client_logger.warning(
+            'Could not detach post-processors: {}'.format(err)
+        )
+        return False
+    controller.client_logger.info(
+        'Detached post-processors to PID {} for Facts: {}'.format(
+            worker.pid, ', '.join(argv[-len(pks):]),
+        )
+    )
+    return True
@@ -18,8 +18,11 @@
 from gettext import gettext as _
 
 from dob_bright.reports.render_results import render_results
+from nark.managers.query_terms import QueryTerms
 
 from ..clickux.query_assist import error_exit_no_results
+from ..store.name_index import item_search_index
+from ..store.store_union import store_union
 
 __all__ = ('list_categories', )
 
@@ -30,9 +33,12 @@ def list_categories(
     table_type='texttable',
     max_width=-1,
     output_path=None,
-    # These two --hide flags are ignored but specified to keep out of kwargs.
+    fuzzy=False,
+    stores=(),
+    # These --hide flags are ignored but specified to keep out of kwargs.
     show_usage=False,
     show_duration=False,
+    hide_totals=False,
     **kwargs
 ):
     """
@@ -42,7 +48,10 @@ def list_categories(
     """
     err_context = _('categories')
 
-    results = controller.categories.get_all(**kwargs)
+    qt = QueryTerms(**kwargs)
+    with store_union(controller, qt, stores=stores), \
+            item_search_index(controller, 'categories', qt, fuzzy=fuzzy):
+        results = controller.categories.get_all(query_terms=qt)
 
     results or error_exit_no_results(err_context)
 
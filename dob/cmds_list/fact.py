@@ -32,6 +32,10 @@ from dob_bright.termio import (
 
 from ..clickux.cmd_options_search import cmd_options_output_format_facts_only
 from ..clickux.query_assist import error_exit_no_results
+from ..store.store_union import store_union
+from ..store.fts_index import fact_search_index
+from ..store.lineage import fact_lineage_filter
+from ..store.tag_bitmaps import tag_bitmaps_filter
 
 __all__ = (
     'list_facts',
@@ -64,6 +68,14 @@ def list_facts(
     # - Args: Total reporting arguments.
     show_totals=False,
     hide_totals=False,
+    # - Args: Tag matching (whether a Fact must use any or all the tags).
+    all_tags=False,
+    # - Args: Search term syntax (see store.fts_index).
+    fts_query=False,
+    # - Args: Restrict to the versions of one Fact (see store.lineage).
+    lineage=None,
+    # - Args: Include the Facts of other stores (see store.federation).
+    stores=(),
     # - Developer controls.
     re_sort=False,
     # - Any unnamed arguments are used as search terms in the query.
@@ -180,7 +192,16 @@ def list_facts(
             depending on the QueryTerms.
         """
         try:
-            return controller.facts.get_all(**kwargs)
+            # Include the archive, partitions and other stores that the query
+            # reaches, and match any search terms using the full-text index,
+            # if it exists, any tags using the tag bitmaps, and any --lineage
+            # using the lineage index (none of which cover the other stores).
+            qt = kwargs['query_terms']
+            with store_union(controller, qt, stores=stores), \
+                    fact_search_index(controller, qt, fts_query=fts_query), \
+                    tag_bitmaps_filter(controller, qt, all_tags=all_tags), \
+                    fact_lineage_filter(controller, lineage):
+                return controller.facts.get_all(**kwargs)
         except Exception as err:
             # - NotImplementedError happens if db.engine != 'sqlite', because
             #   get_all uses SQLite-specific aggregate functions.
@@ -17,7 +17,11 @@
 
 from gettext import gettext as _
 
+from nark.managers.query_terms import QueryTerms
+
 from ..clickux.query_assist import error_exit_no_results
+from ..store.name_index import item_search_index
+from ..store.store_union import store_union
 
 from . import generate_usage_table
 
@@ -32,6 +36,10 @@ def usage_categories(
     table_type='texttable',
     max_width=-1,
     output_path=None,
+    fuzzy=False,
+    stores=(),
+    # The --hide-totals flag is ignored but specified to keep out of kwargs.
+    hide_totals=False,
     **kwargs
 ):
     """
@@ -43,7 +51,10 @@ def usage_categories(
     def _usage_categories():
         err_context = _('categories')
 
-        results = controller.categories.get_all_by_usage(**kwargs)
+        qt = QueryTerms(**kwargs)
+        with store_union(controller, qt, stores=stores), \
+                item_search_index(controller, 'categories', qt, fuzzy=fuzzy):
+            results = controller.categories.get_all_by_usage(query_terms=qt)
 
         results or error_exit_no_results(err_context)
 
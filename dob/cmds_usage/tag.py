@@ -17,7 +17,12 @@
 
 from gettext import gettext as _
 
+from nark.managers.query_terms import QueryTerms
+
 from ..clickux.query_assist import error_exit_no_results
+from ..store.name_index import item_search_index
+from ..store.store_union import store_union
+from ..store.tag_bitmaps import tag_bitmaps_usage
 
 from . import generate_usage_table
 
@@ -32,6 +37,10 @@ def usage_tags(
     table_type='texttable',
     max_width=-1,
     output_path=None,
+    fuzzy=False,
+    stores=(),
+    # The --hide-totals flag is ignored but specified to keep out of kwargs.
+    hide_totals=False,
     **kwargs
 ):
     """
@@ -43,7 +52,13 @@ def usage_tags(
     def _usage_tags():
         err_context = _('tags')
 
-        results = controller.tags.get_all_by_usage(**kwargs)
+        qt = QueryTerms(**kwargs)
+        with store_union(controller, qt, stores=stores):
+            # Count the uses with the tag bitmaps, unless the durations are needed.
+            results = None if show_duration else tag_bitmaps_usage(controller, qt)
+            if results is None:
+                with item_search_index(controller, 'tags', qt, fuzzy=fuzzy):
+                    results = controller.tags.get_all_by_usage(query_terms=qt)
 
         results or error_exit_no_results(err_context)
 
@@ -31,6 +31,8 @@ from nark.helpers.parsing import (
 )
 from nark.items.fact import Fact
 
+from .store.name_index import names_starting_with
+
 __all__ = ('tab_complete', )
 
 
@@ -201,13 +203,18 @@ def choices_tags(controller, incomplete='', whitespace_ok=False):
     #          And if user TABs a second time, show list of most
     #          use tags. TAB again, another sort option, etc.
     # MAGIC_NUMBERS: 21 and 13, eh. Arbitrary limits.
-    tags_counts = controller.tags.get_all_by_usage(sort_cols=('start',), limit=21)
-    tags_counts += controller.tags.get_all_by_usage(sort_cols=('usage',), limit=13)
+    # - If the user started typing a tag, and the names are indexed, look
+    #   for it among all the tags, and not just the recent and popular ones.
+    tag_names = names_starting_with(controller, 'tags', incomplete[1:], limit=21 + 13)
+    if tag_names is None:
+        tags_counts = controller.tags.get_all_by_usage(sort_cols=('start',), limit=21)
+        tags_counts += controller.tags.get_all_by_usage(sort_cols=('usage',), limit=13)
+        tag_names = [
+            tag.name for tag, _uses, _span
+            in tags_counts if not incomplete or tag.name.startswith(incomplete[1:])
+        ]
 
-    choices = [
-        '@{}'.format(tag.name) for tag, _uses, _span
-        in tags_counts if not incomplete or tag.name.startswith(incomplete[1:])
-    ]
+    choices = ['@{}'.format(tag_name) for tag_name in tag_names]
     # MEH: We cull, even though we set limit above, so total count might be even smaller.
     #   (We could solve at the SQL query level, but who wants to go to the trouble?)
     if not whitespace_ok:
@@ -222,7 +229,16 @@ def choices_activities(
 ):
     """Suggest activities."""
 
-    acty = controller.activities.get_all_by_usage(sort_cols=('start'))
+    # If the names are indexed, only fetch the Activities the user is typing.
+    match_activities = names_starting_with(
+        controller, 'activities', incomplete.split('@')[0],
+    )
+    if match_activities == []:
+        return []
+
+    acty = controller.activities.get_all_by_usage(
+        sort_cols=('start'), match_activities=match_activities,
+    )
 
     choices = [
         '{}@{}'.format(
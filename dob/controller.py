@@ -19,6 +19,10 @@
 
 from dob_bright.controller import Controller
 from dob_bright.styling.apply_styles import pre_apply_style_conf
+from dob_bright.termio import dob_in_user_warning
+
+from .clickux.post_processor import run_post_processors
+from .store.head_record import HeadRecord
 
 __all__ = (
     'Controller',
@@ -49,3 +53,27 @@ class DobController(Controller):
         pre_apply_style_conf(self)
         self.applied_style_conf = True
 
+    def post_process(
+        self,
+        controller,
+        fact_facts_or_true,
+        show_plugin_error=None,
+        carousel_active=False,
+    ):
+        # Like the base class, but on a thread pool, with a timeout per hook.
+        run_post_processors(
+            controller,
+            list(Controller.POST_PROCESSORS),
+            fact_facts_or_true,
+            show_plugin_error=show_plugin_error,
+            carousel_active=carousel_active,
+        )
+
+    def find_latest_fact(self, restrict=None):
+        # Like the base class, but answered from the head record, if it's
+        # current, which saves a query or two (e.g., for `dob current`).
+        try:
+            return HeadRecord(self).find_latest_fact(restrict=restrict)
+        except Exception as err:
+            # (lb): Unexpected! This could mean more than one ongoing Fact found!
+            dob_in_user_warning(str(err))
@@ -23,9 +23,17 @@ from nark.items.fact import Fact
 
 # Profiling: load AppDirs: ~ 0.011 secs.
 from dob_bright.config.app_dirs import AppDirs
-from dob_bright.termio import ascii_art, attr, click_echo, fg, highlight_value
+from dob_bright.termio import (
+    ascii_art,
+    attr,
+    click_echo,
+    dob_in_user_warning,
+    fg,
+    highlight_value
+)
 
-from .clickux.plugin_group import ClickPluginGroup
+from .clickux.plugin_group import ClickPluginGroup, load_plugin_timings
+from .store.optimize import optimize_overdue
 
 from . import get_version, __package_name__
 
@@ -46,6 +54,7 @@ def echo_app_details(controller, full=False):
         echo_logfile_path()
         echo_db_info()
         echo_app_dirs()
+        echo_plugin_timings()
 
     def echo_name_version():
         click_echo(_(
@@ -132,6 +141,29 @@ def echo_app_details(controller, full=False):
             path = appdir_paths[prop]
             click_echo('AppDirs.{}: {}'.format(prop, highlight_value(path)))
 
+    def echo_plugin_timings():
+        if not full:
+            return
+        plugin_timings = load_plugin_timings()
+        for py_path in sorted(plugin_timings.keys()):
+            timings = plugin_timings[py_path]
+            click_echo(_(
+                "Plugin {name}: compile {compile_secs} / eval {eval_secs}"
+                " / {commands} commands / {hooks} hooks"
+                " / hooks ran {hook_secs} in {hook_calls} calls"
+            ).format(
+                name=highlight_value(os.path.basename(py_path)),
+                compile_secs=highlight_value(format_secs(timings, 'compile_secs')),
+                eval_secs=highlight_value(format_secs(timings, 'eval_secs')),
+                commands=highlight_value(timings.get('commands', 0)),
+                hooks=highlight_value(timings.get('hooks', 0)),
+                hook_secs=highlight_value(format_secs(timings, 'hook_secs')),
+                hook_calls=highlight_value(timings.get('hook_calls', 0)),
+            ))
+
+    def format_secs(timings, key):
+        return '{:.3f}s'.format(timings.get(key, 0))
+
     _echo_app_details()
 
 
@@ -243,6 +275,7 @@ def echo_data_stats(controller):
     def _echo_data_stats():
         echo_counts()
         echo_facts_interesting()
+        echo_optimize_overdue()
 
     def echo_counts():
         # MAYBE: Add filtering, like activity, category, search_term, after, until, etc.
@@ -277,6 +310,14 @@ def echo_data_stats(controller):
         elapsed = spanner.format_delta(style='')
         click_echo(_("Lifetime of Facts: {}").format(highlight_value(elapsed)))
 
+    def echo_optimize_overdue():
+        reason = optimize_overdue(controller)
+        if reason is None:
+            return
+        dob_in_user_warning(_(
+            "The store is due to be optimized ({}). Run: {}"
+        ).format(reason, highlight_value('dob store optimize')))
+
     _echo_data_stats()
 
 
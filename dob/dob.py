@@ -74,6 +74,7 @@ from .clickux.bunchy_help import (
 from .clickux.cmd_options import (
     cmd_options_edit_item,
     cmd_options_fact_add,
+    cmd_options_fact_add_batch,
     cmd_options_fact_dryable,
     cmd_options_fact_edit,
     cmd_options_fact_import,
@@ -84,7 +85,8 @@ from .clickux.cmd_options import (
     cmd_options_factoid_verify_both,
     cmd_options_rule_name,
     cmd_options_styles_internal,
-    cmd_options_styles_named
+    cmd_options_styles_named,
+    cmd_options_watch
 )
 from .clickux.cmd_options_search import (
     cmd_options_any_search_query,
@@ -94,9 +96,13 @@ from .clickux.cmd_options_search import (
 )
 from .clickux.help_command import help_command_help
 from .clickux.help_detect import show_help_finally, show_help_if_no_command
-from .clickux.induct_newbies import induct_newbies, insist_germinated
+from .clickux.induct_newbies import (
+    induct_newbies,
+    insist_germinated,
+    read_only_store
+)
 from .clickux.plugin_group import ensure_plugged_in
-from .clickux.post_processor import post_processor
+from .clickux.post_processor import add_fact_post_processor, post_processor
 from .cmds_list import activity as list_activity
 from .cmds_list import category as list_category
 from .cmds_list import fact as list_fact
@@ -114,9 +120,16 @@ from .config import (
 from .copyright import echo_copyright, echo_license
 from .demo import demo_config, demo_dob
 from .details import echo_app_details, echo_app_environs, echo_data_stats
+from .facts.add_batch import add_facts_batch
 from .facts.add_fact import add_fact
 from .facts.cancel_fact import cancel_fact
-from .facts.echo_fact import echo_latest_ended, echo_ongoing_fact, echo_ongoing_or_ended
+from .facts.echo_fact import (
+    echo_fact_by_key,
+    echo_fact_history,
+    echo_latest_ended,
+    echo_ongoing_fact,
+    echo_ongoing_or_ended
+)
 from .facts.edit_fact import edit_fact_by_pk
 from .facts.import_facts import import_facts
 from .migrate import control as migrate_control
@@ -125,6 +138,11 @@ from .migrate import upgrade as migrate_upgrade
 from .migrate import upgrade_legacy_database_file
 from .migrate import version as migrate_version
 from .run_cli import dob_versions, pass_controller, pass_controller_context, run
+from .store.archive import archive_store
+from .store.compact import compact_store
+from .store.optimize import optimize_store
+from .store.partition import PARTITION_KEY_LENGTHS, partition_store
+from .store.store_watch import watch_store
 
 # __all__ = ( ... )  # So many. Too tedious to list.
 
@@ -686,6 +704,74 @@ def store_url(controller):
     click_echo(controller.data_store_url)
 
 
+@store_group.command('optimize', help=help_strings.STORE_OPTIMIZE_HELP)
+@show_help_finally
+@flush_pager
+@click.option('--vacuum', is_flag=True,
+              help=help_strings.STORE_OPTIMIZE_VACUUM_HELP)
+@pass_controller_context
+@induct_newbies
+def store_optimize(ctx, controller, vacuum):
+    """"""
+    optimize_store(controller, vacuum=vacuum)
+
+
+@store_group.command('compact', help=help_strings.STORE_COMPACT_HELP)
+@show_help_finally
+@flush_pager
+@click.option('--keep-history', type=click.IntRange(min=0), metavar='DAYS',
+              required=True, help=help_strings.STORE_COMPACT_KEEP_HISTORY_HELP)
+@click.option('--history-db', type=click.Path(dir_okay=False), metavar='PATH',
+              help=help_strings.STORE_COMPACT_HISTORY_DB_HELP)
+@click.option('--discard', is_flag=True,
+              help=help_strings.STORE_COMPACT_DISCARD_HELP)
+@pass_controller_context
+@induct_newbies
+def store_compact(ctx, controller, keep_history, history_db, discard):
+    """"""
+    compact_store(
+        controller,
+        keep_history=keep_history,
+        history_db=history_db,
+        discard=discard,
+    )
+
+
+@store_group.command('archive', help=help_strings.STORE_ARCHIVE_HELP)
+@show_help_finally
+@flush_pager
+@click.option('--before', metavar='DATE', required=True,
+              help=help_strings.STORE_ARCHIVE_BEFORE_HELP)
+@click.option('--archive-db', type=click.Path(dir_okay=False), metavar='PATH',
+              help=help_strings.STORE_ARCHIVE_ARCHIVE_DB_HELP)
+@pass_controller_context
+@induct_newbies
+def store_archive(ctx, controller, before, archive_db):
+    """"""
+    archive_store(controller, before=before, archive_db=archive_db)
+
+
+@store_group.command('partition', help=help_strings.STORE_PARTITION_HELP)
+@show_help_finally
+@flush_pager
+@click.option('--by', type=click.Choice(sorted(PARTITION_KEY_LENGTHS)), default='year',
+              show_default=True, help=help_strings.STORE_PARTITION_BY_HELP)
+@click.option('--before', metavar='DATE',
+              help=help_strings.STORE_PARTITION_BEFORE_HELP)
+@click.option('--partition-dir', type=click.Path(file_okay=False), metavar='DIR',
+              help=help_strings.STORE_PARTITION_PARTITION_DIR_HELP)
+@pass_controller_context
+@induct_newbies
+def store_partition(ctx, controller, by, before, partition_dir):
+    """"""
+    partition_store(
+        controller,
+        by=by,
+        before=before,
+        partition_dir=partition_dir,
+    )
+
+
 @store_group.command('upgrade-legacy', help=help_strings.STORE_UPGRADE_LEGACY_HELP)
 @show_help_finally
 @flush_pager
@@ -709,6 +795,7 @@ def upgrade_legacy(ctx, controller, force, filename=None):
 @show_help_finally
 @flush_pager
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def nark_stats(ctx, controller):
     """List stats about the user's data."""
@@ -743,6 +830,7 @@ def list_group(ctx, controller):
 @flush_pager
 @cmd_options_any_search_query(command='list', item='activity', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def list_activities(ctx, controller, *args, **kwargs):
     """List matching activities, filtered and sorted."""
@@ -766,6 +854,7 @@ def query_activities(ctx, controller, *args, **kwargs):
 @flush_pager
 @cmd_options_any_search_query(command='list', item='category', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def list_categories(ctx, controller, *args, **kwargs):
     """List matching categories, filtered and sorted."""
@@ -791,6 +880,7 @@ def query_categories(ctx, controller, *args, **kwargs):
 # you use on which act@gories).
 @cmd_options_any_search_query(command='list', item='tags', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def list_tags(ctx, controller, *args, **kwargs):
     """List all tags, with filtering and sorting options."""
@@ -808,10 +898,17 @@ def query_tags(ctx, controller, *args, **kwargs):
 
 # *** FACTS.
 
-def _list_facts(controller, *args, cmd_journal=False, **kwargs):
+def _list_facts(controller, *args, cmd_journal=False, watch=False, **kwargs):
     """Find matching facts, filtered and sorted."""
     postprocess_options_normalize_search_args(kwargs, cmd_journal=cmd_journal)
-    list_fact.list_facts(controller, *args, **kwargs)
+
+    def list_facts():
+        list_fact.list_facts(controller, *args, **kwargs)
+
+    if not watch:
+        list_facts()
+    else:
+        watch_store(controller, list_facts)
 
 
 @list_group.command('facts', aliases=['fact'], help=help_strings.LIST_FACTS_HELP)
@@ -819,7 +916,9 @@ def _list_facts(controller, *args, cmd_journal=False, **kwargs):
 @flush_pager
 # The `dob find` and `dob list fact` commands are the same.
 @cmd_options_any_search_query(command='list', item='fact', match=True, group=True)
+@cmd_options_watch
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def dob_list_facts(ctx, controller, *args, **kwargs):
     _list_facts(controller, *args, **kwargs)
@@ -835,7 +934,9 @@ def dob_list_facts(ctx, controller, *args, **kwargs):
 @flush_pager
 # The `dob find` and `dob list fact` commands are the same.
 @cmd_options_any_search_query(command='list', item='fact', match=True, group=True)
+@cmd_options_watch
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def search_facts(ctx, controller, *args, **kwargs):
     _list_facts(controller, *args, **kwargs)
@@ -851,7 +952,9 @@ def search_facts(ctx, controller, *args, **kwargs):
 @flush_pager
 # The `dob report` command is `dob find` with specific defaults.
 @cmd_options_any_search_query(command='journal', item='fact', match=True, group=True)
+@cmd_options_watch
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def journal_report(ctx, controller, *args, **kwargs):
     # The journal command groups by Activity, Category, and Day by default,
@@ -885,6 +988,7 @@ def usage_group(ctx, controller):
 @flush_pager
 @cmd_options_any_search_query(command='usage', item='activity', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def usage_activities(ctx, controller, *args, **kwargs):
     """List all activities. Provide optional filtering by name."""
@@ -899,6 +1003,7 @@ def usage_activities(ctx, controller, *args, **kwargs):
 @flush_pager
 @cmd_options_any_search_query(command='usage', item='category', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def usage_categories(ctx, controller, *args, **kwargs):
     """List all categories. Provide optional filtering by name."""
@@ -912,6 +1017,7 @@ def usage_categories(ctx, controller, *args, **kwargs):
 @flush_pager
 @cmd_options_any_search_query(command='usage', item='tags', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def usage_tags(ctx, controller, *args, **kwargs):
     """List all tags' usage counts, with filtering and sorting options."""
@@ -925,6 +1031,7 @@ def usage_tags(ctx, controller, *args, **kwargs):
 @flush_pager
 @cmd_options_any_search_query(command='usage', item='fact', match=True, group=True)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def usage_facts(ctx, controller, *args, **kwargs):
     """List all tags' usage counts, with filtering and sorting options."""
@@ -960,11 +1067,15 @@ def cancel(ctx, controller, force):
 @run.command('current', help=help_strings.CURRENT_HELP)
 @show_help_finally
 @flush_pager
+@cmd_options_watch
 @pass_controller_context
 @induct_newbies
-def current(ctx, controller):
+def current(ctx, controller, watch):
     """Display the active Fact."""
-    echo_ongoing_fact(controller)
+    if not watch:
+        echo_ongoing_fact(controller)
+    else:
+        watch_store(controller, lambda: echo_ongoing_fact(controller))
 
 
 @cmd_bunch_group_ongoing_fact
@@ -982,11 +1093,18 @@ def latest(ctx, controller):
 @run.command('show', help=help_strings.HELP_CMD_SHOW)
 @show_help_finally
 @flush_pager
+@click.argument('key', nargs=1, type=int, required=False)
+@click.option('--history', is_flag=True, help=help_strings.HELP_CMD_SHOW_HISTORY)
 @pass_controller_context
 @induct_newbies
-def show(ctx, controller):
-    """Display the latest saved, or the active Fact."""
-    echo_ongoing_or_ended(controller)
+def show(ctx, controller, key, history):
+    """Display the latest saved, or the active Fact, or the Fact with the key."""
+    if history:
+        echo_fact_history(controller, key)
+    elif key is not None:
+        echo_fact_by_key(controller, key)
+    else:
+        echo_ongoing_or_ended(controller)
 
 
 # ***
@@ -999,7 +1117,7 @@ def generate_add_fact_command(time_hint):
         @cmd_options_fact_dryable
         @pass_controller_context
         @induct_newbies
-        @post_processor
+        @add_fact_post_processor
         def _add_fact(ctx, controller, *args, editor, **kwargs):
             return add_fact(
                 controller, *args, time_hint=time_hint, use_carousel=editor, **kwargs
@@ -1196,17 +1314,32 @@ add_group_kwargs = {
     **add_group_kwargs
 )
 @show_help_finally
-@show_help_if_no_command
 @flush_pager
 @cmd_options_factoid
 @cmd_options_fact_add
+@cmd_options_fact_add_batch
 @cmd_options_fact_dryable
 @pass_controller_context
 @induct_newbies
 @post_processor
-def add_group(ctx, controller, *args, **kwargs):
+def add_group(ctx, controller, *args, batch, null, **kwargs):
     """Base `add` group command run prior to any of the dob-add commands."""
-    pass
+    if batch:
+        if (
+            kwargs['factoid']
+            or kwargs['editor']
+            or kwargs['edit_text']
+            or kwargs['edit_meta']
+        ):
+            dob_in_user_exit(_(
+                'The --batch option reads Factoids from stdin, and cannot be'
+                ' used with a FACTOID, or with --editor, --edit-text, or --edit-meta.'
+            ))
+        stdin = click.get_text_stream('stdin')
+        return add_facts_batch(controller, stdin, null=null, dry=kwargs['dry'])
+    elif ctx.invoked_subcommand is None:
+        # Like @show_help_if_no_command, but not when adding a --batch.
+        click_echo(ctx.command.get_help(ctx))
 
 
 @cmd_bunch_group_add_fact
@@ -1312,6 +1445,7 @@ def edit_fact_by_key(
 @flush_pager
 @cmd_options_any_search_query(command='export', item='fact', match=True, group=False)
 @pass_controller_context
+@read_only_store
 @induct_newbies
 def transcode_export(ctx, controller, *args, **kwargs):
     """Export all facts of within a given time window to a file of specified format."""
@@ -1387,6 +1521,16 @@ def transcode_import(
         click_echo(msg)
         sys.exit(1)
 
+    # If following a file, it must be a file, and Facts go to the store.
+    if kwargs['follow'] and (
+        filename is None
+        or not os.path.isfile(filename.name)
+        or output
+    ):
+        msg = _('Please specify a file to --follow, and not with --output.')
+        click_echo(msg)
+        sys.exit(1)
+
     # If output file specified, verify file absent, or --force.
     if output and not force and os.path.exists(output.name):
         msg = _('Outfile already exists at: {}'.format(output.name))
@@ -1406,7 +1550,7 @@ def transcode_import(
         *args,
         file_in=filename,
         file_out=output,
-        use_carousel=(not no_editor),
+        use_carousel=(not no_editor and not kwargs['follow']),
         **kwargs
     )
     return pre_post_processed_saved_facts
@@ -1432,6 +1576,22 @@ def complete(ctx, controller):
     tab_complete(controller)
 
 
+# ***
+# *** [POST-PROCESS] Command [detached post-processors worker].
+# ***
+
+@run.command('post-process', hidden=True, help=help_strings.POST_PROCESS_HELP)
+@show_help_finally
+@flush_pager
+@click.argument('pks', nargs=-1, type=int)
+@pass_controller_context
+@induct_newbies
+@post_processor
+def post_process_facts(ctx, controller, pks):
+    """Run the plugin post-processors on the Facts with the given PKs."""
+    return [controller.facts.get(pk, deleted=None) for pk in pks]
+
+
 # ***
 # *** [MIGRATE] Commands [database transformations].
 # ***
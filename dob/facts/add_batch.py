@@ -0,0 +1,174 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Adds many Facts from one stream of Factoids, one per line."""
+
+from gettext import gettext as _
+
+import json
+import logging
+import sys
+from contextlib import redirect_stdout
+
+from dob_bright.termio import click_echo
+
+from ..store.transaction import fact_savepoint, store_transaction
+from .add_fact import add_fact
+
+__all__ = (
+    'add_facts_batch',
+    'BATCH_TIME_HINTS',
+    # Private:
+    #  'ErrorCollector',
+    #  'fact_result',
+)
+
+
+# SYNC_ME: dob.run.command(name, time_hint) ↔ BATCH_TIME_HINTS.
+BATCH_TIME_HINTS = {
+    'now': 'verify_none',
+    'on': 'verify_none',
+    'start': 'verify_none',
+    'at': 'verify_start',
+    'from': 'verify_both',
+    'to': 'verify_end',
+    'until': 'verify_end',
+    'stop': 'verify_end',
+    'then': 'verify_then',
+    'still': 'verify_still',
+    'after': 'verify_after',
+    'next': 'verify_after',
+}
+
+
+# ***
+
+def add_facts_batch(controller, input_stream, null=False, dry=False):
+    """Adds a Fact for each line read from the input, as a dob-add command would.
+
+    Each line starts with the add command name that says how to read its
+    times (e.g., ``now``, ``at``, ``from``, ``to``, ``then``), followed by
+    the Factoid, e.g., ``from 09:00 to 10:00 coding@Work: Fix bug``. Blank
+    lines, and lines starting with ``#``, are skipped. If ``null``, Factoids
+    are instead separated by NUL characters, so they may span lines.
+
+    All Facts are saved in one store transaction, with a savepoint per line,
+    so a line that fails does not affect the lines that succeed. Conflicts
+    are resolved as with ``--yes``, because the input stream is not there
+    to ask the user. The result of each line is echoed as a JSON object
+    (and other messages are sent to stderr, so stdout is just JSON lines).
+
+    Returns:
+        The list of Facts saved (for the post-processors).
+    """
+
+    def _add_facts_batch():
+        saved_facts = []
+        with store_transaction(controller, enabled=not dry):
+            for line_num, factoid in read_factoids():
+                result, line_facts = add_factoid(line_num, factoid)
+                saved_facts.extend(line_facts)
+                click_echo(json.dumps(result))
+        return saved_facts
+
+    def read_factoids():
+        if null:
+            factoids = input_stream.read().split('\0')
+        else:
+            factoids = input_stream
+        for line_num, factoid in enumerate(factoids, start=1):
+            factoid = factoid.strip()
+            if not factoid or factoid.startswith('#'):
+                continue
+            yield line_num, factoid
+
+    def add_factoid(line_num, factoid):
+        result = {'line': line_num}
+        command, _sep, rest = factoid.partition(' ')
+        try:
+            time_hint = BATCH_TIME_HINTS[command.rstrip(':')]
+        except KeyError:
+            result['error'] = _('Unknown add command: “{}”').format(command)
+            return result, []
+
+        # Keep stdout for the JSON results; anything add_fact has to say
+        # about the line (e.g., a conflict report) goes to stderr instead.
+        with ErrorCollector(controller.client_logger) as errors, \
+                redirect_stdout(sys.stderr):
+            try:
+                with fact_savepoint(controller):
+                    line_facts = add_fact(
+                        controller,
+                        factoid=rest,
+                        time_hint=time_hint,
+                        yes=True,
+                        dry=dry,
+                        quiet=True,
+                    )
+            except SystemExit:
+                # add_fact calls dob_in_user_exit on bad input, which has
+                # already told the user why; the savepoint was rolled back.
+                result['error'] = errors.message or _('Fact not saved')
+                return result, []
+            except Exception as err:
+                # E.g., nark's ValueError('Start after end!'). One bad line
+                # should not cost the user the whole batch.
+                result['error'] = str(err)
+                return result, []
+
+        line_facts = line_facts or []
+        result['facts'] = [fact_result(fact) for fact in line_facts]
+        return result, line_facts
+
+    return _add_facts_batch()
+
+
+def fact_result(fact):
+    def _isoformat(when):
+        return when.isoformat(' ') if when is not None else None
+
+    return {
+        'pk': fact.pk,
+        'start': _isoformat(fact.start),
+        'end': _isoformat(fact.end),
+        'deleted': bool(fact.deleted),
+    }
+
+
+# ***
+
+class ErrorCollector(logging.Handler):
+    """Collects the errors logged while the block runs."""
+
+    def __init__(self, logger):
+        super(ErrorCollector, self).__init__(level=logging.ERROR)
+        self.logger = logger
+        self.messages = []
+
+    def __enter__(self):
+        self.logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.logger.removeHandler(self)
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+    @property
+    def message(self):
+        return ' '.join(self.messages)
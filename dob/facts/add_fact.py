@@ -43,6 +43,7 @@ def add_fact(
     edit_meta=False,
     yes=False,
     dry=False,
+    quiet=False,
 ):
     """
     Start or add a fact.
@@ -72,10 +73,18 @@ def add_fact(
             MRU lists to try to make it easy for user to specify commonly
             used items.
 
+        quiet (bool, optional): If True, do not report progress, nor
+            celebrate the save (e.g., when the caller reports the results).
+
     Returns:
         Nothing: If everything went alright. (Otherwise, will have exited.)
     """
 
+    # Unless the user edits the Fact, it's saved without any interaction,
+    # so there's no need for the backup file (the Facts are saved in one
+    # transaction, so a failure leaves the store as it was).
+    interactive = use_carousel or edit_text or edit_meta
+
     def _add_fact():
         new_fact = _create_fact()
         new_fact_or_two, conflicts = _mend_times(new_fact)
@@ -176,10 +185,12 @@ def add_fact(
             controller,
             edit_facts=edit_facts,
             orig_facts=orig_facts,
+            backup=interactive,
             use_carousel=use_carousel,
             yes=yes,
             dry=dry,
             progress=None,
+            quiet=quiet,
         )
         return saved_facts
 
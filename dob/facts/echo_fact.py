@@ -25,9 +25,13 @@ from click_hotoffthehamster._textwrap import TextWrapper
 from dob_bright.termio import attr, click_echo, dob_in_user_exit, fg
 
 from ..clickux.help_strings import NO_ACTIVE_FACT_HELP
+from ..store.lineage import fact_versions
+from ..store.store_union import get_fact
 
 __all__ = (
     'echo_fact',
+    'echo_fact_by_key',
+    'echo_fact_history',
     'echo_latest_ended',
     'echo_ongoing_fact',
     'echo_ongoing_or_ended',
@@ -89,6 +93,37 @@ def echo_most_recent(controller, restrict=None, empty_msg=None):
         dob_in_user_exit(empty_msg)
 
 
+def echo_fact_by_key(controller, key):
+    try:
+        fact = get_fact(controller, key, deleted=None)
+    except KeyError:
+        dob_in_user_exit(_('No Fact with key ‘{}’ was found.').format(key))
+    echo_single_fact(controller, fact)
+
+
+def echo_fact_history(controller, key=None):
+    """Prints every version of the Fact (or of the latest Fact), oldest first."""
+    if key is None:
+        latest = controller.find_latest_fact(restrict=None)
+        if latest is None:
+            dob_in_user_exit(_('No facts found.'))
+        key = latest.pk
+    versions = fact_versions(controller, key)
+    if not versions:
+        dob_in_user_exit(_('No Fact with key ‘{}’ was found.').format(key))
+    for number, fact in enumerate(versions, start=1):
+        if number > 1:
+            click_echo()
+        click_echo('{}{}{}'.format(
+            attr('underlined'),
+            _('Version {} (key {}){}').format(
+                number, fact.pk, _(', edited') if fact.deleted else '',
+            ),
+            attr('reset'),
+        ))
+        echo_single_fact(controller, fact)
+
+
 # ***
 
 class AnsiWrapper(TextWrapper):
@@ -122,6 +157,10 @@ def echo_single_fact(controller, fact):
 
 def write_fact_block_format(fact_f, fact, rule, is_first_fact):
     write_fact_separator(fact_f, rule, is_first_fact)
+    fact_f.write(fact_block_friendly_str(fact))
+
+
+def fact_block_friendly_str(fact):
     friendly_str = fact.friendly_str(
         # description_sep='\n\n',
         description_sep=': ',
@@ -129,7 +168,7 @@ def write_fact_block_format(fact_f, fact, rule, is_first_fact):
         colorful=False,
         empty_actegory_placeholder='',
     )
-    fact_f.write(friendly_str)
+    return friendly_str
 
 
 def write_fact_separator(fact_f, rule, is_first_fact):
@@ -25,6 +25,7 @@ from dob_bright.termio import dob_in_user_exit, dob_in_user_warning
 
 from dob_prompt.prompters.triple_prompter import ask_user_for_edits
 
+from ..store.store_union import fact_in_store, get_moved_fact
 from .save_backedup import prompt_and_save_backedup
 from .simple_prompts import mend_facts_confirm_and_save_maybe
 
@@ -98,6 +99,8 @@ def edit_fact_by_pk(
         return FactDressed.new_gap_fact(start=controller.now)
 
     def fact_from_key_pk(key):
+        if not fact_in_store(controller, key):
+            must_not_be_moved(key)
         try:
             old_fact = controller.facts.get(pk=key)
             return old_fact
@@ -106,6 +109,18 @@ def edit_fact_by_pk(
                 _("No fact found with ID “{0}”.").format(key)
             )
 
+    def must_not_be_moved(key):
+        # The store does not check edits against the moved Facts (see
+        # MovedFacts), so they're read-only.
+        try:
+            get_moved_fact(controller, key)
+        except KeyError:
+            return
+        dob_in_user_exit(
+            _("The fact with ID “{0}” was moved from the store, and cannot be edited.")
+            .format(key)
+        )
+
     def fact_from_key_relative(key):
         offset = -1 - key
         old_facts = controller.facts.get_all(
@@ -0,0 +1,228 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Append-only journal of edited Facts, used to backup interactive edits."""
+
+import io
+import json
+import os
+import time
+
+from .echo_fact import fact_block_friendly_str, write_fact_separator
+
+__all__ = (
+    'EditJournal',
+    'is_journal_header',
+    'journal_as_factoids',
+    'replay_journal',
+    # Private:
+    #  'JOURNAL_MAGIC',
+)
+
+
+JOURNAL_MAGIC = '#!dob-edit-journal v1'
+"""The first line of every journal file, so the import command can detect one."""
+
+
+# ***
+
+class EditJournal(object):
+    """Records the Facts being edited, appending only those that changed.
+
+    The Carousel calls the backup callback every time the user makes an
+    edit, and each time it passes the complete set of prepared Facts.
+    Rather than rewriting all the Facts on every call, the journal keeps
+    track of what it last wrote for each Fact PK, and appends a single
+    JSON record for every Fact that changed, along with a per-PK version
+    counter. A Fact that disappears from the set is recorded as a drop.
+
+    Each batch of records is flushed to the OS immediately, but fsync is
+    only called every ``fsync_count`` records or ``fsync_secs`` seconds
+    (and always on close), so that a long editing session does not block
+    on the disk for every keystroke.
+
+    On close, the journal is compacted, i.e., rewritten so that it only
+    contains the latest version of each Fact.
+    """
+
+    def __init__(self, journal_f, fsync_count=64, fsync_secs=1.0):
+        self.journal_f = journal_f
+        self.fsync_count = fsync_count
+        self.fsync_secs = fsync_secs
+        # The latest record written for each PK, plus the Fact it came from,
+        # so an unchanged Fact (same object) can be skipped without work.
+        self.latest = {}
+        self.versions = {}
+        self.n_records = 0
+        self.n_unsynced = 0
+        self.last_fsync = time.time()
+        self.journal_f.write(JOURNAL_MAGIC + '\n')
+        self.journal_f.flush()
+
+    @property
+    def name(self):
+        return self.journal_f.name
+
+    @property
+    def closed(self):
+        return self.journal_f.closed
+
+    # ***
+
+    def record(self, facts):
+        """Appends a record for each new or changed Fact, and for each removed PK."""
+        seen_pks = set()
+        for fact in facts:
+            seen_pks.add(fact.pk)
+            self.record_fact(fact)
+        for dropped_pk in [pk for pk in self.latest if pk not in seen_pks]:
+            self.record_drop(dropped_pk)
+        self.journal_f.flush()
+        self.fsync_maybe()
+
+    def record_fact(self, fact):
+        entry = self.latest.get(fact.pk)
+        if entry is not None and entry['fact'] is fact:
+            # The Carousel replaces a Fact with a copy when it's edited,
+            # so the same object means the same Fact.
+            return
+        factoid = fact_block_friendly_str(fact)
+        deleted = bool(fact.deleted)
+        if (
+            entry is not None
+            and entry['record']['factoid'] == factoid
+            and entry['record']['deleted'] == deleted
+        ):
+            entry['fact'] = fact
+            return
+        record = {
+            'pk': fact.pk,
+            'ver': self.next_version(fact.pk),
+            'start': fact.start and fact.start.isoformat() or '',
+            'deleted': deleted,
+            'factoid': factoid,
+        }
+        self.append_record(record)
+        self.latest[fact.pk] = {'fact': fact, 'record': record}
+
+    def record_drop(self, pk):
+        record = {
+            'pk': pk,
+            'ver': self.next_version(pk),
+            'drop': True,
+        }
+        self.append_record(record)
+        del self.latest[pk]
+
+    def next_version(self, pk):
+        version = self.versions.get(pk, 0) + 1
+        self.versions[pk] = version
+        return version
+
+    def append_record(self, record):
+        self.journal_f.write(json.dumps(record) + '\n')
+        self.n_records += 1
+        self.n_unsynced += 1
+
+    # ***
+
+    def fsync_maybe(self, force=False):
+        if not self.n_unsynced:
+            return
+        if (
+            not force
+            and self.n_unsynced < self.fsync_count
+            and (time.time() - self.last_fsync) < self.fsync_secs
+        ):
+            return
+        os.fsync(self.journal_f.fileno())
+        self.n_unsynced = 0
+        self.last_fsync = time.time()
+
+    # ***
+
+    def close(self, compact=True):
+        if self.journal_f.closed:
+            return
+        self.journal_f.flush()
+        self.fsync_maybe(force=True)
+        self.journal_f.close()
+        if compact:
+            self.compact()
+
+    def compact(self):
+        """Rewrites the journal so it only holds the latest record per PK."""
+        if self.n_records == len(self.latest):
+            # Nothing was superseded or dropped.
+            return
+        journal_path = self.journal_f.name
+        compact_path = '{}.compact'.format(journal_path)
+        with open(compact_path, 'w') as compact_f:
+            compact_f.write(JOURNAL_MAGIC + '\n')
+            for entry in self.latest.values():
+                compact_f.write(json.dumps(entry['record']) + '\n')
+            compact_f.flush()
+            os.fsync(compact_f.fileno())
+        # Atomic on POSIX, so a crash leaves either the old or the new journal.
+        os.replace(compact_path, journal_path)
+        self.n_records = len(self.latest)
+
+
+# ***
+
+def is_journal_header(line):
+    return line.rstrip('\r\n') == JOURNAL_MAGIC
+
+
+def replay_journal(lines):
+    """Returns the latest record for each Fact in the journal, ordered by time.
+
+    The lines should exclude the header line. Dropped Facts are omitted,
+    and a torn final line (from a crash mid-append) is ignored.
+    """
+    latest = {}
+    for line in lines:
+        if not line.strip() or line.startswith('#'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+        pk = record['pk']
+        if pk in latest and latest[pk]['ver'] > record['ver']:
+            continue
+        latest[pk] = record
+    records = [record for record in latest.values() if not record.get('drop')]
+    records.sort(key=lambda record: (record['start'], record['pk']))
+    return records
+
+
+def journal_as_factoids(records, rule=''):
+    """Returns a stream of Factoids that rebuilds the journaled Facts on import.
+
+    Deleted Facts are skipped; a Factoid cannot express a deletion.
+    """
+    factoids_f = io.StringIO()
+    is_first_fact = True
+    for record in records:
+        if record['deleted']:
+            continue
+        write_fact_separator(factoids_f, rule, is_first_fact)
+        factoids_f.write(record['factoid'])
+        is_first_fact = False
+    factoids_f.seek(0)
+    return factoids_f
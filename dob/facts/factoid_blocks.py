@@ -0,0 +1,127 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Splits Factoid input into per-Fact blocks, the same way parse_input does."""
+
+import re
+
+from nark.helpers.parsing import parse_factoid
+
+from dob_bright.crud.fix_times import reduce_time_hint
+
+__all__ = (
+    'block_description',
+    'dissect_meta_line',
+    'split_factoid_blocks',
+)
+
+
+# SYNC_ME: This is dob_bright.crud.parse_input's RE_TIME_HINT.
+RE_TIME_HINT = re.compile(
+    r'^('
+    '(?P<verify_both>from|between)'
+    '|(?P<verify_start>at)'  # noqa: E131
+    '|(?P<verify_end>to|until)'
+    '|(?P<verify_then_none>then:)'
+    '|(?P<verify_then_some>then)'
+    '|(?P<verify_still_none>still:)'
+    '|(?P<verify_still_some>still)'
+    '|(?P<verify_after>after:|since:|next:)'
+    ' )',
+    re.IGNORECASE,
+)
+
+# SYNC_ME: This is dob_bright.crud.parse_input's FACT_SEP_HR.
+FACT_SEP_HR = re.compile(r'^([-=#|])\1{2}\1*$')
+
+
+def split_factoid_blocks(lines):
+    """Returns a list of (meta, lines) tuples, one per Factoid.
+
+    The meta is the parsed meta line of the Factoid, and the lines are
+    all its lines, including trailing blank lines. The lines before the
+    first Factoid, if any, are returned as a block with no meta.
+
+    Follows parse_input.parse_facts_from_stream.
+    """
+    blocks = []
+    meta = None
+    block = []
+    bl_count = -1
+    for line in lines:
+        if not line.strip():
+            if bl_count >= 0:
+                bl_count += 1
+            block.append(line)
+            continue
+        if bl_count == 0 or (bl_count > 0 and re.match(r'^\s', line)):
+            block.append(line)
+            continue
+        line_meta = dissect_meta_line(line)
+        if line_meta is None:
+            bl_count = 0
+            block.append(line)
+            continue
+        if meta is not None or block:
+            blocks.append((meta, block))
+        meta = line_meta
+        block = [line]
+        bl_count = 0
+    if meta is not None or block:
+        blocks.append((meta, block))
+    return blocks
+
+
+def dissect_meta_line(line):
+    """Returns the parsed Factoid meta line, or None if not a meta line."""
+    time_hint = 'verify_start'
+    match = RE_TIME_HINT.match(line)
+    if match is not None:
+        time_hint = [hint for hint, hit in match.groupdict().items() if hit][0]
+        line = RE_TIME_HINT.sub('', line).lstrip()
+        if time_hint in ('verify_after', 'verify_then_none', 'verify_still_none'):
+            # The time is implied, so this is always a new Fact.
+            return {'time_hint': time_hint}
+    fact_dict, err = parse_factoid(
+        factoid=(line,),
+        time_hint=reduce_time_hint(time_hint),
+        hash_stamps='#',
+        lenient=True,
+    )
+    if not fact_dict['start'] and not fact_dict['end']:
+        return None
+    fact_dict['time_hint'] = time_hint
+    return fact_dict
+
+
+def block_description(meta, block):
+    """Returns the Fact description from a block of Factoid lines.
+
+    Follows parse_input.hydrate_description.
+    """
+    desc_lines = block[1:]
+    if meta['description']:
+        desc_lines.insert(0, meta['description'] + '\n')
+    while desc_lines and not desc_lines[-1].strip():
+        desc_lines.pop()
+    if (
+        len(desc_lines) > 1
+        and not desc_lines[-2].strip()
+        and FACT_SEP_HR.match(desc_lines[-1])
+    ):
+        desc_lines.pop()
+    return ''.join(desc_lines).strip()
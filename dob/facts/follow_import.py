@@ -0,0 +1,260 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Imports Factoids from a file as they're appended to it."""
+
+from gettext import gettext as _
+
+import hashlib
+import json
+import os
+
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+from dob_bright.crud.parse_input import parse_input
+from dob_bright.termio import click_echo, dob_in_user_warning, highlight_value
+
+from ..helpers.file_watch import FileWatcher
+from .factoid_blocks import split_factoid_blocks
+from .save_backedup import prompt_and_save_backedup
+from .skip_existing import skip_existing_factoids
+
+__all__ = (
+    'follow_import',
+    'FollowImport',
+    # Private:
+    #  'FollowOffset',
+)
+
+
+def follow_import(controller, file_in, dry=False, skip_existing=False):
+    """Imports Factoids from a file, and keeps importing them as they're added.
+
+    Runs until interrupted (^C), and returns an empty list, because each Fact
+    is post-processed as soon as it's saved.
+    """
+    importer = FollowImport(
+        controller, file_in.name, dry=dry, skip_existing=skip_existing,
+    )
+    # (lb): Click opened the file, but we read it ourselves, in binary.
+    file_in.close()
+    try:
+        importer.follow()
+    except KeyboardInterrupt:
+        click_echo()
+    finally:
+        importer.close()
+    return []
+
+
+class FollowImport(object):
+    """Imports each Factoid appended to a file, as soon as it's complete.
+
+    A Factoid is complete once the next Factoid starts, or once the file
+    has stopped growing for ``settle_secs`` seconds. Each complete Factoid
+    is parsed and saved on its own, so each is committed in its own short
+    transaction, all using the same Controller (and store connection).
+
+    The offset of the first Factoid not yet saved is persisted, so that
+    following the same file again picks up where the last run stopped.
+
+    A Factoid that cannot be parsed or saved is reported and skipped (and
+    the offset moved past it), rather than ending the follow, or stopping
+    every later run on the same Factoid. Nor is the user asked to confirm
+    edits to saved Facts (as nobody's there to answer), so a Factoid that
+    conflicts with saved Facts is skipped, too.
+    """
+
+    SETTLE_SECS = 2.0
+
+    POLL_SECS = 1.0
+
+    def __init__(
+        self,
+        controller,
+        input_path,
+        dry=False,
+        skip_existing=False,
+        settle_secs=SETTLE_SECS,
+        poll_secs=POLL_SECS,
+    ):
+        self.controller = controller
+        self.input_path = os.path.abspath(input_path)
+        self.dry = dry
+        self.skip_existing = skip_existing
+        self.settle_secs = settle_secs
+        # On a dry run, remember the offset, but do not persist it.
+        self.offset = FollowOffset(self.input_path, persist=(not dry))
+        self.watcher = FileWatcher(self.input_path, poll_secs=poll_secs)
+
+    def close(self):
+        self.watcher.close()
+
+    # ***
+
+    def follow(self):
+        click_echo(
+            _('Following {} (^C to stop)...')
+            .format(highlight_value(self.input_path))
+        )
+        while True:
+            if self.watcher.wait(self.settle_secs):
+                # Import the Factoids followed by another Factoid, but not
+                # the last Factoid until the file stops changing.
+                self.catch_up(settled=False)
+            else:
+                self.catch_up(settled=True)
+
+    def catch_up(self, settled=True):
+        """Saves the complete Factoids not yet saved, and returns the saved Facts.
+
+        If ``settled``, the last Factoid in the file is deemed complete, too.
+        """
+        saved_facts = []
+        lines, line_ends = self.read_new_lines()
+        if not lines:
+            return saved_facts
+        blocks = split_factoid_blocks(lines)
+        if not settled:
+            blocks = blocks[:-1]
+        n_read = 0
+        pending = []
+        for meta, block in blocks:
+            pending += block
+            n_read += len(block)
+            if meta is None and not ''.join(block).strip():
+                # Just blank lines, before the first Factoid.
+                self.offset.commit(line_ends[n_read - 1])
+                pending = []
+                continue
+            saved_facts += self.save_block(pending)
+            self.offset.commit(line_ends[n_read - 1])
+            pending = []
+        return saved_facts
+
+    def read_new_lines(self):
+        """Returns the complete lines after the offset, and the offset of each's end."""
+        try:
+            stat = os.stat(self.input_path)
+        except FileNotFoundError:
+            return [], []
+        self.offset.reconcile(stat)
+        with open(self.input_path, 'rb') as input_f:
+            input_f.seek(self.offset.offset)
+            data = input_f.read()
+        # Ignore the last line until it's finished.
+        data = data[:data.rfind(b'\n') + 1]
+        lines = []
+        line_ends = []
+        end = self.offset.offset
+        for raw_line in data.splitlines(keepends=True):
+            end += len(raw_line)
+            line_ends.append(end)
+            # Emulate text mode universal newlines.
+            lines.append(raw_line.decode('utf-8').replace('\r\n', '\n'))
+        return lines, line_ends
+
+    def save_block(self, lines):
+        """Saves the Factoid in ``lines``, or reports why not, and skips it."""
+        try:
+            return self.save_lines(lines)
+        except (Exception, SystemExit) as err:
+            # (lb): dob_in_user_exit already reported the error, but not
+            # which Factoid caused it.
+            self.controller.store.session.rollback()
+            first_line = next((line.strip() for line in lines if line.strip()), '')
+            msg = _('Skipped the Factoid: {}').format(highlight_value(first_line))
+            if not isinstance(err, SystemExit):
+                msg += '\n{}'.format(err)
+            dob_in_user_warning(msg)
+            return []
+
+    def save_lines(self, lines):
+        if self.skip_existing:
+            lines, n_skipped, n_kept = skip_existing_factoids(
+                self.controller, lines, dry=self.dry,
+            )
+            if not n_kept:
+                return []
+        new_facts = parse_input(self.controller, file_in=lines, progress=None)
+        saved_facts = prompt_and_save_backedup(
+            self.controller,
+            edit_facts=new_facts,
+            backup=False,
+            use_carousel=False,
+            dry=self.dry,
+            yes=False,
+            interactive=False,
+        )
+        # Run the plugins now, rather than waiting for the follow to end.
+        self.controller.post_process(
+            self.controller, saved_facts, show_plugin_error=None,
+        )
+        return saved_facts
+
+
+class FollowOffset(object):
+    """The persisted offset into a followed file of the first unsaved Factoid.
+
+    The offset is stored in the user cache directory, under a name derived
+    from the path of the followed file. If the file is replaced (a new inode)
+    or truncated, following starts over from the start of the file.
+    """
+
+    OFFSET_DIR = 'import'
+
+    def __init__(self, input_path, persist=True):
+        self.input_path = input_path
+        self.persist = persist
+        path_hash = hashlib.sha256(input_path.encode('utf-8')).hexdigest()
+        self.path = get_appdirs_subdir_file_path(
+            file_basename='{}.follow'.format(path_hash),
+            dir_dirname=self.OFFSET_DIR,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+        self.inode = None
+        self.offset = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as offset_f:
+                saved = json.load(offset_f)
+        except (OSError, ValueError):
+            return
+        if saved.get('input_path') != self.input_path:
+            return
+        self.inode = saved['inode']
+        self.offset = saved['offset']
+
+    def reconcile(self, stat):
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+
+    def commit(self, offset):
+        self.offset = offset
+        if not self.persist:
+            return
+        # Write-and-rename, so a crash never leaves a partial offset file.
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'w') as offset_f:
+            json.dump({
+                'input_path': self.input_path,
+                'inode': self.inode,
+                'offset': self.offset,
+            }, offset_f)
+        os.replace(temp_path, self.path)
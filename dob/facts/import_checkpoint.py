@@ -0,0 +1,129 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Checkpoints that let an interrupted import resume where it left off."""
+
+import hashlib
+import json
+import os
+
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+
+__all__ = (
+    'ImportCheckpoint',
+    # Private:
+    #  'hash_file',
+)
+
+
+class ImportCheckpoint(object):
+    """Records the progress of an import of a file into the store.
+
+    The checkpoint is stored in the user cache directory, under a name
+    derived from the hash of the input file, so that it's only ever used
+    to resume an import of the exact same input. It records the offset
+    into the input of the first Fact not yet committed, and the (0-based)
+    index of the last Fact that was committed.
+    """
+
+    CHECKPOINT_DIR = 'import'
+
+    def __init__(self, input_path):
+        self.input_path = os.path.abspath(input_path)
+        self.input_hash = hash_file(self.input_path)
+        self.path = get_appdirs_subdir_file_path(
+            file_basename='{}.checkpoint'.format(self.input_hash),
+            dir_dirname=self.CHECKPOINT_DIR,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+        self.saved = self.load()
+        # Where the input being read starts, and the count of Facts committed
+        # before that point. Both are nonzero only when resuming.
+        self.base_offset = 0
+        self.base_index = 0
+        # Byte offset of each line read, and first line number of each Fact.
+        self.line_offsets = []
+        self.fact_line_nums = []
+
+    # ***
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as checkpoint_f:
+                saved = json.load(checkpoint_f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('input_hash') != self.input_hash:
+            return None
+        return saved
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.saved = None
+
+    # ***
+
+    def read_lines(self, encoding, resume=False):
+        """Yields the lines of input, starting after the checkpoint if resuming."""
+        if resume and self.saved:
+            self.base_offset = self.saved['byte_offset']
+            self.base_index = self.saved['fact_index'] + 1
+        offset = self.base_offset
+        with open(self.input_path, 'rb') as input_f:
+            input_f.seek(offset)
+            for raw_line in input_f:
+                self.line_offsets.append(offset)
+                offset += len(raw_line)
+                # Emulate text mode universal newlines.
+                yield raw_line.decode(encoding).replace('\r\n', '\n')
+
+    def track(self, facts):
+        """Remembers where each Fact to be committed starts in the input."""
+        self.fact_line_nums = [fact.parsed_source.line_num for fact in facts]
+
+    def commit(self, index):
+        """Records that the Fact at ``index`` of the tracked Facts was committed."""
+        if index + 1 >= len(self.fact_line_nums):
+            # Last Fact committed; nothing left to resume.
+            self.remove()
+            return
+        next_line_num = self.fact_line_nums[index + 1]
+        self.saved = {
+            'input_path': self.input_path,
+            'input_hash': self.input_hash,
+            'byte_offset': self.line_offsets[next_line_num - 1],
+            'fact_index': self.base_index + index,
+        }
+        self.write()
+
+    def write(self):
+        # Write-and-rename, so a crash never leaves a partial checkpoint.
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'w') as checkpoint_f:
+            json.dump(self.saved, checkpoint_f)
+        os.replace(temp_path, self.path)
+
+
+def hash_file(path):
+    input_hash = hashlib.sha256()
+    with open(path, 'rb') as input_f:
+        for chunk in iter(lambda: input_f.read(1024 * 1024), b''):
+            input_hash.update(chunk)
+    return input_hash.hexdigest()
@@ -17,10 +17,26 @@
 
 """A time tracker for the command line. Utilizing the power of nark."""
 
+from gettext import gettext as _
+
+import itertools
+import os
+import sys
+
 from dob_bright.crud.parse_input import parse_input
-from dob_bright.termio.crude_progress import CrudeProgress
+from dob_bright.termio import (
+    click_echo,
+    dob_in_user_exit,
+    dob_in_user_warning,
+    highlight_value,
+)
 
+from ..helpers.progress import RateProgress
+from .edit_journal import is_journal_header, journal_as_factoids, replay_journal
+from .follow_import import follow_import
+from .import_checkpoint import ImportCheckpoint
 from .save_backedup import prompt_and_save_backedup
+from .skip_existing import skip_existing_factoids
 
 
 __all__ = (
@@ -37,10 +53,32 @@ def import_facts(
     leave_backup=False,
     use_carousel=False,
     dry=False,
+    resume=False,
+    skip_existing=False,
+    follow=False,
+    progress_fd=None,
     **kwargs,
 ):
     """
     Import Facts from STDIN or a file.
+
+    The input may also be a backup journal from an interrupted editing
+    session, in which case the Facts from the journal are imported.
+
+    When importing a file directly into the store, a checkpoint is kept
+    after each Fact is committed, so that ``resume`` can skip over the
+    Facts that were already saved by an earlier, interrupted import. (But
+    not when editing in the Carousel, which saves all the Facts at once,
+    after the user is done editing.)
+
+    With ``skip_existing``, Factoids that match Facts already in the store
+    are dropped from the input before it's parsed.
+
+    With ``follow``, the input file is watched, and Factoids appended to it
+    are imported as they're written, until interrupted.
+
+    Progress is shown if stdout is a terminal, and if ``progress_fd`` is
+    specified, it's also written to that file descriptor, as JSON lines.
     """
 
     # Bah. Progress is only useful if mend_facts_times calls insert_forcefully,
@@ -50,14 +88,31 @@ def import_facts(
     # shouldn't, i.e., the use case is, I've been on vacation and Hamstering to
     # a file on my phone, and now I want that data imported into Hamster, which
     # will be strictly following the latest Fact saved in the store.
-    progress = CrudeProgress(enabled=True)
+    progress = RateProgress(progress_fd=progress_fd)
+
+    checkpoint = None
 
     def _import_facts():
+        if resume and use_carousel:
+            dob_in_user_exit(_(
+                'Cannot resume an import into the Carousel.'
+                ' Use --no-editor to import directly into the store.'
+            ))
+        if follow:
+            return follow_import(
+                controller, file_in, dry=dry, skip_existing=skip_existing,
+            )
+        input_lines = open_input_stream()
+        if skip_existing:
+            input_lines, n_kept = skip_existing_input(input_lines)
+            if not n_kept:
+                return []
         new_facts = parse_input(
             controller,
-            file_in=file_in,
+            file_in=input_lines,
             progress=progress,
         )
+        checkpoint and checkpoint.track(new_facts)
         saved_facts = prompt_and_save_backedup(
             controller,
             edit_facts=new_facts,
@@ -69,11 +124,91 @@ def import_facts(
             dry=dry,
             yes=False,
             progress=progress,
+            checkpoint=checkpoint,
             **kwargs,
         )
         return saved_facts
 
+    def open_input_stream():
+        nonlocal checkpoint
+
+        input_f = file_in if file_in is not None else sys.stdin
+        first_line = input_f.readline()
+        if is_journal_header(first_line):
+            # Recovering edits from the backup journal of an earlier session.
+            return journal_as_factoids(replay_journal(input_f), rule)
+        if not first_line:
+            return input_f
+        total_bytes = input_size(input_f)
+        encoding = getattr(input_f, 'encoding', None) or 'utf-8'
+        checkpoint = prepare_checkpoint(input_f)
+        if checkpoint is not None:
+            if resume and checkpoint.saved:
+                total_bytes -= checkpoint.saved['byte_offset']
+            input_lines = checkpoint.read_lines(encoding, resume=resume)
+        else:
+            # Not a journal, so put back the line we peeked.
+            input_lines = itertools.chain([first_line], input_f)
+        return progress.track_lines(
+            input_lines, _('Reading factoids'), total_bytes, encoding=encoding,
+        )
+
+    def input_size(input_f):
+        try:
+            stat = os.fstat(input_f.fileno())
+        except (AttributeError, OSError, ValueError):
+            # E.g., io.StringIO, which has no fileno.
+            return None
+        return stat.st_size if stat.st_size else None
+
+    def skip_existing_input(input_lines):
+        input_lines, n_skipped, n_kept = skip_existing_factoids(
+            controller, input_lines, dry=dry,
+        )
+        if n_skipped:
+            click_echo(
+                _('Skipped {} Facts already in the store.')
+                .format(highlight_value(n_skipped))
+            )
+        return input_lines, n_kept
+
+    # ***
+
+    def prepare_checkpoint(input_f):
+        input_path = getattr(input_f, 'name', None)
+        if (
+            dry
+            or file_out
+            or use_carousel
+            or not isinstance(input_path, str)
+            or not os.path.isfile(input_path)
+        ):
+            # Only a file being saved to the store is checkpointed.
+            resume and dob_in_user_warning(
+                _('Nothing to resume: Only a file import to the store is resumable.')
+            )
+            return None
+        checkpoint = ImportCheckpoint(input_path)
+        if not checkpoint.saved:
+            resume and dob_in_user_warning(
+                _('No checkpoint found for this input. Importing all Facts.')
+            )
+        elif resume:
+            click_echo(
+                _('Resuming import after Fact #{}.')
+                .format(highlight_value(checkpoint.saved['fact_index'] + 1))
+            )
+        else:
+            dob_in_user_warning(_(
+                'An earlier import of this input was interrupted.'
+                ' Use --resume to skip the Facts that were already saved.'
+            ))
+        return checkpoint
+
     # ***
 
-    return _import_facts()
+    try:
+        return _import_facts()
+    finally:
+        progress.close()
 
@@ -29,7 +29,7 @@ from dob_bright.termio import (
 )
 from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
 
-from .echo_fact import write_fact_block_format
+from .edit_journal import EditJournal
 from .save_confirmed import prompt_and_save_confirmed
 
 
@@ -57,7 +57,7 @@ def prompt_and_save_backedup(
         inner_error = None
         saved_facts = []
         try:
-            backup_callback = write_facts_file(backup_f, rule, dry)
+            backup_callback = write_facts_file(backup_f, dry)
             saved_facts = prompt_and_save_confirmed(
                 controller,
                 rule=rule,
@@ -77,6 +77,8 @@ def prompt_and_save_backedup(
             traceback.print_exc()
             inner_error = str(err)
         finally:
+            # Close (and fsync) the journal before possibly exiting.
+            cleanup_files(backup_f, delete_backup)
             if not delete_backup:
                 traceback.print_exc()
                 msg = 'Something horrible happened!'
@@ -87,8 +89,11 @@ def prompt_and_save_backedup(
                         _("\nBut don't worry. A backup of edits was saved at: {}")
                         .format(backup_f.name)
                     )
+                    msg += (
+                        _("\nYou can recover the edits with: dob import {}")
+                        .format(backup_f.name)
+                    )
                 dob_in_user_exit(msg)
-            cleanup_files(backup_f, delete_backup)
         return saved_facts
 
     # ***
@@ -101,7 +106,7 @@ def prompt_and_save_backedup(
         controller.client_logger.info(log_msg)
         backup_f = backup_file_open(backup_path)
         backup_file_symlink(backup_path, backup_link)
-        return backup_f
+        return EditJournal(backup_f)
 
     def backup_file_open(backup_path):
         try:
@@ -157,7 +162,8 @@ def prompt_and_save_backedup(
     def cleanup_files(backup_f, delete_backup):
         if not backup_f:
             return
-        backup_f.close()
+        # Skip compacting the journal if it's about to be deleted.
+        backup_f.close(compact=(not delete_backup or leave_backup))
         if not delete_backup:
             return
         if not leave_backup:
@@ -181,20 +187,17 @@ def prompt_and_save_backedup(
 
     # ***
 
-    def write_facts_file(fact_f, rule, dry):
+    def write_facts_file(journal, dry):
         def wrapper(carousel):
-            if dry or not fact_f:
+            if dry or not journal:
                 return
-            fact_f.truncate(0)
-            # (lb): truncate doesn't move the pointer (you can peek()), and while
-            # write seems to still work, it feels best to reset the pointer.
-            fact_f.seek(0)
-            for idx, fact in enumerate(carousel.prepared_facts):
+            prepared_facts = carousel.prepared_facts
+            for fact in prepared_facts:
                 # The Carousel should only send us facts that need to be
                 # stored, which excludes deleted Facts that were never stored.
                 controller.affirm((not fact.deleted) or (fact.pk > 0))
-                write_fact_block_format(fact_f, fact, rule, is_first_fact=(idx == 0))
-            fact_f.flush()
+            # Append just the Facts that changed since the previous callback.
+            journal.record(prepared_facts)
 
         return wrapper
 
@@ -19,6 +19,7 @@ from gettext import gettext as _
 
 import sys
 
+from ..store.archive import reserved_fact_ids
 
 __all__ = (
     'prompt_and_save_confirmed',
@@ -38,6 +39,8 @@ def prompt_and_save_confirmed(
     yes=False,
     dry=False,
     progress=None,
+    checkpoint=None,
+    quiet=False,
     **kwargs,
 ):
     """"""
@@ -70,14 +73,16 @@ def prompt_and_save_confirmed(
     def launch_carousel():
         # Not just lazy loading, but allows test_save_backedup to mock away.
         from dob_viewer.traverser.save_confirmer import prompt_and_save_confirmer
-        prompt_and_save_confirmer(
-            controller,
-            edit_facts=edit_facts,
-            orig_facts=orig_facts,
-            backup_callback=backup_callback,
-            dry=dry,
-            **kwargs,
-        )
+        # The Carousel saves the Facts itself, so reserve the moved IDs here.
+        with reserved_fact_ids(controller):
+            prompt_and_save_confirmer(
+                controller,
+                edit_facts=edit_facts,
+                orig_facts=orig_facts,
+                backup_callback=backup_callback,
+                dry=dry,
+                **kwargs,
+            )
         return []
 
     def prompt_directly():
@@ -93,6 +98,8 @@ def prompt_and_save_confirmed(
             yes=yes,
             dry=dry,
             progress=progress,
+            checkpoint=checkpoint,
+            quiet=quiet,
             **kwargs,
         )
         return saved_facts
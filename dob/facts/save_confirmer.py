@@ -23,8 +23,11 @@ from dob_bright.termio import (
     echo_block_header,
     highlight_value
 )
-from dob_bright.termio.crude_progress import CrudeProgress
 
+from ..helpers.progress import RateProgress
+from ..store.name_cache import item_name_cache
+from ..store.store_union import MovedFacts
+from ..store.transaction import store_transaction
 from .echo_fact import echo_fact, write_fact_block_format
 from .simple_prompts import mend_facts_confirm_and_save_maybe
 
@@ -34,6 +37,11 @@ __all__ = (
 )
 
 
+# When an import is being checkpointed, commit this many Facts at a time,
+# so an interrupted import loses at most this many Facts' worth of work.
+CHECKPOINT_COMMIT_SIZE = 100
+
+
 # ***
 
 def prompt_and_save_confirmer(
@@ -46,10 +54,14 @@ def prompt_and_save_confirmer(
     yes=False,
     dry=False,
     progress=None,
+    checkpoint=None,
+    quiet=False,
+    interactive=True,
     **kwargs,
 ):
     """"""
-    progress = CrudeProgress(enabled=True) if progress is None else progress
+    if progress is None:
+        progress = RateProgress(enabled=False if quiet else None)
 
     def _prompt_and_save():
         saved_facts = []
@@ -77,34 +89,45 @@ def prompt_and_save_confirmer(
         task_descrip = _('Saving facts')
         if progress is not None:
             term_width, dot_count, fact_sep = progress.start_crude_progressor(
-                task_descrip,
+                task_descrip, total=len(edit_facts),
             )
 
         new_and_edited = []
 
         other_edits = {fact.pk: fact for fact in edit_facts}
 
-        for idx, fact in enumerate(edit_facts):
-            if progress is not None:
-                term_width, dot_count, fact_sep = progress.step_crude_progressor(
-                    task_descrip, term_width, dot_count, fact_sep,
+        # Resolve the item names of all the Facts at once, rather than per
+        # Fact (but not if not saving to the store, when there's no need).
+        saving = not (dry or file_out)
+        cached_facts = edit_facts if saving else []
+        # Save all the Facts in one transaction, so that all the Facts are
+        # saved, or none are (and the store commits once, not per Fact).
+        with store_transaction(controller, enabled=saving) as transaction, \
+                item_name_cache(controller, cached_facts):
+            # Read the archived and partitioned times once, not per Fact.
+            moved_facts = MovedFacts(controller) if saving else None
+            for idx, fact in enumerate(edit_facts):
+                if progress is not None:
+                    term_width, dot_count, fact_sep = progress.step_crude_progressor(
+                        task_descrip, term_width, dot_count, fact_sep,
+                    )
+
+                is_first_fact = idx == 0
+                is_final_fact = idx == (len(edit_facts) - 1)
+                fact_pk = fact.pk
+                new_and_edited += persist_fact(
+                    fact, other_edits, is_first_fact, is_final_fact, moved_facts,
                 )
+                checkpoint_commit(transaction, idx)
+                # If an existing Fact:
+                #   - the pk is the same; and
+                #   - the saved Fact is marked deleted, and a new one is created,
+                #      or saved Fact is not marked deleted if it was ongoing Fact.
+                # But if a new Fact, pk was < 0, now it's None, and new fact pk > 0.
+                # Once saved, rely on Fact in store for checking conflicts.
 
-            is_first_fact = idx == 0
-            is_final_fact = idx == (len(edit_facts) - 1)
-            fact_pk = fact.pk
-            new_and_edited += persist_fact(
-                fact, other_edits, is_first_fact, is_final_fact,
-            )
-            # If an existing Fact:
-            #   - the pk is the same; and
-            #   - the saved Fact is marked deleted, and a new one is created,
-            #      or saved Fact is not marked deleted if it was ongoing Fact.
-            # But if a new Fact, pk was < 0, now it's None, and new fact pk > 0.
-            # Once saved, rely on Fact in store for checking conflicts.
-
-            # If fact existed, fact.pk; else, fact_pk < 0 is in-app temp. ID.
-            del other_edits[fact.pk is not None and fact.pk or fact_pk]
+                # If fact existed, fact.pk; else, fact_pk < 0 is in-app temp. ID.
+                del other_edits[fact.pk is not None and fact.pk or fact_pk]
 
         assert len(other_edits) == 0
 
@@ -115,14 +138,14 @@ def prompt_and_save_confirmer(
 
         return new_and_edited
 
-    def persist_fact(fact, other_edits, is_first_fact, is_final_fact):
+    def persist_fact(fact, other_edits, is_first_fact, is_final_fact, moved_facts):
         new_and_edited = [fact, ]
         if not dry:
             # If user did not specify an output file, save to database
             # (otherwise, we may have been maintaining a temporary file).
             if not file_out:
                 new_and_edited = persist_fact_save(
-                    fact, is_final_fact, other_edits,
+                    fact, is_final_fact, other_edits, moved_facts,
                 )
             else:
                 write_fact_block_format(file_out, fact, rule, is_first_fact)
@@ -133,9 +156,21 @@ def prompt_and_save_confirmer(
             click_echo()
         return new_and_edited
 
+    def checkpoint_commit(transaction, idx):
+        # Record import progress, so an interrupted import can be resumed.
+        # - The checkpoint is only as good as what's committed, so commit
+        #   in chunks, and record the checkpoint after each commit.
+        if checkpoint is None or transaction is None:
+            return
+        is_final_fact = idx == (len(edit_facts) - 1)
+        if not is_final_fact and (idx + 1) % CHECKPOINT_COMMIT_SIZE:
+            return
+        transaction.commit()
+        checkpoint.commit(idx)
+
     # ***
 
-    def persist_fact_save(fact, is_final_fact, other_edits):
+    def persist_fact_save(fact, is_final_fact, other_edits, moved_facts):
         # (lb): This is a rudimentary check. I'm guessing other code
         # will prevent user from editing old Fact and deleting its
         # end, either creating a second ongoing Fact, OR, more weirdly,
@@ -144,14 +179,15 @@ def prompt_and_save_confirmer(
         # FIXME: Do we care to confirm if is_final_fact is indeed latest ever? Meh?
         time_hint = 'verify_both' if not is_final_fact else 'verify_last'
         new_and_edited = mend_facts_confirm_and_save_maybe(
-            controller, fact, time_hint, other_edits, yes=yes, dry=dry,
+            controller, fact, time_hint, other_edits,
+            yes=yes, dry=dry, interactive=interactive, moved_facts=moved_facts,
         )
         return new_and_edited
 
     # ***
 
     def celebrate():
-        if not edit_facts:
+        if not edit_facts or quiet:
             return
         click_echo('{}{}{}! {}'.format(
             attr('underlined'),
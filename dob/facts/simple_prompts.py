@@ -30,6 +30,10 @@ from dob_bright.termio import (
     fg,
 )
 
+from ..store.archive import reserved_fact_ids
+from ..store.name_cache import item_name_cache
+from ..store.store_union import MovedFacts
+from ..store.transaction import fact_savepoint, store_transaction
 from .echo_fact import echo_fact
 
 __all__ = (
@@ -37,6 +41,7 @@ __all__ = (
     # Private:
     #   'echo_ongoing_completed',
     #   'must_confirm_fact_edits',
+    #   'must_not_overlap_moved_facts',
     #   'save_facts_maybe',
 )
 
@@ -44,13 +49,25 @@ __all__ = (
 # ***
 
 def mend_facts_confirm_and_save_maybe(
-    controller, fact, time_hint, other_edits, yes, dry,
+    controller,
+    fact,
+    time_hint,
+    other_edits,
+    yes,
+    dry,
+    interactive=True,
+    moved_facts=None,
 ):
     """"""
     def _mend_facts_confirm_and_save_maybe():
         new_fact_or_two, conflicts = mend_fact_timey_wimey(
             controller, fact, time_hint, other_edits,
         )
+        must_not_overlap_moved_facts(
+            controller,
+            list(new_fact_or_two) + [edited for edited, _original in conflicts],
+            moved_facts,
+        )
         saved_facts = confirm_conflicts_and_save_all(new_fact_or_two, conflicts)
         return saved_facts
 
@@ -58,7 +75,7 @@ def mend_facts_confirm_and_save_maybe(
         """"""
         # Ask user what to do about conflicts/edits.
         ignore_pks = other_edits.keys()
-        must_confirm_fact_edits(controller, conflicts, yes, dry)
+        must_confirm_fact_edits(controller, conflicts, yes, dry, interactive)
         saved_facts = save_facts_maybe(
             controller, new_fact_or_two, conflicts, ignore_pks, dry,
         )
@@ -69,8 +86,29 @@ def mend_facts_confirm_and_save_maybe(
 
 # ***
 
-def must_confirm_fact_edits(controller, conflicts, yes, dry):
-    """"""
+def must_not_overlap_moved_facts(controller, facts, moved_facts=None):
+    """Exits if any Fact is in the time of the archived or partitioned Facts."""
+    moved_facts = moved_facts or MovedFacts(controller)
+    for fact in facts:
+        if fact.deleted:
+            continue
+        moved_path = moved_facts.overlaps(fact.start, fact.end)
+        if moved_path is not None:
+            dob_in_user_exit(_(
+                'The Fact that starts at {} is in the time of the Facts'
+                ' moved to {}, which cannot be checked for conflicts,'
+                ' so it cannot be saved.'
+            ).format(fact.start, moved_path))
+
+
+# ***
+
+def must_confirm_fact_edits(controller, conflicts, yes, dry, interactive=True):
+    """Asks the user to confirm each edit to a saved Fact, or exits if declined.
+
+    Unless ``interactive``, nobody is there to ask, so exits instead (unless
+    ``yes`` or ``dry``), e.g., for `dob import --follow`.
+    """
 
     def _must_confirm_fact_edits(conflicts, yes, dry):
         conflicts = cull_stopped_ongoing(conflicts)
@@ -78,6 +116,14 @@ def must_confirm_fact_edits(controller, conflicts, yes, dry):
             return
 
         yes = yes or dry
+        if not yes and not interactive:
+            dob_in_user_exit(_(
+                'The Fact conflicts with {} saved {}, which is not changed'
+                ' without confirmation.'
+            ).format(
+                len(conflicts),
+                Inflector(English).conditional_plural(len(conflicts), 'Fact'),
+            ))
         if not yes:
             echo_confirmation_banner(conflicts)
 
@@ -148,6 +194,19 @@ def save_facts_maybe(controller, new_facts, conflicts, ignore_pks, dry):
     """"""
 
     def _save_facts_maybe(controller, new_facts, conflicts, ignore_pks, dry):
+        # Reuses the caller's item name cache and transaction, if any, else
+        # makes its own, so the new Fact and the edited Facts commit together.
+        with store_transaction(controller, enabled=not dry), \
+                item_name_cache(controller, facts_to_save(new_facts, conflicts)), \
+                reserved_fact_ids(controller):
+            return save_facts_cached(controller, new_facts, conflicts, ignore_pks, dry)
+
+    def facts_to_save(new_facts, conflicts):
+        if dry:
+            return []
+        return list(new_facts) + [edited_fact for edited_fact, _original in conflicts]
+
+    def save_facts_cached(controller, new_facts, conflicts, ignore_pks, dry):
         new_and_edited = []
         if conflicts and dry:
             echo_dry_run()
@@ -184,7 +243,8 @@ def save_facts_maybe(controller, new_facts, conflicts, ignore_pks, dry):
         if not dry:
             controller.client_logger.debug('{}: {}'.format(_('Save fact'), fact.short))
             try:
-                new_fact = controller.facts.save(fact, ignore_pks=ignore_pks)
+                with fact_savepoint(controller):
+                    new_fact = controller.facts.save(fact, ignore_pks=ignore_pks)
             except Exception as err:
                 traceback.print_exc()
                 dob_in_user_exit(str(err))
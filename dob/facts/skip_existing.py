@@ -0,0 +1,95 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Drops Factoids from import input that are already in the store."""
+
+from datetime import datetime
+
+from ..store.content_hash import fact_content_hash, find_existing_hashes
+from .factoid_blocks import block_description, split_factoid_blocks
+
+__all__ = (
+    'skip_existing_factoids',
+)
+
+
+# The time hints that never need the time of another Fact.
+ABSOLUTE_TIME_HINTS = ('verify_both', 'verify_start')
+
+
+def skip_existing_factoids(controller, lines, dry=False):
+    """Removes the Factoids that match Facts already in the store.
+
+    The input is split into Factoids the same way that ``parse_input``
+    does it, but only each Factoid's meta line is parsed, and only to
+    compute its content hash, which is then looked up in the store's
+    Fact hash index. So Factoids that already exist are dropped before
+    any of the expensive time mending and conflict checking happens.
+
+    Only Factoids with an absolute start and end time can be checked;
+    others (like ``to 12:00: ...``) are always kept.
+
+    Each skipped line is replaced with a blank line, so that the line
+    numbers of the remaining Factoids (used for error messages and
+    import checkpoints) are unchanged.
+
+    On a ``dry`` run, the Fact hash index is not updated.
+
+    Returns:
+        A tuple of the filtered lines, and the counts of Factoids skipped
+        and of Factoids kept.
+    """
+    def _skip_existing_factoids():
+        blocks = split_factoid_blocks(lines)
+        hashed = [content_hash_block(meta, block) for meta, block in blocks]
+        existing = find_existing_hashes(
+            controller, set(filter(None, hashed)), dry=dry,
+        )
+        filtered = []
+        n_skipped = 0
+        for (meta, block), content_hash in zip(blocks, hashed):
+            if content_hash is not None and content_hash in existing:
+                filtered.extend('\n' for line in block)
+                n_skipped += 1
+            else:
+                filtered.extend(block)
+        n_kept = len([meta for meta, block in blocks if meta]) - n_skipped
+        return filtered, n_skipped, n_kept
+
+    # ***
+
+    def content_hash_block(meta, block):
+        if (
+            not meta
+            or meta['time_hint'] not in ABSOLUTE_TIME_HINTS
+            or not isinstance(meta['start'], datetime)
+            or not isinstance(meta['end'], datetime)
+            or meta['warnings']
+        ):
+            return None
+        return fact_content_hash(
+            meta['start'],
+            meta['end'],
+            meta['activity'],
+            meta['category'],
+            meta['tags'],
+            block_description(meta, block),
+        )
+
+    # ***
+
+    return _skip_existing_factoids()
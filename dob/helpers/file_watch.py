@@ -0,0 +1,115 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Waits for a file to change, using inotify if available, otherwise polling."""
+
+import os
+import time
+
+try:
+    # (lb): Not a requirement: Linux-only, and polling works fine (if lazily).
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+__all__ = (
+    'FileWatcher',
+    # Private:
+    #  'stat_key',
+)
+
+
+class FileWatcher(object):
+    """Blocks until a file is changed, or until a timeout.
+
+    The watch is on the file's directory, not the file itself, so that the
+    watcher sees the file being created, replaced, or rotated, too.
+
+    Without inotify, the file is stat'ed every ``poll_secs`` seconds.
+    """
+
+    def __init__(self, path, poll_secs=1.0):
+        self.path = os.path.abspath(path)
+        self.poll_secs = poll_secs
+        self.last_stat = stat_key(self.path)
+        self.inotify = None
+        if inotify_simple is not None:
+            self.inotify = self.watch_directory()
+
+    def watch_directory(self):
+        flags = inotify_simple.flags
+        inotify = inotify_simple.INotify()
+        try:
+            inotify.add_watch(
+                os.path.dirname(self.path),
+                flags.MODIFY | flags.CLOSE_WRITE | flags.CREATE | flags.MOVED_TO,
+            )
+        except OSError:
+            # E.g., out of watches (fs.inotify.max_user_watches). Poll instead.
+            inotify.close()
+            return None
+        return inotify
+
+    @property
+    def polling(self):
+        return self.inotify is None
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    # ***
+
+    def wait(self, timeout):
+        """Returns True if the file changed before ``timeout`` seconds passed."""
+        if self.inotify is not None:
+            changed = self.wait_inotify(timeout)
+        else:
+            changed = self.wait_polling(timeout)
+        if changed:
+            self.last_stat = stat_key(self.path)
+        return changed
+
+    def wait_inotify(self, timeout):
+        basename = os.path.basename(self.path)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            events = self.inotify.read(timeout=int(remaining * 1000))
+            if any(event.name == basename for event in events):
+                return True
+
+    def wait_polling(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            if stat_key(self.path) != self.last_stat:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_secs, remaining))
+
+
+def stat_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
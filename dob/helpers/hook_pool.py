@@ -0,0 +1,99 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Runs hooks on a bounded pool of daemon threads, each with a timeout."""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+__all__ = (
+    'HookOutcome',
+    'run_hooks',
+)
+
+
+HookOutcome = namedtuple('HookOutcome', ('hook', 'elapsed', 'error', 'timed_out'))
+
+
+def run_hooks(hooks, call_hook, max_workers=4, timeout=None):
+    """Calls ``call_hook(hook)`` for each hook, at most ``max_workers`` at once.
+
+    Returns a HookOutcome per hook, in the order the hooks were given.
+
+    A hook that's still running after ``timeout`` seconds is abandoned:
+    it's reported as timed out, and its slot is given to the next hook.
+    Because the threads are daemons, an abandoned hook does not keep the
+    process from exiting (unlike a ThreadPoolExecutor, whose threads are
+    joined at exit).
+    """
+    hooks = list(hooks)
+    max_workers = max(1, max_workers or 1)
+    if not timeout or timeout < 0:
+        timeout = None
+
+    finished = queue.Queue()
+    running = {}
+    outcomes = [None] * len(hooks)
+
+    def _run_hooks():
+        next_ix = 0
+        while next_ix < len(hooks) or running:
+            while next_ix < len(hooks) and len(running) < max_workers:
+                start_hook(next_ix)
+                next_ix += 1
+            try:
+                hook_ix, elapsed, error = finished.get(timeout=next_wait())
+            except queue.Empty:
+                abandon_overdue()
+                continue
+            if running.pop(hook_ix, None) is not None:
+                outcomes[hook_ix] = HookOutcome(hooks[hook_ix], elapsed, error, False)
+            # else, the hook finished after it was abandoned.
+        return outcomes
+
+    def start_hook(hook_ix):
+        running[hook_ix] = time.monotonic()
+        thread = threading.Thread(
+            target=call_and_report, args=(hook_ix,), daemon=True,
+        )
+        thread.start()
+
+    def call_and_report(hook_ix):
+        began = time.monotonic()
+        error = None
+        try:
+            call_hook(hooks[hook_ix])
+        except BaseException as err:
+            error = err
+        finished.put((hook_ix, time.monotonic() - began, error))
+
+    def next_wait():
+        if timeout is None:
+            return None
+        deadline = min(running.values()) + timeout
+        return max(0, deadline - time.monotonic())
+
+    def abandon_overdue():
+        now = time.monotonic()
+        for hook_ix, began in list(running.items()):
+            if now - began >= timeout:
+                del running[hook_ix]
+                outcomes[hook_ix] = HookOutcome(hooks[hook_ix], now - began, None, True)
+
+    return _run_hooks()
@@ -15,6 +15,7 @@
 # You can find the GNU General Public License reprinted in the file titled 'LICENSE',
 # or visit <http://www.gnu.org/licenses/>.
 
+import time
 from gettext import gettext as _
 
 from dob_bright.termio import dob_in_user_warning
@@ -24,22 +25,35 @@ __all__ = (
 )
 
 
-def compile_and_eval_source(py_path):
-    """"""
+def compile_and_eval_source(py_path, timings=None):
+    """Compiles and evals the source file, and returns its globals.
+
+    If ``timings`` is a dict, the seconds spent compiling and eval'ing
+    are set on it, as 'compile_secs' and 'eval_secs'.
+    """
     def _compile_and_eval_source(py_path):
         with open(py_path, 'r') as py_text:
             eval_globals = compile_and_eval_module(py_text, py_path)
             return eval_globals
 
     def compile_and_eval_module(py_text, py_path):
+        began = time.monotonic()
         code = source_compile(py_text, py_path)
+        compiled = time.monotonic()
+        record_timing('compile_secs', compiled - began)
         if code is None:
             return {}
         eval_globals = globals()
-        if eval_source_code(code, eval_globals, py_path):
+        evaled = eval_source_code(code, eval_globals, py_path)
+        record_timing('eval_secs', time.monotonic() - compiled)
+        if evaled:
             return eval_globals
         return {}
 
+    def record_timing(key, secs):
+        if timings is not None:
+            timings[key] = secs
+
     def source_compile(py_text, py_path):
         try:
             code = compile(py_text.read(), py_path, 'exec')
@@ -0,0 +1,181 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""A progress reporter with a rate, percent and ETA, that updates sparingly."""
+
+import json
+import os
+import sys
+import time
+
+from dob_bright.termio.crude_progress import CrudeProgress
+
+__all__ = (
+    'RateProgress',
+    # Private:
+    #  'format_eta',
+)
+
+
+class RateProgress(CrudeProgress):
+    """Reports the progress of each task, at most every ``interval_ms``.
+
+    A drop-in for CrudeProgress (which ``parse_input`` and ``fix_times``
+    call), but rather than echoing a dot per step, it redraws one status
+    line, e.g., ``Saving facts: 450/1,000 45% 1,234 facts/s ETA 0:00:01``.
+
+    The status line is only drawn if stdout is a terminal. With a
+    ``progress_fd``, each update is also written to that file descriptor
+    as a line of JSON, for wrapper scripts to read. If neither, each call
+    returns immediately.
+    """
+
+    INTERVAL_MS = 100
+
+    def __init__(self, enabled=None, interval_ms=INTERVAL_MS, progress_fd=None):
+        super(RateProgress, self).__init__(
+            enabled=sys.stdout.isatty() if enabled is None else enabled,
+        )
+        self.interval = interval_ms / 1000.0
+        self.progress_f = None
+        if progress_fd is not None:
+            # Leave the descriptor open: it's the caller's.
+            self.progress_f = os.fdopen(
+                progress_fd, 'w', buffering=1, closefd=False,
+            )
+        self.reporting = self.enabled or self.progress_f is not None
+        self.task = None
+        self.total = None
+        self.unit = None
+        self.done = 0
+        self.started_at = None
+        self.updated_at = None
+
+    def close(self):
+        self.finish_task()
+        if self.progress_f is not None:
+            self.progress_f.close()
+            self.progress_f = None
+
+    # ***
+
+    def click_echo_current_task(self, task, no_clear=False):
+        if not self.reporting:
+            return
+        self.finish_task()
+        if self.enabled:
+            super(RateProgress, self).click_echo_current_task(task, no_clear)
+        task and self.write_record(task)
+
+    def start_crude_progressor(self, task_descrip, total=None, unit='facts'):
+        if not self.reporting:
+            return None, 0, None
+        self.finish_task()
+        self.task = task_descrip
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.started_at = time.monotonic()
+        self.updated_at = self.started_at
+        self.report()
+        return None, self.done, None
+
+    def step_crude_progressor(
+        self, task_descrip, term_width=None, dot_count=None, fact_sep=None, count=1,
+    ):
+        if not self.reporting:
+            return None, 0, None
+        self.done += count
+        now = time.monotonic()
+        if (now - self.updated_at) >= self.interval:
+            self.updated_at = now
+            self.report()
+        return None, self.done, None
+
+    def track_lines(self, lines, task_descrip, total_bytes=None, encoding='utf-8'):
+        """Wraps the lines of input, to report the progress through them.
+
+        Each line is counted by its size in ``encoding``, to match ``total_bytes``.
+        """
+        if not self.reporting:
+            return lines
+
+        def _track_lines():
+            self.start_crude_progressor(
+                task_descrip, total=total_bytes, unit='bytes',
+            )
+            for line in lines:
+                self.step_crude_progressor(
+                    task_descrip, count=len(line.encode(encoding)),
+                )
+                yield line
+            self.finish_task()
+
+        return _track_lines()
+
+    def finish_task(self):
+        if self.task is None:
+            return
+        self.report()
+        self.task = None
+
+    # ***
+
+    def report(self):
+        elapsed = time.monotonic() - self.started_at
+        rate = self.done / elapsed if elapsed > 0 else None
+        eta = None
+        if rate and self.total:
+            eta = max(self.total - self.done, 0) / rate
+        if self.enabled:
+            super(RateProgress, self).click_echo_current_task(
+                self.status_line(rate, eta),
+            )
+        self.write_record(self.task, rate, eta)
+
+    def status_line(self, rate, eta):
+        parts = ['{}:'.format(self.task)]
+        if self.total:
+            parts.append('{:,}/{:,}'.format(self.done, self.total))
+            parts.append('{:.0%}'.format(min(self.done / self.total, 1)))
+        else:
+            parts.append('{:,}'.format(self.done))
+        if rate:
+            parts.append('{:,.0f} {}/s'.format(rate, self.unit))
+        if eta is not None:
+            parts.append('ETA {}'.format(format_eta(eta)))
+        return ' '.join(parts)
+
+    def write_record(self, task, rate=None, eta=None):
+        if self.progress_f is None:
+            return
+        record = {'task': task}
+        if task == self.task:
+            record.update({
+                'done': self.done,
+                'total': self.total,
+                'unit': self.unit,
+                'rate': rate,
+                'eta': eta,
+            })
+        self.progress_f.write(json.dumps(record) + '\n')
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
@@ -0,0 +1,125 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Prints the ongoing Fact for a shell prompt or status bar, in a hurry.
+
+The ``dob-status`` command reads the status file that dob writes whenever
+the store changes, so it does not import Click, nark, or SQLAlchemy, nor
+open the store. Keep this module's imports to the standard library (and
+appdirs, which finds the same cache directory that dob uses).
+"""
+
+import datetime
+import json
+import os
+import sys
+
+import appdirs
+
+__all__ = (
+    'main',
+    'read_status_state',
+    'status_state',
+    'status_state_path',
+    'write_status_state',
+    # Private:
+    #  'START_FORMAT',
+    #  'STATUS_BASENAME',
+    #  'STATUS_DIR',
+    #  'format_elapsed',
+)
+
+
+STATUS_DIR = 'status'
+
+STATUS_BASENAME = 'status.json'
+
+# (lb): Not datetime.fromisoformat, which is Python 3.7+.
+START_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def status_state_path():
+    # SYNC_ME: dob_bright.config.app_dirs.AppDirs = DobAppDirs('dob').
+    return os.path.join(appdirs.user_cache_dir('dob'), STATUS_DIR, STATUS_BASENAME)
+
+
+# ***
+
+def status_state(fact, utc=False):
+    """Returns the status of the ongoing Fact (or None), as a JSON-able dict."""
+    if fact is None:
+        return {'ongoing': False, 'short': ''}
+    actegory = fact.activity.name if fact.activity else ''
+    if fact.category:
+        actegory = '{}@{}'.format(actegory, fact.category.name)
+    tags = sorted(tag.name for tag in fact.tags)
+    short = ' '.join([actegory] + ['#{}'.format(tag) for tag in tags]).strip()
+    return {
+        'ongoing': True,
+        'pk': fact.pk,
+        'activity': fact.activity.name if fact.activity else None,
+        'category': fact.category.name if fact.category else None,
+        'tags': tags,
+        'start': fact.start.strftime(START_FORMAT) if fact.start else None,
+        'utc': utc,
+        'short': short,
+    }
+
+
+def write_status_state(state, path=None):
+    path = path or status_state_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write-and-rename, so a status bar never reads a partial file.
+    temp_path = '{}.tmp'.format(path)
+    with open(temp_path, 'w') as state_f:
+        json.dump(state, state_f)
+    os.replace(temp_path, path)
+
+
+def read_status_state(path=None):
+    """Returns the status written by dob, or None if not written (or unreadable)."""
+    try:
+        with open(path or status_state_path(), 'r') as state_f:
+            return json.load(state_f)
+    except (OSError, ValueError):
+        return None
+
+
+# ***
+
+def format_elapsed(state, now=None):
+    if not state.get('start'):
+        return ''
+    start = datetime.datetime.strptime(state['start'], START_FORMAT)
+    if now is None:
+        now = datetime.datetime.utcnow() if state.get('utc') else datetime.datetime.now()
+    minutes = max(0, int((now - start).total_seconds() // 60))
+    return '{}:{:02d}'.format(minutes // 60, minutes % 60)
+
+
+def main(argv=None):
+    """Prints the ongoing Fact and its elapsed time (or the status, as JSON).
+
+    Usage: dob-status [--json]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    state = read_status_state()
+    if '--json' in argv:
+        print(json.dumps(state))
+    elif state and state.get('ongoing'):
+        print('{} {}'.format(state['short'], format_elapsed(state)).strip())
+    return 0
@@ -0,0 +1,373 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Moves the Facts that ended before a date to an archive store."""
+
+from gettext import gettext as _
+
+import os
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from nark.helpers.parse_time import parse_dated
+
+from dob_bright.termio import click_echo, dob_in_user_exit, highlight_value
+
+from .compact import copy_table_schema
+from .db_file import sqlite_db_path
+from .fts_index import merge_fts_index
+from .optimize import format_bytes, store_size
+from .store_union import (
+    ARCHIVE_STATE_TABLE,
+    ARCHIVE_TIME_FORMAT,
+    archive_state,
+    as_datetime
+)
+
+__all__ = (
+    'RESERVED_IDS_TABLE',
+    'ReservedFactIds',
+    'archive_db_path',
+    'archive_store',
+    'move_facts',
+    'reserved_fact_ids',
+    # Private:
+    #  'ARCHIVE_IDS_TABLE',
+    #  'ARCHIVE_SCHEMA',
+    #  'ARCHIVE_TABLES',
+    #  'copy_table_indexes',
+    #  'max_reserved_fact_id',
+    #  'reserve_fact_ids',
+)
+
+
+# The schema name the archive store is ATTACHed as.
+ARCHIVE_SCHEMA = 'dob_archive'
+
+# The tables copied to the archive (or a partition, see partition_store), in
+# the order that they're filled. The names tables are copied so the archive
+# stands on its own, but they stay in the store, too, where the store_union
+# queries find them.
+ARCHIVE_TABLES = ('categories', 'activities', 'tags', 'facts', 'fact_tags')
+
+# The temporary table of IDs of the Facts being archived.
+ARCHIVE_IDS_TABLE = 'dob_archive_ids'
+
+# The one-row table in the store that records the highest ID of the Facts
+# moved to the archive or the partitions (see reserve_fact_ids).
+RESERVED_IDS_TABLE = 'dob_reserved_ids'
+
+
+def archive_db_path(controller):
+    """Returns the path to the archive store, next to the store file.
+
+    E.g., the archive of ``dob.sqlite`` is kept in ``dob-archive.sqlite``.
+    Returns None if the store is not a SQLite file.
+    """
+    db_path = sqlite_db_path(controller)
+    if db_path is None:
+        return None
+    root, ext = os.path.splitext(db_path)
+    return '{}-archive{}'.format(root, ext)
+
+
+def archive_store(controller, before, archive_db=None):
+    """Moves the Facts that ended before ``before`` to the archive store.
+
+    The Facts (deleted or not) and their tags are moved, so the store, and
+    its indexes, only hold the recent Facts that most queries look for.
+    The queries whose ``since`` reaches before the archived date include
+    the archive (see ``store_union``), so old reports keep working.
+    """
+    session = controller.store.session
+
+    def _archive_store():
+        must_be_sqlite()
+        archived_before = must_parse_before()
+        state = archive_state(controller)
+        archive_path = must_have_archive_path(state)
+        if state is not None:
+            archived_before = max(archived_before, state[1])
+        size_before = store_size(controller)
+        # The temporary table and the ATTACH belong to the connection (see
+        # compact_store), so do all the work on one connection.
+        with session.get_bind().connect() as connection:
+            n_archived = archive_facts(connection, archive_path, archived_before)
+        if not n_archived:
+            click_echo(_('No Facts ended before {}.').format(before))
+            return
+        size_after = store_size(controller)
+        echo_report(archive_path, archived_before, n_archived, size_before, size_after)
+
+    def must_be_sqlite():
+        if controller.config['db.engine'] != 'sqlite':
+            dob_in_user_exit(_('Only a SQLite store can be archived.'))
+
+    def must_parse_before():
+        try:
+            archived_before = as_datetime(parse_dated(before, controller.now))
+        except Exception:
+            archived_before = None
+        if archived_before is None:
+            dob_in_user_exit(_('Not a date: ‘{}’').format(before))
+        # The store saves whole seconds, and so does the archive state.
+        return archived_before.replace(microsecond=0)
+
+    def must_have_archive_path(state):
+        if state is not None:
+            archive_path = state[0]
+            if archive_db and os.path.abspath(archive_db) != archive_path:
+                dob_in_user_exit(_(
+                    'The store is already archived to: {}'
+                ).format(archive_path))
+            return archive_path
+        archive_path = archive_db or archive_db_path(controller)
+        if not archive_path:
+            dob_in_user_exit(_(
+                'The store is not a file, so specify the archive with --archive-db.'
+            ))
+        archive_path = os.path.abspath(archive_path)
+        if archive_path == sqlite_db_path(controller):
+            dob_in_user_exit(_('The archive cannot be the store itself.'))
+        return archive_path
+
+    # ***
+
+    def archive_facts(connection, archive_path, archived_before):
+        # ATTACH cannot run inside a transaction (see compact_store).
+        connection.execute(
+            text('ATTACH DATABASE :path AS {}'.format(ARCHIVE_SCHEMA)),
+            {'path': archive_path},
+        )
+        try:
+            with connection.begin():
+                n_archived = mark_archive_ids(connection, archived_before)
+                if n_archived:
+                    move_facts(connection, ARCHIVE_SCHEMA, ARCHIVE_IDS_TABLE)
+                    merge_fts_index(connection)
+                    record_archive_state(connection, archive_path, archived_before)
+        finally:
+            connection.execute(text(
+                'DROP TABLE IF EXISTS temp.{}'.format(ARCHIVE_IDS_TABLE)
+            ))
+            connection.execute(text('DETACH DATABASE {}'.format(ARCHIVE_SCHEMA)))
+        if n_archived:
+            # Reclaim the space, so the store file is as small as its Facts.
+            connection.execute(text('VACUUM'))
+            connection.execute(text('ANALYZE'))
+        return n_archived
+
+    def mark_archive_ids(connection, archived_before):
+        # Only the Facts that ended before the date, so that every Fact that
+        # starts on or after it is still in the store (and the ongoing Fact
+        # never moves).
+        connection.execute(text(
+            'CREATE TEMP TABLE {} (id INTEGER PRIMARY KEY)'.format(ARCHIVE_IDS_TABLE)
+        ))
+        return connection.execute(text(
+            'INSERT INTO {} (id) SELECT id FROM main.facts'
+            ' WHERE end_time IS NOT NULL AND end_time < :before'
+            .format(ARCHIVE_IDS_TABLE)
+        ), {'before': archived_before.strftime(ARCHIVE_TIME_FORMAT)}).rowcount
+
+    def record_archive_state(connection, archive_path, archived_before):
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS main.{} ('
+            ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+            ' path TEXT NOT NULL,'
+            ' archived_before TEXT NOT NULL'
+            ')'.format(ARCHIVE_STATE_TABLE)
+        ))
+        connection.execute(text(
+            'INSERT OR REPLACE INTO main.{} (id, path, archived_before)'
+            ' VALUES (1, :path, :before)'.format(ARCHIVE_STATE_TABLE)
+        ), {
+            'path': archive_path,
+            'before': archived_before.strftime(ARCHIVE_TIME_FORMAT),
+        })
+
+    # ***
+
+    def echo_report(archive_path, archived_before, n_archived, size_before, size_after):
+        click_echo(_('Moved {} Facts to the archive: {}').format(
+            highlight_value(n_archived), archive_path,
+        ))
+        click_echo(_(
+            'Queries that reach back before {} will include the archive.'
+        ).format(highlight_value(archived_before.strftime(ARCHIVE_TIME_FORMAT))))
+        click_echo(_('Store size: {} → {}').format(
+            highlight_value(format_bytes(size_before['bytes'])),
+            highlight_value(format_bytes(size_after['bytes'])),
+        ))
+
+    return _archive_store()
+
+
+def move_facts(connection, schema, ids_table):
+    """Moves the Facts whose IDs are in ``ids_table``, and their tags, to ``schema``.
+
+    The attached store's tables (and indexes) are created if they're missing.
+    The moved IDs stay reserved, so a new Fact never reuses one of them.
+    """
+    for table_name in ARCHIVE_TABLES:
+        copy_table_schema(connection, table_name, schema)
+        copy_table_indexes(connection, table_name, schema)
+    ids = 'SELECT id FROM {}'.format(ids_table)
+    # The names rows may already be there, from an earlier move.
+    for table_name in ('categories', 'activities', 'tags'):
+        connection.execute(text(
+            'INSERT OR IGNORE INTO {schema}.{table} SELECT * FROM main.{table}'
+            .format(schema=schema, table=table_name)
+        ))
+    connection.execute(text(
+        'INSERT INTO {}.facts SELECT * FROM main.facts WHERE id IN ({})'
+        .format(schema, ids)
+    ))
+    connection.execute(text(
+        'INSERT INTO {}.fact_tags SELECT * FROM main.fact_tags'
+        ' WHERE fact_id IN ({})'.format(schema, ids)
+    ))
+    connection.execute(text(
+        'DELETE FROM main.fact_tags WHERE fact_id IN ({})'.format(ids)
+    ))
+    connection.execute(text('DELETE FROM main.facts WHERE id IN ({})'.format(ids)))
+    reserve_fact_ids(connection, ids_table)
+
+
+def reserve_fact_ids(connection, ids_table):
+    """Records the highest moved ID, so the store never gives it to a new Fact.
+
+    The store's facts.id is a plain INTEGER PRIMARY KEY, so SQLite would give
+    the next Fact the highest ID left plus one, which could be the ID of a
+    moved Fact. And because the store_union queries see the store's Facts
+    and the moved Facts together, two Facts would share one ID. So the
+    highest moved ID is recorded, and the save path gives new Facts the IDs
+    after it (see ReservedFactIds). (nark owns the facts table, so dob does
+    not change it, e.g., to AUTOINCREMENT.)
+    """
+    max_id = connection.execute(text(
+        'SELECT MAX(id) FROM {}'.format(ids_table)
+    )).scalar()
+    if max_id is None:
+        return
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS main.{} ('
+        ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+        ' max_fact_id INTEGER NOT NULL'
+        ')'.format(RESERVED_IDS_TABLE)
+    ))
+    connection.execute(text(
+        'UPDATE main.{} SET max_fact_id = MAX(max_fact_id, :max_id)'
+        .format(RESERVED_IDS_TABLE)
+    ), {'max_id': max_id})
+    connection.execute(text(
+        'INSERT INTO main.{table} (id, max_fact_id) SELECT 1, :max_id'
+        ' WHERE NOT EXISTS (SELECT 1 FROM main.{table})'
+        .format(table=RESERVED_IDS_TABLE)
+    ), {'max_id': max_id})
+
+
+def max_reserved_fact_id(controller):
+    """Returns the highest ID of the moved Facts, or None if none were moved."""
+    if controller.config['db.engine'] != 'sqlite':
+        return None
+    session = controller.store.session
+    if not session.execute(text(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': RESERVED_IDS_TABLE}).scalar():
+        return None
+    return session.execute(text(
+        'SELECT max_fact_id FROM main.{}'.format(RESERVED_IDS_TABLE)
+    )).scalar()
+
+
+class ReservedFactIds(object):
+    """Gives each new Fact an ID after the IDs of the moved Facts.
+
+    While installed (see ``reserved_fact_ids``), the Fact manager's
+    ``add_and_commit`` assigns a new Fact the next ID after the highest
+    of the store's Fact IDs, the reserved IDs (see ``reserve_fact_ids``),
+    and the IDs it's already assigned (which may not be flushed yet).
+    Otherwise, the store would let SQLite pick the ID.
+    """
+
+    def __init__(self, controller, max_reserved):
+        self.facts = controller.facts
+        self.session = controller.store.session
+        self.max_reserved = max_reserved
+        self.last_pk = 0
+
+    def install(self):
+        self.facts.add_and_commit = self.add_and_commit
+
+    def uninstall(self):
+        # Remove the instance attribute, which restores the class method.
+        del self.facts.add_and_commit
+
+    def add_and_commit(self, alchemy_item, raw=False, skip_commit=False):
+        if alchemy_item.pk is None:
+            alchemy_item.pk = self.next_pk()
+        return type(self.facts).add_and_commit(
+            self.facts, alchemy_item, raw=raw, skip_commit=skip_commit,
+        )
+
+    def next_pk(self):
+        max_pk = self.session.execute(text('SELECT MAX(id) FROM main.facts')).scalar()
+        self.last_pk = max(max_pk or 0, self.max_reserved, self.last_pk) + 1
+        return self.last_pk
+
+
+@contextmanager
+def reserved_fact_ids(controller):
+    """Gives the Facts saved in the block IDs after the moved Facts' IDs.
+
+    If already installed, it's reused. If no Facts were ever moved from
+    the store, this does nothing, and SQLite picks the IDs, as usual.
+    """
+    active_reserved = getattr(controller.facts.add_and_commit, '__self__', None)
+    if isinstance(active_reserved, ReservedFactIds):
+        yield
+        return
+    max_reserved = max_reserved_fact_id(controller)
+    if max_reserved is None:
+        yield
+        return
+    reserved = ReservedFactIds(controller, max_reserved)
+    reserved.install()
+    try:
+        yield
+    finally:
+        reserved.uninstall()
+
+
+def copy_table_indexes(connection, table_name, schema):
+    """Creates the store table's indexes in the attached store, if missing."""
+    rows = connection.execute(text(
+        "SELECT sql FROM main.sqlite_master"
+        " WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"
+    ), {'name': table_name})
+    for create_sql, in rows.fetchall():
+        # E.g., 'CREATE INDEX ix ON facts (' → 'CREATE INDEX IF NOT EXISTS
+        # dob_archive.ix ON facts (' (an attached index names its schema).
+        create_sql = re.sub(
+            r'^CREATE (UNIQUE )?INDEX\s+',
+            r'CREATE \1INDEX IF NOT EXISTS {}.'.format(schema),
+            create_sql,
+        )
+        connection.execute(text(create_sql))
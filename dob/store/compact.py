@@ -0,0 +1,267 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Moves superseded Fact versions out of the store, into a history store."""
+
+from gettext import gettext as _
+
+import os
+import re
+from datetime import timedelta
+
+from sqlalchemy import DateTime, bindparam, text
+
+from dob_bright.termio import click_echo, dob_in_user_exit, highlight_value
+
+from .db_file import sqlite_db_path
+from .fts_index import merge_fts_index
+from .optimize import format_bytes, store_size
+
+__all__ = (
+    'HISTORY_SCHEMA',
+    'HISTORY_SUCCESSORS_TABLE',
+    'compact_store',
+    'copy_table_schema',
+    'history_db_path',
+    # Private:
+    #  'COMPACT_IDS_TABLE',
+    #  'HISTORY_TABLES',
+)
+
+
+# The schema name the history store is ATTACHed as.
+HISTORY_SCHEMA = 'dob_history'
+
+# The tables copied to the history store, in the order that they're filled.
+HISTORY_TABLES = ('categories', 'activities', 'tags', 'facts', 'fact_tags')
+
+# Maps each compacted Fact version to the (live or kept) Fact that was
+# split from it. This is the lineage reference that's removed from the
+# store, where the successor's split_from_id is set to NULL.
+HISTORY_SUCCESSORS_TABLE = 'fact_successors'
+
+# The temporary table of IDs of the Fact versions being compacted.
+COMPACT_IDS_TABLE = 'dob_compact_ids'
+
+
+def history_db_path(controller):
+    """Returns the path to the history store, next to the store file.
+
+    E.g., the history of ``dob.sqlite`` is kept in ``dob-history.sqlite``.
+    Returns None if the store is not a SQLite file.
+    """
+    db_path = sqlite_db_path(controller)
+    if db_path is None:
+        return None
+    root, ext = os.path.splitext(db_path)
+    return '{}-history{}'.format(root, ext)
+
+
+def compact_store(controller, keep_history, history_db=None, discard=False):
+    """Removes the deleted Fact versions older than ``keep_history`` days.
+
+    Every edit saves a new copy of the Fact and marks the old one deleted
+    (see ``new_fact_from_factoid``), so a store that's been used for a
+    while has more deleted versions than live Facts. This moves the deleted
+    Facts whose start time is before the cutoff (along with their tags, and
+    the Activities, Categories, and Tags they use) to the history store,
+    or, if ``discard``, it just deletes them. The Facts that were split
+    from a compacted version are unlinked from it (and the link is recorded
+    in the history store), and then the store is vacuumed.
+    """
+    session = controller.store.session
+
+    def _compact_store():
+        must_be_sqlite()
+        must_keep_some_history()
+        history_path = None if discard else must_have_history_path()
+        size_before = store_size(controller)
+        # The temporary table and the ATTACH belong to the connection, but
+        # the session may use a different connection after it commits, so
+        # do all the work on one connection.
+        with session.get_bind().connect() as connection:
+            n_compacted, n_unlinked = compact_versions(connection, history_path)
+        if not n_compacted:
+            click_echo(_('No deleted Fact versions older than {} days.').format(
+                keep_history,
+            ))
+            return
+        size_after = store_size(controller)
+        echo_report(history_path, n_compacted, n_unlinked, size_before, size_after)
+
+    def must_be_sqlite():
+        if controller.config['db.engine'] != 'sqlite':
+            dob_in_user_exit(_('Only a SQLite store can be compacted.'))
+
+    def must_keep_some_history():
+        if keep_history < 0:
+            dob_in_user_exit(_('The days of history to keep cannot be negative.'))
+
+    def must_have_history_path():
+        history_path = history_db or history_db_path(controller)
+        if not history_path:
+            dob_in_user_exit(_(
+                'The store is not a file, so specify the history store'
+                ' with --history-db (or use --discard).'
+            ))
+        history_path = os.path.abspath(history_path)
+        if history_path == sqlite_db_path(controller):
+            dob_in_user_exit(_('The history store cannot be the store itself.'))
+        return history_path
+
+    # ***
+
+    def compact_versions(connection, history_path):
+        # ATTACH cannot run inside a transaction, so attach first. (pysqlite
+        # does not BEGIN until the first INSERT/UPDATE/DELETE.)
+        history_path and attach_history(connection, history_path)
+        try:
+            with connection.begin():
+                n_compacted = mark_compact_ids(connection)
+                n_unlinked = 0
+                if n_compacted:
+                    history_path and archive_versions(connection)
+                    n_unlinked = unlink_successors(connection, bool(history_path))
+                    delete_versions(connection)
+                    merge_fts_index(connection)
+        finally:
+            connection.execute(text(
+                'DROP TABLE IF EXISTS temp.{}'.format(COMPACT_IDS_TABLE)
+            ))
+            history_path and detach_history(connection)
+        if n_compacted:
+            # VACUUM cannot run inside a transaction (see optimize_store), and
+            # ANALYZE updates the row counts that the query planner uses.
+            connection.execute(text('VACUUM'))
+            connection.execute(text('ANALYZE'))
+        return n_compacted, n_unlinked
+
+    def mark_compact_ids(connection):
+        cutoff = controller.now - timedelta(days=keep_history)
+        connection.execute(text(
+            'CREATE TEMP TABLE {} (id INTEGER PRIMARY KEY)'.format(COMPACT_IDS_TABLE)
+        ))
+        query = text(
+            'INSERT INTO {} (id)'
+            ' SELECT id FROM facts WHERE deleted = 1 AND start_time < :cutoff'
+            .format(COMPACT_IDS_TABLE)
+        ).bindparams(bindparam('cutoff', type_=DateTime))
+        return connection.execute(query, {'cutoff': cutoff}).rowcount
+
+    def attach_history(connection, history_path):
+        connection.execute(
+            text('ATTACH DATABASE :path AS {}'.format(HISTORY_SCHEMA)),
+            {'path': history_path},
+        )
+
+    def detach_history(connection):
+        connection.execute(text('DETACH DATABASE {}'.format(HISTORY_SCHEMA)))
+
+    # ***
+
+    def archive_versions(connection):
+        for table_name in HISTORY_TABLES:
+            copy_table_schema(connection, table_name, HISTORY_SCHEMA)
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS {}.{}'
+            ' (fact_id INTEGER PRIMARY KEY, successor_id INTEGER)'
+            .format(HISTORY_SCHEMA, HISTORY_SUCCESSORS_TABLE)
+        ))
+        ids = 'SELECT id FROM {}'.format(COMPACT_IDS_TABLE)
+        activity_ids = 'SELECT activity_id FROM main.facts WHERE id IN ({})'.format(ids)
+        # The names tables are shared with the live Facts, so copy the rows the
+        # compacted versions use (and keep what an earlier compaction copied).
+        archive_rows(connection, 'categories', (
+            'id IN (SELECT category_id FROM main.activities WHERE id IN ({}))'
+            .format(activity_ids)
+        ), ignore=True)
+        archive_rows(connection, 'activities', 'id IN ({})'.format(activity_ids),
+                     ignore=True)
+        archive_rows(connection, 'tags', (
+            'id IN (SELECT tag_id FROM main.fact_tags WHERE fact_id IN ({}))'
+            .format(ids)
+        ), ignore=True)
+        archive_rows(connection, 'facts', 'id IN ({})'.format(ids))
+        archive_rows(connection, 'fact_tags', 'fact_id IN ({})'.format(ids))
+
+    def archive_rows(connection, table_name, where, ignore=False):
+        connection.execute(text(
+            'INSERT {}INTO {}.{} SELECT * FROM main.{} WHERE {}'.format(
+                'OR IGNORE ' if ignore else '',
+                HISTORY_SCHEMA,
+                table_name,
+                table_name,
+                where,
+            )
+        ))
+
+    def unlink_successors(connection, archive):
+        successors_where = (
+            'split_from_id IN (SELECT id FROM {ids})'
+            ' AND id NOT IN (SELECT id FROM {ids})'
+        ).format(ids=COMPACT_IDS_TABLE)
+        if archive:
+            connection.execute(text(
+                'INSERT OR REPLACE INTO {}.{} (fact_id, successor_id)'
+                ' SELECT split_from_id, id FROM main.facts WHERE {}'
+                .format(HISTORY_SCHEMA, HISTORY_SUCCESSORS_TABLE, successors_where)
+            ))
+        return connection.execute(text(
+            'UPDATE facts SET split_from_id = NULL WHERE {}'.format(successors_where)
+        )).rowcount
+
+    def delete_versions(connection):
+        ids = 'SELECT id FROM {}'.format(COMPACT_IDS_TABLE)
+        connection.execute(text(
+            'DELETE FROM fact_tags WHERE fact_id IN ({})'.format(ids)
+        ))
+        connection.execute(text('DELETE FROM facts WHERE id IN ({})'.format(ids)))
+
+    # ***
+
+    def echo_report(history_path, n_compacted, n_unlinked, size_before, size_after):
+        if history_path:
+            click_echo(_('Moved {} deleted Fact versions to the history store: {}')
+                       .format(highlight_value(n_compacted), history_path))
+        else:
+            click_echo(_('Discarded {} deleted Fact versions.').format(
+                highlight_value(n_compacted),
+            ))
+        if n_unlinked:
+            click_echo(_('Unlinked {} Facts from the versions they were split from.')
+                       .format(n_unlinked))
+        click_echo(_('Vacuumed the store.'))
+        click_echo(_('Store size: {} → {}').format(
+            highlight_value(format_bytes(size_before['bytes'])),
+            highlight_value(format_bytes(size_after['bytes'])),
+        ))
+
+    return _compact_store()
+
+
+def copy_table_schema(connection, table_name, schema):
+    """Creates the store table in the attached store, if it's not there yet."""
+    create_sql = connection.execute(text(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': table_name}).scalar()
+    # E.g., 'CREATE TABLE facts (' → 'CREATE TABLE IF NOT EXISTS dob_history.facts ('
+    create_sql = re.sub(
+        r'^CREATE TABLE\s+',
+        'CREATE TABLE IF NOT EXISTS {}.'.format(schema),
+        create_sql,
+    )
+    connection.execute(text(create_sql))
@@ -0,0 +1,199 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Content hashes of stored Facts, for detecting Facts already in the store."""
+
+import hashlib
+
+from sqlalchemy import text
+
+__all__ = (
+    'fact_content_hash',
+    'find_existing_hashes',
+    'hash_fact',
+    'update_fact_hashes',
+    # Private:
+    #  'FACT_HASH_TABLE',
+    #  'ensure_fact_hash_table',
+    #  'fact_hash_table_exists',
+    #  'unhashed_fact_hashes',
+)
+
+
+FACT_HASH_TABLE = 'dob_fact_hash'
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 for older versions.
+LOOKUP_BATCH_SIZE = 500
+
+
+# ***
+
+def fact_content_hash(start, end, activity, category, tags, description):
+    """Returns the content hash of a Fact given its parts.
+
+    The times are compared to the second, and item names are compared
+    exactly, as the store looks them up.
+    """
+    parts = (
+        str(start)[:19],
+        str(end)[:19],
+        activity or '',
+        category or '',
+        '\x1e'.join(sorted(tags)),
+        description or '',
+    )
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def hash_fact(fact):
+    activity = fact.activity
+    category = activity and activity.category
+    return fact_content_hash(
+        fact.start,
+        fact.end,
+        activity and activity.name,
+        category and category.name,
+        [tag.name for tag in fact.tags],
+        fact.description,
+    )
+
+
+# ***
+
+def ensure_fact_hash_table(controller):
+    # The start_time is recorded so a recycled Fact ID is not mistaken
+    # for the Fact that was hashed (SQLite reuses the greatest rowid
+    # after it's deleted).
+    session = controller.store.session
+    session.execute(text(
+        'CREATE TABLE IF NOT EXISTS {table} ('
+        ' fact_id INTEGER PRIMARY KEY,'
+        ' start_time TEXT NOT NULL,'
+        ' content_hash TEXT NOT NULL'
+        ')'.format(table=FACT_HASH_TABLE)
+    ))
+    session.execute(text(
+        'CREATE INDEX IF NOT EXISTS {table}_content_hash'
+        ' ON {table} (content_hash)'.format(table=FACT_HASH_TABLE)
+    ))
+
+
+def fact_hash_table_exists(controller):
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FACT_HASH_TABLE}).scalar())
+
+
+def update_fact_hashes(controller, dry=False):
+    """Hashes every unhashed Fact, and returns the count of Facts hashed.
+
+    Facts are only ever hashed after the fact, the first time they're
+    needed, so the save path pays no cost. Ongoing Facts are skipped, as
+    their end time will change in place when they're stopped.
+
+    On a ``dry`` run, the Facts are hashed, but the hashes are not saved
+    (nor is the hash table created), so the store is left untouched.
+    """
+    if dry:
+        return len(unhashed_fact_hashes(controller))
+    ensure_fact_hash_table(controller)
+    rows = unhashed_fact_hashes(controller)
+    session = controller.store.session
+    if rows:
+        session.execute(text(
+            'INSERT OR REPLACE INTO {table} (fact_id, start_time, content_hash)'
+            ' VALUES (:fact_id, :start_time, :content_hash)'.format(
+                table=FACT_HASH_TABLE,
+            )
+        ), rows)
+    session.commit()
+    return len(rows)
+
+
+def unhashed_fact_hashes(controller):
+    """Returns the hash table rows for the Facts not yet hashed."""
+    if fact_hash_table_exists(controller):
+        hashed_join = (
+            ' LEFT JOIN {table} h'
+            ' ON h.fact_id = f.id AND h.start_time = f.start_time'
+            ' WHERE h.fact_id IS NULL AND'.format(table=FACT_HASH_TABLE)
+        )
+    else:
+        hashed_join = ' WHERE'
+    unhashed = controller.store.session.execute(text(
+        'SELECT f.id, f.start_time, f.end_time, a.name, c.name, f.description,'
+        ' (SELECT group_concat(t.name, char(31))'
+        '  FROM fact_tags ft JOIN tags t ON t.id = ft.tag_id'
+        '  WHERE ft.fact_id = f.id)'
+        ' FROM facts f'
+        ' LEFT JOIN activities a ON a.id = f.activity_id'
+        ' LEFT JOIN categories c ON c.id = a.category_id'
+        '{hashed_join}'
+        ' NOT f.deleted'
+        ' AND f.end_time IS NOT NULL'.format(hashed_join=hashed_join)
+    )).fetchall()
+    return [
+        {
+            'fact_id': fact_id,
+            'start_time': start_time,
+            'content_hash': fact_content_hash(
+                start_time,
+                end_time,
+                act_name,
+                cat_name,
+                tag_names.split('\x1f') if tag_names else [],
+                description,
+            ),
+        }
+        for (
+            fact_id, start_time, end_time, act_name, cat_name, description, tag_names,
+        ) in unhashed
+    ]
+
+
+def find_existing_hashes(controller, content_hashes, dry=False):
+    """Returns the subset of the content hashes that match undeleted Facts.
+
+    On a ``dry`` run, the Facts not yet hashed are hashed in memory, and
+    the hashes are not saved (see ``update_fact_hashes``).
+    """
+    content_hashes = list(content_hashes)
+    existing = set()
+    if dry:
+        wanted = set(content_hashes)
+        existing.update(
+            row['content_hash'] for row in unhashed_fact_hashes(controller)
+            if row['content_hash'] in wanted
+        )
+        if not fact_hash_table_exists(controller):
+            return existing
+    else:
+        update_fact_hashes(controller)
+    session = controller.store.session
+    for offset in range(0, len(content_hashes), LOOKUP_BATCH_SIZE):
+        batch = content_hashes[offset:offset + LOOKUP_BATCH_SIZE]
+        params = {'hash_{}'.format(idx): value for idx, value in enumerate(batch)}
+        rows = session.execute(text(
+            'SELECT h.content_hash FROM {table} h'
+            ' JOIN facts f ON f.id = h.fact_id AND f.start_time = h.start_time'
+            ' WHERE NOT f.deleted AND h.content_hash IN ({binds})'.format(
+                table=FACT_HASH_TABLE,
+                binds=', '.join(':{}'.format(name) for name in params),
+            )
+        ), params).fetchall()
+        existing.update(row[0] for row in rows)
+    return existing
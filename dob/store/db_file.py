@@ -0,0 +1,70 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Identifies the SQLite store file, and detects when it's changed."""
+
+import os
+
+__all__ = (
+    'db_change_stamp',
+    'sqlite_db_path',
+    # Private:
+    #  'CHANGE_COUNTER_OFFSET',
+    #  'read_change_counter',
+)
+
+
+# The SQLite header "file change counter" is a 4-byte big-endian integer at
+# offset 24. It's incremented by every transaction that changes the file
+# (but not in WAL mode, so the WAL file is also stat'ed; see below).
+CHANGE_COUNTER_OFFSET = 24
+
+
+def sqlite_db_path(controller):
+    """Returns the absolute path to the store file, or None if not a file."""
+    if controller.config['db.engine'] != 'sqlite':
+        return None
+    db_path = controller.config['db.path']
+    if not db_path or db_path == ':memory:':
+        return None
+    return os.path.abspath(db_path)
+
+
+def db_change_stamp(db_path):
+    """Returns a value that changes whenever the store file is changed.
+
+    The value identifies the file (so a replaced file is noticed, too),
+    and includes its change counter and the state of its WAL file, if any.
+    Returns None if the file cannot be read.
+    """
+    try:
+        stat = os.stat(db_path)
+        change_counter = read_change_counter(db_path)
+    except OSError:
+        return None
+    try:
+        wal_stat = os.stat('{}-wal'.format(db_path))
+        wal_state = [wal_stat.st_size, wal_stat.st_mtime_ns]
+    except OSError:
+        wal_state = None
+    return [stat.st_dev, stat.st_ino, change_counter, wal_state]
+
+
+def read_change_counter(db_path):
+    with open(db_path, 'rb') as db_f:
+        db_f.seek(CHANGE_COUNTER_OFFSET)
+        return int.from_bytes(db_f.read(4), 'big')
@@ -0,0 +1,237 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Includes the Facts of other dob stores (e.g., from other machines) in queries."""
+
+from gettext import gettext as _
+
+import os
+
+from sqlalchemy import text
+
+from dob_bright.termio import dob_in_user_exit, dob_in_user_warning
+
+from .db_file import sqlite_db_path
+
+__all__ = (
+    'federate_stores',
+    'federated_paths',
+    'store_names_federated',
+    'unfederate_stores',
+    # Private:
+    #  'FEDERATED_SCHEMA',
+    #  'NAMES_COLUMNS',
+    #  'create_names_views',
+    #  'federate_store',
+    #  'federated_table',
+    #  'map_names',
+)
+
+
+# The schema name another store is ATTACHed as, while its Facts are copied.
+FEDERATED_SCHEMA = 'dob_federated'
+
+# The names tables, in the order they're mapped (an Activity references its
+# Category), and their columns, in the store's order, so they can be unioned.
+NAMES_COLUMNS = (
+    ('categories', 'id, name, deleted, hidden'),
+    ('activities', 'id, name, deleted, hidden, category_id'),
+    ('tags', 'id, name, deleted, hidden'),
+)
+
+
+def federated_paths(controller, stores):
+    """Returns the absolute paths of the other stores, without repeats or the store."""
+    if not stores:
+        return []
+    if controller.config['db.engine'] != 'sqlite':
+        dob_in_user_exit(_('Only a SQLite store can include other stores.'))
+    db_path = sqlite_db_path(controller)
+    store_paths = []
+    for store in stores:
+        store_path = os.path.abspath(store)
+        if store_path == db_path:
+            dob_in_user_warning(_(
+                'The store is always included, so --store is ignored: {}'
+            ).format(store))
+        elif store_path not in store_paths:
+            store_paths.append(store_path)
+    return store_paths
+
+
+def store_names_federated(controller):
+    """Returns True while the names queries include other stores' names."""
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = 'activities'"
+    )).scalar())
+
+
+def federate_stores(controller, store_paths, since, until, sources):
+    """Copies the other stores' Facts that might be in the query's window.
+
+    Each store numbers its Facts, Activities, Categories and Tags from 1,
+    so the copies are renumbered: an Activity, Category or Tag takes the
+    ID of the one with the same name (and Category) in the store, or in an
+    earlier store, if there's one, so that, e.g., the usage counts of an
+    Activity from several stores are combined. Otherwise, it (and each
+    Fact) is numbered after the largest ID so far.
+
+    The names are combined in TEMP views that shadow the store's names
+    tables, and the TEMP tables of Facts and their tags are added to
+    ``sources``, which ``store_union`` makes into views.
+
+    ``since`` and ``until`` are the stored time format, or None.
+    """
+    for number, store_path in enumerate(store_paths):
+        federate_store(controller, store_path, number, since, until, sources)
+        create_names_views(controller, number + 1)
+
+
+def federate_store(controller, store_path, number, since, until, sources):
+    session = controller.store.session
+    session.execute(
+        text('ATTACH DATABASE :path AS {}'.format(FEDERATED_SCHEMA)),
+        {'path': store_path},
+    )
+    try:
+        is_store = session.execute(text(
+            "SELECT 1 FROM {}.sqlite_master WHERE type = 'table' AND name = 'facts'"
+            .format(FEDERATED_SCHEMA)
+        )).scalar()
+        if not is_store:
+            dob_in_user_exit(_('Not a dob store: {}').format(store_path))
+        map_names(controller, number)
+        # A Fact that's in the window starts or ends in it (see partitions_overlap).
+        fact_base = max(
+            session.execute(text('SELECT IFNULL(MAX(id), 0) FROM {}'.format(source)))
+            .scalar()
+            for source in sources['facts']
+        )
+        session.execute(text(
+            'CREATE TEMP TABLE {facts} AS SELECT'
+            ' :base + f.id AS id, f.deleted, :base + f.split_from_id AS split_from_id,'
+            ' f.start_time, f.end_time, am.id AS activity_id, f.description'
+            ' FROM {schema}.facts AS f'
+            ' LEFT JOIN temp.{activities} AS am ON am.foreign_id = f.activity_id'
+            ' WHERE (:since IS NULL OR COALESCE(f.end_time, f.start_time) >= :since)'
+            ' AND (:until IS NULL OR f.start_time <= :until)'
+            .format(
+                facts=federated_table('facts', number),
+                activities=federated_table('activities', number),
+                schema=FEDERATED_SCHEMA,
+            )
+        ), {'base': fact_base, 'since': since, 'until': until})
+        session.execute(text(
+            'CREATE TEMP TABLE {fact_tags} AS SELECT'
+            ' :base + ft.fact_id AS fact_id, tm.id AS tag_id'
+            ' FROM {schema}.fact_tags AS ft'
+            ' JOIN temp.{tags} AS tm ON tm.foreign_id = ft.tag_id'
+            ' WHERE :base + ft.fact_id IN (SELECT id FROM temp.{facts})'
+            .format(
+                fact_tags=federated_table('fact_tags', number),
+                tags=federated_table('tags', number),
+                facts=federated_table('facts', number),
+                schema=FEDERATED_SCHEMA,
+            )
+        ), {'base': fact_base})
+    finally:
+        session.execute(text('DETACH DATABASE {}'.format(FEDERATED_SCHEMA)))
+    # The copies have no keys, so index the columns the queries join on.
+    session.execute(text(
+        'CREATE INDEX temp.{facts}_id ON {facts} (id)'
+        .format(facts=federated_table('facts', number))
+    ))
+    session.execute(text(
+        'CREATE INDEX temp.{fact_tags}_fact_id ON {fact_tags} (fact_id)'
+        .format(fact_tags=federated_table('fact_tags', number))
+    ))
+    sources['facts'].append('temp.{}'.format(federated_table('facts', number)))
+    sources['fact_tags'].append('temp.{}'.format(federated_table('fact_tags', number)))
+
+
+def map_names(controller, number):
+    """Maps the attached store's names' IDs to the IDs the queries use."""
+    session = controller.store.session
+    # The unqualified names tables are the views of the names so far, once
+    # there are any (see create_names_views).
+    for table_name, _columns in NAMES_COLUMNS:
+        base = session.execute(text(
+            'SELECT IFNULL(MAX(id), 0) FROM {}'.format(table_name)
+        )).scalar()
+        if table_name == 'activities':
+            # Activities are unique by name and Category.
+            select_mapped = (
+                ' f.name, f.deleted, f.hidden, cm.id AS category_id'
+                ' FROM {schema}.activities AS f'
+                ' LEFT JOIN temp.{categories} AS cm ON cm.foreign_id = f.category_id'
+                ' LEFT JOIN activities AS known'
+                ' ON known.name = f.name AND known.category_id IS cm.id'
+            ).format(
+                schema=FEDERATED_SCHEMA,
+                categories=federated_table('categories', number),
+            )
+        else:
+            select_mapped = (
+                ' f.name, f.deleted, f.hidden'
+                ' FROM {schema}.{table} AS f'
+                ' LEFT JOIN {table} AS known ON known.name = f.name'
+            ).format(schema=FEDERATED_SCHEMA, table=table_name)
+        session.execute(text(
+            'CREATE TEMP TABLE {mapped} AS SELECT'
+            ' f.id AS foreign_id,'
+            ' COALESCE(known.id, :base + f.id) AS id,'
+            ' known.id IS NULL AS is_new,'
+            '{select_mapped}'.format(
+                mapped=federated_table(table_name, number),
+                select_mapped=select_mapped,
+            )
+        ), {'base': base})
+
+
+def create_names_views(controller, n_stores):
+    """(Re)creates the TEMP views of the store's names and the new names."""
+    session = controller.store.session
+    for table_name, columns in NAMES_COLUMNS:
+        selects = ['SELECT {} FROM main.{}'.format(columns, table_name)]
+        selects.extend(
+            'SELECT {} FROM temp.{} WHERE is_new'.format(
+                columns, federated_table(table_name, number),
+            )
+            for number in range(n_stores)
+        )
+        session.execute(text('DROP VIEW IF EXISTS temp.{}'.format(table_name)))
+        session.execute(text('CREATE TEMP VIEW {} AS {}'.format(
+            table_name, ' UNION ALL '.join(selects),
+        )))
+
+
+def unfederate_stores(controller, n_stores):
+    """Drops the views and copies that federate_stores made."""
+    session = controller.store.session
+    for table_name, _columns in NAMES_COLUMNS:
+        session.execute(text('DROP VIEW IF EXISTS temp.{}'.format(table_name)))
+    for number in range(n_stores):
+        for table_name in ('categories', 'activities', 'tags', 'facts', 'fact_tags'):
+            session.execute(text('DROP TABLE IF EXISTS temp.{}'.format(
+                federated_table(table_name, number),
+            )))
+
+
+def federated_table(table_name, number):
+    return 'dob_federated_{}_{}'.format(table_name, number)
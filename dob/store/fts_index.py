@@ -0,0 +1,336 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""A full-text (SQLite FTS5) index of Fact descriptions and item names."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import column, select, table, text, union
+from sqlalchemy.exc import OperationalError
+
+from nark.backends.sqlalchemy.objects import AlchemyFact
+
+from .store_union import store_union_active
+
+__all__ = (
+    'FTS_TABLE',
+    'ensure_fts_index',
+    'fact_search_index',
+    'fts5_available',
+    'fts_index_exists',
+    'fts_match_expression',
+    'fts_substring_pks',
+    'merge_fts_index',
+    # Private:
+    #  'FTS_TRIGGERS',
+    #  'drop_rank_sort_col',
+    #  'fts_match_valid',
+)
+
+
+FTS_TABLE = 'dob_facts_fts'
+
+# The FTS rowid is the Fact PK, and the 'rank' column is the match relevance
+# (bm25), which is more negative the better the match.
+FTS = table(
+    FTS_TABLE,
+    column('rowid'),
+    column('rank'),
+    column('description'),
+    column('activity'),
+    column('category'),
+)
+
+# The index is made of trigrams, so that it finds the Facts whose description
+# contains a search term, like the LIKE search it replaces.
+FTS_TOKENIZE = "tokenize='trigram'"
+
+FACT_TAGS = table('fact_tags', column('fact_id'), column('tag_id'))
+TAGS = table('tags', column('id'), column('name'))
+
+# The Activity, Category and Tag names of the Fact aliased "{fact}".
+ACTIVITY_NAME = "(SELECT name FROM activities WHERE id = {fact}.activity_id)"
+CATEGORY_NAME = (
+    "(SELECT categories.name FROM activities"
+    " JOIN categories ON categories.id = activities.category_id"
+    " WHERE activities.id = {fact}.activity_id)"
+)
+# The Tag names of the Fact with the PK "{fact_id}".
+TAG_NAMES = (
+    "(SELECT group_concat(tags.name, ' ') FROM fact_tags"
+    " JOIN tags ON tags.id = fact_tags.tag_id"
+    " WHERE fact_tags.fact_id = {fact_id})"
+)
+
+INSERT_FACT_ROW = (
+    "INSERT INTO {fts} (rowid, description, activity, category, tags)"
+    " VALUES (new.id, new.description, {activity}, {category}, {tags});"
+).format(
+    fts=FTS_TABLE,
+    activity=ACTIVITY_NAME.format(fact='new'),
+    category=CATEGORY_NAME.format(fact='new'),
+    tags=TAG_NAMES.format(fact_id='new.id'),
+)
+
+DELETE_FACT_ROW = "DELETE FROM {fts} WHERE rowid = old.id;".format(fts=FTS_TABLE)
+
+# The triggers keep the index in sync with every change to the store,
+# whether made by dob, nark, or anything else.
+FTS_TRIGGERS = (
+    ('dob_fts_facts_ai', 'AFTER INSERT ON facts', INSERT_FACT_ROW),
+    ('dob_fts_facts_au', 'AFTER UPDATE ON facts', DELETE_FACT_ROW + INSERT_FACT_ROW),
+    ('dob_fts_facts_ad', 'AFTER DELETE ON facts', DELETE_FACT_ROW),
+    (
+        'dob_fts_fact_tags_ai',
+        'AFTER INSERT ON fact_tags',
+        "UPDATE {fts} SET tags = {tags} WHERE rowid = new.fact_id;".format(
+            fts=FTS_TABLE, tags=TAG_NAMES.format(fact_id='new.fact_id'),
+        ),
+    ),
+    (
+        'dob_fts_fact_tags_ad',
+        'AFTER DELETE ON fact_tags',
+        "UPDATE {fts} SET tags = {tags} WHERE rowid = old.fact_id;".format(
+            fts=FTS_TABLE, tags=TAG_NAMES.format(fact_id='old.fact_id'),
+        ),
+    ),
+    (
+        'dob_fts_activities_au',
+        'AFTER UPDATE OF name, category_id ON activities',
+        "UPDATE {fts} SET activity = new.name, category ="
+        " (SELECT name FROM categories WHERE id = new.category_id)"
+        " WHERE rowid IN (SELECT id FROM facts WHERE activity_id = new.id);".format(
+            fts=FTS_TABLE,
+        ),
+    ),
+    (
+        'dob_fts_categories_au',
+        'AFTER UPDATE OF name ON categories',
+        "UPDATE {fts} SET category = new.name"
+        " WHERE rowid IN (SELECT facts.id FROM facts"
+        " JOIN activities ON activities.id = facts.activity_id"
+        " WHERE activities.category_id = new.id);".format(fts=FTS_TABLE),
+    ),
+    (
+        'dob_fts_tags_au',
+        'AFTER UPDATE OF name ON tags',
+        "UPDATE {fts} SET tags = {tags}"
+        " WHERE rowid IN (SELECT fact_id FROM fact_tags WHERE tag_id = new.id);".format(
+            fts=FTS_TABLE, tags=TAG_NAMES.format(fact_id='{}.rowid'.format(FTS_TABLE)),
+        ),
+    ),
+)
+
+
+def fts5_available(controller):
+    """Returns True if SQLite was built with FTS5 (which most builds are)."""
+    return bool(controller.store.session.execute(text(
+        "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+    )).scalar())
+
+
+def fts_index_exists(controller):
+    """Returns True if the store has the full-text index."""
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FTS_TABLE}).scalar())
+
+
+def ensure_fts_index(controller):
+    """Creates and fills the full-text index, if missing, and returns True if so.
+
+    Raises OperationalError if SQLite was built without FTS5, or if it's older
+    than 3.34, which added the trigram tokenizer.
+    """
+    if fts_index_exists(controller):
+        return False
+    session = controller.store.session
+    session.execute(text(
+        "CREATE VIRTUAL TABLE {} USING fts5("
+        "description, activity, category, tags, {})".format(FTS_TABLE, FTS_TOKENIZE)
+    ))
+    session.execute(text(
+        "INSERT INTO {fts} (rowid, description, activity, category, tags)"
+        " SELECT facts.id, facts.description, {activity}, {category}, {tags}"
+        " FROM facts".format(
+            fts=FTS_TABLE,
+            activity=ACTIVITY_NAME.format(fact='facts'),
+            category=CATEGORY_NAME.format(fact='facts'),
+            tags=TAG_NAMES.format(fact_id='facts.id'),
+        )
+    ))
+    for name, when, body in FTS_TRIGGERS:
+        session.execute(text(
+            'CREATE TRIGGER {} {} BEGIN {} END'.format(name, when, body)
+        ))
+    return True
+
+
+def merge_fts_index(connection):
+    """Merges the full-text index, if there is one, to drop its deleted rows.
+
+    FTS5 records a deletion as another entry, so after many Facts are moved
+    out of the store (see archive_store and compact_store), the index is as
+    big as ever, until it's merged.
+    """
+    has_index = connection.execute(text(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': FTS_TABLE}).scalar()
+    if not has_index:
+        return
+    connection.execute(text(
+        "INSERT INTO main.{fts} ({fts}) VALUES ('optimize')".format(fts=FTS_TABLE)
+    ))
+
+
+def fts_substring_pks(search_terms, broad_match=False):
+    """Returns the query of the PKs of the Facts that contain any search term.
+
+    Matches the same Facts as nark's ilike('%term%') on the description (and
+    on the activity, category and tag names, if broad_match), but the index
+    finds the candidates, which SQLite then verifies. (A term shorter than a
+    trigram is not indexed, so SQLite scans the index table for it.)
+    """
+    selects = []
+    for term in search_terms:
+        pattern = '%{}%'.format(term)
+        selects.append(select([FTS.c.rowid]).where(FTS.c.description.like(pattern)))
+        if not broad_match:
+            continue
+        selects.append(select([FTS.c.rowid]).where(FTS.c.activity.like(pattern)))
+        selects.append(select([FTS.c.rowid]).where(FTS.c.category.like(pattern)))
+        # The index's tags column runs the names together, so match each name.
+        selects.append(
+            select([FACT_TAGS.c.fact_id])
+            .select_from(FACT_TAGS.join(TAGS, TAGS.c.id == FACT_TAGS.c.tag_id))
+            .where(TAGS.c.name.like(pattern))
+        )
+    return union(*selects)
+
+
+def fts_match_expression(search_terms, broad_match=False):
+    """Returns the FTS5 query that matches any of the search terms.
+
+    Each term is used as FTS5 query syntax, so the user can search for a
+    "quoted phrase", or use AND, OR and NOT. (Each word matches wherever
+    it's found, even inside another word, because the index is trigrams.)
+    Unless broad_match, only the description is matched.
+    """
+    terms = [term for term in search_terms if term.strip()]
+    if not terms:
+        return None
+    match = ' OR '.join('({})'.format(term) for term in terms)
+    if not broad_match:
+        match = 'description : ({})'.format(match)
+    return match
+
+
+def fts_match_valid(controller, match):
+    try:
+        controller.store.session.execute(text(
+            'SELECT 1 FROM {fts} WHERE {fts} MATCH :match LIMIT 1'.format(fts=FTS_TABLE)
+        ), {'match': match}).fetchall()
+    except OperationalError:
+        return False
+    return True
+
+
+@contextmanager
+def fact_search_index(controller, qt, fts_query=False):
+    """Answers the search terms of the Facts query from the full-text index.
+
+    While installed, the store matches ``qt.search_terms`` using the index,
+    rather than with LIKE on each description and name. The Facts that match
+    are the same, i.e., those that contain a search term.
+
+    If ``fts_query``, each search term is used as FTS5 query syntax instead
+    (see fts_match_expression), and the 'rank' sort column sorts the best
+    matches first.
+
+    If there's no index, or a search term is not valid FTS5 query syntax,
+    or the query includes the archive or partitions (which the index does
+    not cover), the store searches as usual (and 'rank' is ignored).
+    """
+    facts = controller.store.facts
+    match = None
+    substring_pks = None
+    if (
+        qt.search_terms
+        and fts_index_exists(controller)
+        and not store_union_active(controller)
+    ):
+        if fts_query:
+            match = fts_match_expression(qt.search_terms, qt.broad_match)
+            if match and not fts_match_valid(controller, match):
+                match = None
+        else:
+            substring_pks = fts_substring_pks(qt.search_terms, qt.broad_match)
+    search_terms = qt.search_terms
+    query_filter_by_categories = facts.query_filter_by_categories
+    query_order_by_sort_col = facts.query_order_by_sort_col
+
+    def filter_by_categories_and_match(query, query_terms):
+        query = query_filter_by_categories(query, query_terms)
+        if substring_pks is not None:
+            return query.filter(AlchemyFact.pk.in_(substring_pks))
+        query = query.join(FTS, FTS.c.rowid == AlchemyFact.pk)
+        return query.filter(text('{} MATCH :fts_match'.format(FTS_TABLE)).bindparams(
+            fts_match=match,
+        ))
+
+    def order_by_sort_col_or_rank(query, query_terms, sort_col, direction, *args):
+        if sort_col != 'rank':
+            return query_order_by_sort_col(
+                query, query_terms, sort_col, direction, *args
+            )
+        if match is None or query_terms.is_grouped:
+            return query
+        # The direction is SQLAlchemy's asc or desc. A lower rank is a better match.
+        return query.order_by(direction(FTS.c.rank))
+
+    indexed = match is not None or substring_pks is not None
+    facts.query_order_by_sort_col = order_by_sort_col_or_rank
+    if indexed:
+        qt.search_terms = None
+        facts.query_filter_by_categories = filter_by_categories_and_match
+    try:
+        yield match
+    finally:
+        qt.search_terms = search_terms
+        # Remove the instance attributes, which restores the class methods.
+        del facts.query_order_by_sort_col
+        if indexed:
+            del facts.query_filter_by_categories
+        # The results are sorted, and the report does not know 'rank'.
+        drop_rank_sort_col(qt)
+
+
+def drop_rank_sort_col(qt):
+    if not qt.sort_cols or 'rank' not in qt.sort_cols:
+        return
+    sort_cols = []
+    sort_orders = []
+    for idx, sort_col in enumerate(qt.sort_cols):
+        if sort_col == 'rank':
+            continue
+        sort_cols.append(sort_col)
+        if qt.sort_orders and idx < len(qt.sort_orders):
+            sort_orders.append(qt.sort_orders[idx])
+    qt.sort_cols = sort_cols
+    qt.sort_orders = sort_orders
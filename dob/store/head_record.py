@@ -0,0 +1,161 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Remembers the ongoing and latest Facts, so finding them is a PK read."""
+
+import hashlib
+import json
+import os
+
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+
+from .db_file import db_change_stamp, sqlite_db_path
+
+__all__ = (
+    'HeadRecord',
+    # Private:
+    #  'HEAD_KINDS',
+)
+
+
+# The ``restrict`` values understood by find_latest_fact.
+HEAD_KINDS = ('ongoing', 'ended')
+
+
+class HeadRecord(object):
+    """A record of the PKs of the ongoing Fact and of the latest ended Fact.
+
+    Finding the latest Fact otherwise takes a couple of queries, which adds
+    up for, e.g., ``dob current`` in a shell prompt or status bar. The head
+    record is keyed by the store file's change stamp (see ``db_change_stamp``),
+    so it's only trusted until the store changes. It's refreshed after each
+    dob command that changes the store, and each Fact it names is read back
+    by PK and checked before it's used.
+
+    Only a SQLite store file has a head record; otherwise, every lookup
+    runs the queries.
+    """
+
+    HEAD_DIR = 'head'
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.db_path = sqlite_db_path(controller)
+        self.path = None
+        if self.db_path is None:
+            return
+        path_hash = hashlib.sha256(self.db_path.encode('utf-8')).hexdigest()
+        self.path = get_appdirs_subdir_file_path(
+            file_basename='{}.head'.format(path_hash),
+            dir_dirname=self.HEAD_DIR,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+
+    # ***
+
+    def find_latest_fact(self, restrict=None, lookup=None):
+        """Returns the ongoing or latest Fact, like Controller.find_latest_fact.
+
+        Each kind of Fact not known from the head record is found using
+        ``lookup(restrict=kind)``, and then recorded.
+        """
+        lookup = lookup or self.lookup
+        change_stamp = db_change_stamp(self.db_path) if self.path else None
+        heads = self.load(change_stamp)
+        found = {}
+        fact = None
+        kinds = (restrict,) if restrict else HEAD_KINDS
+        for kind in kinds:
+            known, fact = self.head_fact(heads, kind)
+            if not known:
+                fact = lookup(restrict=kind)
+                found[kind] = fact.pk if fact is not None else None
+            if fact is not None:
+                break
+        if found:
+            heads.update(found)
+            self.save(change_stamp, heads)
+        return fact
+
+    def refresh(self):
+        """Records the ongoing and latest Facts, if the store has changed.
+
+        Returns True if the record was rewritten.
+        """
+        if self.path is None:
+            return False
+        change_stamp = db_change_stamp(self.db_path)
+        if self.load(change_stamp):
+            return False
+        heads = {}
+        for kind in HEAD_KINDS:
+            try:
+                fact = self.lookup(restrict=kind)
+            except Exception:
+                # E.g., more than one ongoing Fact. Let find_latest_fact
+                # complain about it, when it runs the lookup itself.
+                return False
+            heads[kind] = fact.pk if fact is not None else None
+        self.save(change_stamp, heads)
+        return True
+
+    def lookup(self, restrict):
+        return self.controller.facts.find_latest_fact(restrict=restrict)
+
+    def head_fact(self, heads, kind):
+        """Returns (known, fact) for the kind of Fact from the head record."""
+        if kind not in heads:
+            return False, None
+        pk = heads[kind]
+        if pk is None:
+            return True, None
+        try:
+            fact = self.controller.facts.get(pk)
+        except KeyError:
+            return False, None
+        if fact.deleted or ((fact.end is None) != (kind == 'ongoing')):
+            return False, None
+        return True, fact
+
+    # ***
+
+    def load(self, change_stamp):
+        """Returns the recorded PKs, if recorded for the store as it is now."""
+        if self.path is None or change_stamp is None:
+            return {}
+        try:
+            with open(self.path, 'r') as head_f:
+                saved = json.load(head_f)
+        except (OSError, ValueError):
+            return {}
+        if saved.get('change_stamp') != change_stamp:
+            return {}
+        return saved.get('heads', {})
+
+    def save(self, change_stamp, heads):
+        if self.path is None or change_stamp is None:
+            return
+        record = {
+            'db_path': self.db_path,
+            'change_stamp': change_stamp,
+            'heads': heads,
+        }
+        # Write-and-rename, so a crash never leaves a partial record.
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'w') as head_f:
+            json.dump(record, head_f)
+        os.replace(temp_path, self.path)
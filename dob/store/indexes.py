@@ -0,0 +1,98 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Indexes that dob adds to the store, to speed up its common lookups."""
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+__all__ = (
+    'DOB_INDEXES',
+    'ensure_dob_indexes',
+    'ensure_endless_facts_index',
+    'missing_dob_indexes',
+    # Private:
+    #  'ENDLESS_FACTS_INDEX',
+)
+
+
+ENDLESS_FACTS_INDEX = 'dob_facts_endless'
+
+# The indexes `dob store optimize` ensures, by name, with the columns (and
+# WHERE clause) of each. The store tables are created by nark, which only
+# indexes the primary keys and unique names.
+DOB_INDEXES = (
+    # For listing and searching Facts, which filters on deleted, sorts by start.
+    ('dob_facts_deleted_start', 'facts (deleted, start_time)'),
+    # For the ongoing Fact (see ensure_endless_facts_index).
+    (
+        ENDLESS_FACTS_INDEX,
+        'facts (deleted) WHERE start_time IS NULL OR end_time IS NULL',
+    ),
+    # For the Facts of an Activity, e.g., `dob usage activity`, or --activity.
+    ('dob_facts_activity', 'facts (activity_id)'),
+    # For the tag join, from either side.
+    ('dob_fact_tags_fact', 'fact_tags (fact_id, tag_id)'),
+    ('dob_fact_tags_tag', 'fact_tags (tag_id, fact_id)'),
+)
+
+
+def ensure_endless_facts_index(controller):
+    """Creates the index that finds the ongoing Fact without a table scan.
+
+    The store finds the ongoing Fact (and checks there's only one) with
+    the query, ``(start IS NULL OR end IS NULL) AND deleted = ?``, which
+    without an index reads every Fact. This partial index only contains
+    the endless Facts (normally just the one), and SQLite uses it for
+    that query because the index's WHERE clause matches the query's.
+
+    It's created when the integrity checks run (see backend_integrity),
+    which is the first dob command against a new or changed store, so
+    not every save needs to ask for it. It's skipped if the store was
+    opened read-only, and made by the next command that writes.
+    """
+    session = controller.store.session
+    try:
+        session.execute(text(
+            'CREATE INDEX IF NOT EXISTS {} ON facts (deleted)'
+            ' WHERE start_time IS NULL OR end_time IS NULL'
+            .format(ENDLESS_FACTS_INDEX)
+        ))
+        session.commit()
+    except OperationalError:
+        # E.g., "attempt to write a readonly database" (see read_only_store).
+        session.rollback()
+
+
+def missing_dob_indexes(controller):
+    """Returns the names of the DOB_INDEXES that the store does not have."""
+    rows = controller.store.session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ))
+    existing = set(row[0] for row in rows)
+    return [name for name, _columns in DOB_INDEXES if name not in existing]
+
+
+def ensure_dob_indexes(controller):
+    """Creates any missing DOB_INDEXES, and returns their names."""
+    missing = missing_dob_indexes(controller)
+    columns = dict(DOB_INDEXES)
+    for name in missing:
+        controller.store.session.execute(text(
+            'CREATE INDEX IF NOT EXISTS {} ON {}'.format(name, columns[name])
+        ))
+    return missing
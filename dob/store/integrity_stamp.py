@@ -0,0 +1,119 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Remembers that the store passed its integrity checks, until it changes."""
+
+import hashlib
+import json
+import os
+
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+
+from .db_file import db_change_stamp, sqlite_db_path
+
+__all__ = (
+    'IntegrityStamp',
+    # Private:
+    #  'migrations_head',
+)
+
+
+class IntegrityStamp(object):
+    """A stamp file that records the store state that passed integrity checks.
+
+    The stamp is keyed by the store file's identity and change counter (see
+    ``db_change_stamp``), and by the latest nark migration. It's refreshed
+    after each dob command, so the checks rerun only if the store is changed
+    by something other than dob, or if nark ships a new migration.
+
+    But if the checks were skipped, and the store is not as it was when the
+    command started (see ``is_unchanged``), the Facts are checked again before
+    the stamp is refreshed, as another process might have changed the store
+    while the command ran, and that change was never checked.
+
+    Only a SQLite store file is stamped; otherwise, the checks always run.
+    """
+
+    STAMP_DIR = 'integrity'
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.db_path = sqlite_db_path(controller)
+        self.path = None
+        self.started = None
+        if self.db_path is None:
+            return
+        path_hash = hashlib.sha256(self.db_path.encode('utf-8')).hexdigest()
+        self.path = get_appdirs_subdir_file_path(
+            file_basename='{}.stamp'.format(path_hash),
+            dir_dirname=self.STAMP_DIR,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+
+    def current(self):
+        change_stamp = db_change_stamp(self.db_path)
+        if change_stamp is None:
+            return None
+        return {
+            'db_path': self.db_path,
+            'change_stamp': change_stamp,
+            'migrations_head': migrations_head(self.controller),
+        }
+
+    def is_fresh(self):
+        """Returns True if the store is unchanged since it was last stamped."""
+        if self.path is None:
+            return False
+        self.started = self.current()
+        try:
+            with open(self.path, 'r') as stamp_f:
+                saved = json.load(stamp_f)
+        except (OSError, ValueError):
+            return False
+        return saved == self.started
+
+    def is_unchanged(self):
+        """Returns True if the store is unchanged since ``is_fresh`` was called."""
+        return self.started is not None and self.started == self.current()
+
+    def save(self):
+        if self.path is None:
+            return
+        current = self.current()
+        if current is None:
+            return
+        # Write-and-rename, so a crash never leaves a partial stamp.
+        temp_path = '{}.tmp'.format(self.path)
+        with open(temp_path, 'w') as stamp_f:
+            json.dump(current, stamp_f)
+        os.replace(temp_path, self.path)
+
+
+def migrations_head(controller):
+    # The migration scripts are named with their version number, e.g.,
+    # 001_Add_deleted_columns.py. Listing the directory is a lot cheaper
+    # than asking sqlalchemy-migrate (which has to be imported first).
+    versions_dir = os.path.join(
+        controller.store.migrations.migrations_path(), 'versions',
+    )
+    try:
+        names = os.listdir(versions_dir)
+    except OSError:
+        return None
+    return sorted(
+        name for name in names if name[:3].isdigit() and name.endswith('.py')
+    )
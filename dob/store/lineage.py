@@ -0,0 +1,188 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""An index of each Fact version's original, for fast edit history lookups."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from nark.managers.query_terms import QueryTerms
+
+from .store_union import store_union, store_union_active
+
+__all__ = (
+    'LINEAGE_TABLE',
+    'ensure_lineage_index',
+    'fact_lineage_filter',
+    'fact_versions',
+    'lineage_criterion',
+    'lineage_index_exists',
+    # Private:
+    #  'INSERT_LINEAGE_ROW',
+    #  'LINEAGE_CHAIN_VERSIONS',
+    #  'LINEAGE_INDEX',
+    #  'LINEAGE_INDEX_VERSIONS',
+    #  'LINEAGE_TRIGGERS',
+)
+
+
+# When a Fact is edited, the store saves a new Fact that's split_from the
+# old one (which it marks deleted), so the versions of a Fact are a chain
+# of split_from_id references. This table maps every Fact to the first
+# Fact in its chain (its "origin"), so all the versions can be found with
+# one index lookup, rather than by walking the chain.
+LINEAGE_TABLE = 'dob_fact_lineage'
+
+LINEAGE_INDEX = 'dob_fact_lineage_origin'
+
+# The origin of the Fact "new": the origin of the Fact it was split from
+# (or that Fact, if it has no lineage row), otherwise the Fact itself.
+INSERT_LINEAGE_ROW = (
+    "INSERT OR REPLACE INTO {lineage} (fact_id, origin_id) VALUES (new.id, COALESCE("
+    "(SELECT origin_id FROM {lineage} WHERE fact_id = new.split_from_id),"
+    " new.split_from_id, new.id));"
+).format(lineage=LINEAGE_TABLE)
+
+# The triggers keep the lineage in sync with every change to the store.
+# (Note that `dob store compact` clears the split_from_id of the Facts
+# whose earlier versions it removes, but not their origin.)
+LINEAGE_TRIGGERS = (
+    ('dob_lineage_facts_ai', 'AFTER INSERT ON facts', INSERT_LINEAGE_ROW),
+    (
+        'dob_lineage_facts_au',
+        'AFTER UPDATE OF split_from_id ON facts WHEN new.split_from_id IS NOT NULL',
+        INSERT_LINEAGE_ROW,
+    ),
+    (
+        'dob_lineage_facts_ad',
+        'AFTER DELETE ON facts',
+        "DELETE FROM {} WHERE fact_id = old.id;".format(LINEAGE_TABLE),
+    ),
+)
+
+# The versions of the Fact with the PK :lineage_key, using the index.
+LINEAGE_INDEX_VERSIONS = (
+    "SELECT fact_id FROM {lineage} WHERE origin_id ="
+    " (SELECT origin_id FROM {lineage} WHERE fact_id = :lineage_key)"
+).format(lineage=LINEAGE_TABLE)
+
+# The same, without the index: walk the chain back to the origin (the Fact
+# without an existing split_from), and then forward, to the latest version.
+LINEAGE_CHAIN_VERSIONS = (
+    "WITH RECURSIVE"
+    " ancestors(id, split_from_id) AS ("
+    "  SELECT id, split_from_id FROM facts WHERE id = :lineage_key"
+    "  UNION SELECT facts.id, facts.split_from_id FROM facts"
+    "  JOIN ancestors ON facts.id = ancestors.split_from_id"
+    " ),"
+    " versions(id) AS ("
+    "  SELECT id FROM ancestors WHERE split_from_id IS NULL"
+    "  OR split_from_id NOT IN (SELECT id FROM facts)"
+    "  UNION SELECT facts.id FROM facts"
+    "  JOIN versions ON facts.split_from_id = versions.id"
+    " )"
+    " SELECT id FROM versions"
+)
+
+
+def lineage_index_exists(controller):
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': LINEAGE_TABLE}).scalar())
+
+
+def ensure_lineage_index(controller):
+    """Creates and fills the lineage table, if missing, and returns True if so."""
+    if lineage_index_exists(controller):
+        return False
+    session = controller.store.session
+    session.execute(text(
+        'CREATE TABLE {} (fact_id INTEGER PRIMARY KEY, origin_id INTEGER NOT NULL)'
+        .format(LINEAGE_TABLE)
+    ))
+    # Every Fact that starts a chain is its own origin, and each Fact split
+    # from another has the same origin as that one.
+    session.execute(text(
+        "INSERT INTO {lineage} (fact_id, origin_id)"
+        " WITH RECURSIVE chains(fact_id, origin_id) AS ("
+        "  SELECT id, id FROM facts WHERE split_from_id IS NULL"
+        "  OR split_from_id NOT IN (SELECT id FROM facts)"
+        "  UNION ALL SELECT facts.id, chains.origin_id FROM facts"
+        "  JOIN chains ON facts.split_from_id = chains.fact_id"
+        " )"
+        " SELECT fact_id, origin_id FROM chains".format(lineage=LINEAGE_TABLE)
+    ))
+    session.execute(text(
+        'CREATE INDEX {} ON {} (origin_id)'.format(LINEAGE_INDEX, LINEAGE_TABLE)
+    ))
+    for name, when, body in LINEAGE_TRIGGERS:
+        session.execute(text(
+            'CREATE TRIGGER {} {} BEGIN {} END'.format(name, when, body)
+        ))
+    return True
+
+
+def lineage_criterion(controller, key):
+    """Returns the SQL criterion that matches every version of the Fact ``key``.
+
+    Uses the lineage index, if it exists, otherwise it walks the chain.
+    (The index does not cover the archive or partitions, so the chain is
+    walked while the query includes them.)
+    """
+    if lineage_index_exists(controller) and not store_union_active(controller):
+        versions = LINEAGE_INDEX_VERSIONS
+    else:
+        versions = LINEAGE_CHAIN_VERSIONS
+    return text('facts.id IN ({})'.format(versions)).bindparams(lineage_key=key)
+
+
+@contextmanager
+def fact_lineage_filter(controller, key):
+    """Restricts the Facts query to the versions of the Fact ``key``.
+
+    Pair with ``deleted=None`` to get every version, and not only the
+    latest one (which is the only one that's not deleted).
+    """
+    if key is None:
+        yield
+        return
+    facts = controller.store.facts
+    criterion = lineage_criterion(controller, key)
+    query_filter_by_item_pk = facts.query_filter_by_item_pk
+
+    def filter_by_item_pk_and_lineage(query, alchemy_cls, item_key):
+        query = query_filter_by_item_pk(query, alchemy_cls, item_key)
+        return query.filter(criterion)
+
+    facts.query_filter_by_item_pk = filter_by_item_pk_and_lineage
+    try:
+        yield
+    finally:
+        # Remove the instance attribute, which restores the class method.
+        del facts.query_filter_by_item_pk
+
+
+def fact_versions(controller, key):
+    """Returns every version of the Fact ``key``, oldest first."""
+    qt = QueryTerms(deleted=None, sort_cols=['start'])
+    with store_union(controller, qt), fact_lineage_filter(controller, key):
+        versions = controller.facts.get_all(query_terms=qt)
+    # The PKs increase with each edit, so sort by PK to order by version.
+    return sorted(versions, key=lambda fact: fact.pk)
@@ -0,0 +1,229 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""A per-operation cache that resolves Activity, Category and Tag names in bulk."""
+
+from contextlib import contextmanager
+
+from sqlalchemy.orm import joinedload
+
+from nark.backends.sqlalchemy.objects import (
+    AlchemyActivity,
+    AlchemyCategory,
+    AlchemyTag
+)
+
+__all__ = (
+    'ItemNameCache',
+    'item_name_cache',
+)
+
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 for older versions.
+LOOKUP_BATCH_SIZE = 500
+
+
+class ItemNameCache(object):
+    """Resolves item names to store items, loading and creating them in bulk.
+
+    When a Fact is saved, the store looks up its Activity (and Category)
+    and each of its Tags by name, one query per item, and creates any that
+    are missing, one at a time. When saving many Facts, the same few names
+    are looked up over and over again.
+
+    This cache is preloaded with all the names used by a batch of Facts,
+    using one query per table, and it creates all the missing items at
+    once. While installed (see ``item_name_cache``), the store's
+    ``get_or_create`` methods are answered from the cache.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.categories = {}
+        # Keyed by (activity name, category name or None).
+        self.activities = {}
+        self.tags = {}
+
+    # ***
+
+    def preload(self, facts):
+        """Loads or creates the items for all the names used by the Facts."""
+        categories = {}
+        activities = {}
+        tags = {}
+        for fact in facts:
+            activity = fact.activity
+            if activity is not None:
+                activities.setdefault(self.activity_key(activity), activity)
+                if activity.category:
+                    categories.setdefault(activity.category.name, activity.category)
+            for tag in fact.tags:
+                tags.setdefault(tag.name, tag)
+        created = (
+            self.load_categories(categories)
+            + self.load_activities(activities)
+            + self.load_tags(tags)
+        )
+        if created:
+            # Insert the new items all at once. The first Fact saved commits.
+            self.store.session.add_all(created)
+            self.store.session.flush()
+
+    @staticmethod
+    def activity_key(activity):
+        category = activity.category
+        return (activity.name, category.name if category else None)
+
+    def query_names(self, alchemy_cls, names, options=()):
+        query = self.store.session.query(alchemy_cls).options(*options)
+        names = list(names)
+        for offset in range(0, len(names), LOOKUP_BATCH_SIZE):
+            batch = names[offset:offset + LOOKUP_BATCH_SIZE]
+            yield from query.filter(alchemy_cls.name.in_(batch))
+
+    def load_categories(self, categories):
+        missing = {
+            name: category for name, category in categories.items()
+            if name not in self.categories
+        }
+        for alchemy_category in self.query_names(AlchemyCategory, missing):
+            self.categories[alchemy_category.name] = alchemy_category
+        created = []
+        for name, category in missing.items():
+            if name in self.categories:
+                continue
+            alchemy_category = AlchemyCategory(
+                pk=None,
+                name=name,
+                deleted=bool(category.deleted),
+                hidden=bool(category.hidden),
+            )
+            self.categories[name] = alchemy_category
+            created.append(alchemy_category)
+        return created
+
+    def load_activities(self, activities):
+        missing = {
+            key: activity for key, activity in activities.items()
+            if key not in self.activities
+        }
+        found = self.query_names(
+            AlchemyActivity,
+            set(name for name, _category_name in missing),
+            options=(joinedload(AlchemyActivity.category),),
+        )
+        for alchemy_activity in found:
+            key = self.activity_key(alchemy_activity)
+            self.activities[key] = alchemy_activity
+        created = []
+        for key, activity in missing.items():
+            if key in self.activities:
+                continue
+            name, category_name = key
+            alchemy_activity = AlchemyActivity(
+                pk=None,
+                name=name,
+                category=self.categories.get(category_name),
+                deleted=bool(activity.deleted),
+                hidden=bool(activity.hidden),
+            )
+            self.activities[key] = alchemy_activity
+            created.append(alchemy_activity)
+        return created
+
+    def load_tags(self, tags):
+        missing = {name: tag for name, tag in tags.items() if name not in self.tags}
+        for alchemy_tag in self.query_names(AlchemyTag, missing):
+            self.tags[alchemy_tag.name] = alchemy_tag
+        created = []
+        for name, tag in missing.items():
+            if name in self.tags:
+                continue
+            alchemy_tag = AlchemyTag(
+                pk=None,
+                name=name,
+                deleted=bool(tag.deleted),
+                hidden=bool(tag.hidden),
+            )
+            self.tags[name] = alchemy_tag
+            created.append(alchemy_tag)
+        return created
+
+    # ***
+
+    def get_or_create_activity(self, activity, raw=False, skip_commit=False):
+        self.autoflush()
+        try:
+            alchemy_activity = self.activities[self.activity_key(activity)]
+        except KeyError:
+            self.preload_one(activity=activity)
+            alchemy_activity = self.activities[self.activity_key(activity)]
+        return alchemy_activity if raw else alchemy_activity.as_hamster(self.store)
+
+    def get_or_create_tag(self, tag, raw=False, skip_commit=False):
+        self.autoflush()
+        try:
+            alchemy_tag = self.tags[tag.name]
+        except KeyError:
+            self.preload_one(tag=tag)
+            alchemy_tag = self.tags[tag.name]
+        return alchemy_tag if raw else alchemy_tag.as_hamster(self.store)
+
+    def autoflush(self):
+        # The store's lookup query would autoflush the session, and the
+        # store relies on it: FactManager._update splits a Fact by adding
+        # the new Fact without committing, and then expects it has a PK.
+        session = self.store.session
+        if session.autoflush:
+            session.flush()
+
+    def preload_one(self, activity=None, tag=None):
+        # A name that was not preloaded, e.g., from a Fact the user edited.
+        class OneItemFact(object):
+            def __init__(self):
+                self.activity = activity
+                self.tags = [tag] if tag is not None else []
+
+        self.preload([OneItemFact()])
+
+
+# ***
+
+@contextmanager
+def item_name_cache(controller, facts):
+    """Answers the store's item lookups from a cache preloaded for the Facts.
+
+    If a cache is already installed, it's preloaded with any new names and
+    reused, so nested save operations share the outermost cache.
+    """
+    store = controller.store
+    active_cache = getattr(store.activities.get_or_create, '__self__', None)
+    if isinstance(active_cache, ItemNameCache):
+        active_cache.preload(facts)
+        yield active_cache
+        return
+
+    cache = ItemNameCache(store)
+    cache.preload(facts)
+    store.activities.get_or_create = cache.get_or_create_activity
+    store.tags.get_or_create = cache.get_or_create_tag
+    try:
+        yield cache
+    finally:
+        # Remove the instance attributes, which restores the class methods.
+        del store.activities.get_or_create
+        del store.tags.get_or_create
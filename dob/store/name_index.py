@@ -0,0 +1,295 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""A trigram (SQLite FTS5) index of Activity, Category and Tag names."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import column, select, table, text, union
+from sqlalchemy.exc import OperationalError
+
+from .federation import store_names_federated
+from .fts_index import fts5_available
+
+__all__ = (
+    'NAME_INDEXES',
+    'ensure_name_indexes',
+    'item_search_index',
+    'missing_name_indexes',
+    'name_index_exists',
+    'name_trigrams',
+    'names_starting_with',
+    'trigram_available',
+    # Private:
+    #  'FUZZY_MATCH_TABLE',
+    #  'FUZZY_SIMILARITY',
+    #  'fuzzy_match_ids',
+    #  'fuzzy_match_pks',
+    #  'name_index_table',
+    #  'name_index_triggers',
+    #  'substring_match_pks',
+)
+
+
+# The item table, and its trigram index, which uses the item table for its
+# content (an "external content" table), so that the names are not stored
+# twice. The index rowid is the item PK.
+NAME_INDEXES = (
+    ('activities', 'dob_activities_trigram'),
+    ('categories', 'dob_categories_trigram'),
+    ('tags', 'dob_tags_trigram'),
+)
+
+# A fuzzy match shares at least this percentage of the search term's trigrams.
+FUZZY_SIMILARITY = 40
+
+# The PKs of the fuzzy matches, which are verified in Python, for the query.
+FUZZY_MATCH_TABLE = 'dob_fuzzy_match_ids'
+
+
+def trigram_available(controller):
+    """Returns True if SQLite has the FTS5 trigram tokenizer (new in 3.34.0)."""
+    version = controller.store.session.execute(text('SELECT sqlite_version()')).scalar()
+    version_info = tuple(int(part) for part in version.split('.')[:3])
+    return version_info >= (3, 34, 0) and fts5_available(controller)
+
+
+def name_index_table(item_table):
+    return dict(NAME_INDEXES)[item_table]
+
+
+def name_index_exists(controller, item_table):
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': name_index_table(item_table)}).scalar())
+
+
+def missing_name_indexes(controller):
+    """Returns the names of the trigram indexes not yet created."""
+    return [
+        index_table for item_table, index_table in NAME_INDEXES
+        if not name_index_exists(controller, item_table)
+    ]
+
+
+def name_index_triggers(item_table, index_table):
+    # An external content index must be told the old name to remove it.
+    insert_row = "INSERT INTO {idx} (rowid, name) VALUES (new.id, new.name);".format(
+        idx=index_table,
+    )
+    delete_row = (
+        "INSERT INTO {idx} ({idx}, rowid, name) VALUES ('delete', old.id, old.name);"
+    ).format(idx=index_table)
+    return (
+        ('{}_ai'.format(index_table), 'AFTER INSERT ON {}'.format(item_table),
+         insert_row),
+        ('{}_au'.format(index_table), 'AFTER UPDATE OF name ON {}'.format(item_table),
+         delete_row + insert_row),
+        ('{}_ad'.format(index_table), 'AFTER DELETE ON {}'.format(item_table),
+         delete_row),
+    )
+
+
+def ensure_name_indexes(controller):
+    """Creates and fills the missing trigram indexes, and returns their names.
+
+    Raises OperationalError if SQLite does not have the trigram tokenizer.
+    """
+    session = controller.store.session
+    created = []
+    for item_table, index_table in NAME_INDEXES:
+        if name_index_exists(controller, item_table):
+            continue
+        session.execute(text(
+            "CREATE VIRTUAL TABLE {idx} USING fts5("
+            "name, content='{items}', content_rowid='id', tokenize='trigram')".format(
+                idx=index_table, items=item_table,
+            )
+        ))
+        session.execute(text(
+            "INSERT INTO {idx} ({idx}) VALUES ('rebuild')".format(idx=index_table)
+        ))
+        for name, when, body in name_index_triggers(item_table, index_table):
+            session.execute(text(
+                'CREATE TRIGGER {} {} BEGIN {} END'.format(name, when, body)
+            ))
+        created.append(index_table)
+    return created
+
+
+# ***
+
+def name_trigrams(name):
+    """Returns the set of (case-insensitive) trigrams in the name."""
+    name = (name or '').lower()
+    return set(name[idx:idx + 3] for idx in range(len(name) - 2))
+
+
+def substring_match_pks(index_table, search_terms):
+    # Like nark's ilike('%term%'), but the index finds the candidates, and
+    # then SQLite verifies each (but for terms shorter than a trigram, which
+    # SQLite scans for).
+    trigram = table(index_table, column('rowid'), column('name'))
+    return union(*[
+        select([trigram.c.rowid]).where(trigram.c.name.like('%{}%'.format(term)))
+        for term in search_terms
+    ])
+
+
+def fuzzy_match_pks(controller, item_table, search_terms):
+    """Returns the PKs of the items whose names are like any of the search terms.
+
+    A name matches if it contains the term, or if it shares enough of the
+    term's trigrams, e.g., 'meating' is like 'meeting'. If indexed, only the
+    names that share a trigram with a term are considered, and then each is
+    verified; otherwise every name is.
+    """
+    session = controller.store.session
+    term_trigrams = [name_trigrams(term) for term in search_terms]
+    # A term shorter than a trigram has none, and is only found by scanning.
+    # (So are the other stores' names, which the index does not cover.)
+    if (
+        all(term_trigrams)
+        and name_index_exists(controller, item_table)
+        and not store_names_federated(controller)
+    ):
+        trigrams = set().union(*term_trigrams)
+        # Each trigram is quoted, so FTS5 reads it as a string, not syntax.
+        match = ' OR '.join('"{}"'.format(tri.replace('"', '""')) for tri in trigrams)
+        candidates = session.execute(text(
+            "SELECT rowid, name FROM {idx} WHERE {idx} MATCH :match".format(
+                idx=name_index_table(item_table),
+            )
+        ), {'match': match})
+    else:
+        candidates = session.execute(text(
+            'SELECT id, name FROM {}'.format(item_table)
+        ))
+    pks = []
+    for pk, name in candidates:
+        lower_name = (name or '').lower()
+        trigrams = name_trigrams(name)
+        for term, term_trigram in zip(search_terms, term_trigrams):
+            if term.lower() in lower_name or (
+                term_trigram
+                and len(term_trigram & trigrams) * 100
+                >= len(term_trigram) * FUZZY_SIMILARITY
+            ):
+                pks.append(pk)
+                break
+    return pks
+
+
+def fuzzy_match_ids(controller, pks):
+    """Returns the query of the fuzzy matches, which are put in a TEMP table.
+
+    A subquery keeps the item query small, however many names match,
+    rather than binding a parameter for each PK.
+    """
+    session = controller.store.session
+    session.execute(text(
+        'CREATE TEMP TABLE {} (id INTEGER PRIMARY KEY)'.format(FUZZY_MATCH_TABLE)
+    ))
+    if pks:
+        session.execute(text(
+            'INSERT INTO {} (id) VALUES (:id)'.format(FUZZY_MATCH_TABLE)
+        ), [{'id': pk} for pk in pks])
+    return select([table(FUZZY_MATCH_TABLE, column('id')).c.id])
+
+
+@contextmanager
+def item_search_index(controller, item_table, qt, fuzzy=False):
+    """Answers the search terms of the Activity, Category or Tag query.
+
+    While installed, the store matches ``qt.search_terms`` against the item
+    names using the trigram index, rather than with LIKE on every name. If
+    ``fuzzy``, names that are similar to a search term match, too.
+
+    If there's no index (and not ``fuzzy``), or if the query includes other
+    stores' names (see federate_stores), the store searches as usual.
+    """
+    manager = getattr(controller, item_table)
+    alchemy_cls = manager._gather_query_alchemy_cls
+    pks = None
+    fuzzy = fuzzy and bool(qt.search_terms)
+    if fuzzy:
+        pks = fuzzy_match_ids(
+            controller, fuzzy_match_pks(controller, item_table, qt.search_terms),
+        )
+    elif (
+        qt.search_terms
+        and name_index_exists(controller, item_table)
+        and not store_names_federated(controller)
+    ):
+        pks = substring_match_pks(name_index_table(item_table), qt.search_terms)
+    search_terms = qt.search_terms
+    query_filter_by_categories = manager.query_filter_by_categories
+
+    def filter_by_categories_and_match(query, query_terms):
+        query = query_filter_by_categories(query, query_terms)
+        return query.filter(alchemy_cls.pk.in_(pks))
+
+    if pks is not None:
+        qt.search_terms = None
+        manager.query_filter_by_categories = filter_by_categories_and_match
+    try:
+        yield pks
+    finally:
+        qt.search_terms = search_terms
+        if pks is not None:
+            # Remove the instance attribute, which restores the class method.
+            del manager.query_filter_by_categories
+        if fuzzy:
+            controller.store.session.execute(text(
+                'DROP TABLE IF EXISTS {}'.format(FUZZY_MATCH_TABLE)
+            ))
+
+
+def names_starting_with(controller, item_table, prefix, limit=None):
+    """Returns the item names that start with the prefix, using the index.
+
+    Returns None if there's no index (or if SQLite cannot use it), and the
+    caller should find the names some other way.
+    """
+    if not prefix or not name_index_exists(controller, item_table):
+        return None
+    # The index cannot answer a LIKE with an ESCAPE clause, so only escape
+    # the prefix if it has a LIKE wildcard (or the escape character).
+    escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    sql = (
+        "SELECT items.name FROM {idx}"
+        " JOIN {items} AS items ON items.id = {idx}.rowid"
+        " WHERE {idx}.name LIKE :pattern{escape}"
+        " AND items.deleted = 0 AND items.hidden = 0"
+        " ORDER BY {idx}.name".format(
+            idx=name_index_table(item_table),
+            items=item_table,
+            escape=" ESCAPE '\\'" if escaped != prefix else '',
+        )
+    )
+    if limit:
+        sql += ' LIMIT {:d}'.format(limit)
+    try:
+        names = controller.store.session.execute(text(sql), {
+            'pattern': '{}%'.format(escaped),
+        }).fetchall()
+    except OperationalError:
+        return None
+    # LIKE ignores case, but completion does not.
+    return [name for name, in names if name.startswith(prefix)]
@@ -0,0 +1,251 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Keeps the SQLite store quick: indexes, planner statistics, and compaction."""
+
+from gettext import gettext as _
+
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from dob_bright.termio import click_echo, dob_in_user_exit, highlight_value
+
+from .fts_index import FTS_TABLE, ensure_fts_index, fts_index_exists
+from .indexes import ensure_dob_indexes, missing_dob_indexes
+from .lineage import LINEAGE_TABLE, ensure_lineage_index, lineage_index_exists
+from .name_index import ensure_name_indexes, missing_name_indexes, trigram_available
+
+__all__ = (
+    'optimize_overdue',
+    'optimize_store',
+    # Private:
+    #  'OVERDUE_MIN_FACTS',
+    #  'OVERDUE_GROWTH',
+    #  'OVERDUE_FREE_RATIO',
+    #  'TIMED_QUERIES',
+    #  'analyzed_facts_count',
+    #  'format_bytes',
+    #  'store_size',
+    #  'time_queries',
+)
+
+
+# A store with fewer Facts (counting the deleted ones) is quick enough as is.
+OVERDUE_MIN_FACTS = 1000
+
+# Re-ANALYZE after the facts table grows by this fraction.
+OVERDUE_GROWTH = 0.25
+
+# VACUUM when this much of the store file is unused pages.
+OVERDUE_FREE_RATIO = 0.25
+
+# The queries timed before and after optimizing, which are pared-down
+# versions of what `dob list`, `dob current`, and --activity/--tag run.
+TIMED_QUERIES = (
+    (
+        _('List latest Facts'),
+        'SELECT id FROM facts WHERE deleted = 0'
+        ' ORDER BY start_time DESC LIMIT 100',
+    ),
+    (
+        _('Find ongoing Fact'),
+        'SELECT id FROM facts'
+        ' WHERE (start_time IS NULL OR end_time IS NULL) AND deleted = 0',
+    ),
+    (
+        _('Facts by Activity'),
+        'SELECT COUNT(*) FROM facts WHERE deleted = 0'
+        ' AND activity_id = (SELECT MIN(id) FROM activities)',
+    ),
+    (
+        _('Facts by Tag'),
+        'SELECT COUNT(*) FROM fact_tags JOIN facts ON facts.id = fact_tags.fact_id'
+        ' WHERE fact_tags.tag_id = (SELECT MIN(id) FROM tags) AND facts.deleted = 0',
+    ),
+)
+
+
+def optimize_store(controller, vacuum=False):
+    """Creates missing indexes, runs ANALYZE, and maybe VACUUM, and reports.
+
+    The store size and the time of a few common queries are printed from
+    before and after, so the user can see what changed.
+    """
+    session = controller.store.session
+
+    def _optimize_store():
+        must_be_sqlite()
+        size_before = store_size(controller)
+        timings_before = time_queries(controller)
+        created = ensure_dob_indexes(controller)
+        if ensure_lineage_index(controller):
+            created.append(LINEAGE_TABLE)
+        session.commit()
+        created += ensure_full_text_index()
+        session.commit()
+        created += ensure_name_trigram_indexes()
+        # ANALYZE records the table and index statistics (in sqlite_stat1)
+        # that the query planner uses to choose an index.
+        session.execute(text('ANALYZE'))
+        session.commit()
+        if vacuum:
+            # VACUUM cannot run inside a transaction, which is why it
+            # runs after the commit (pysqlite only BEGINs before DML).
+            session.execute(text('VACUUM'))
+            session.commit()
+        size_after = store_size(controller)
+        timings_after = time_queries(controller)
+        echo_report(created, size_before, size_after, timings_before, timings_after)
+
+    def ensure_full_text_index():
+        return ensure_virtual_tables(
+            lambda: [FTS_TABLE] if ensure_fts_index(controller) else [],
+            'full-text index',
+        )
+
+    def ensure_name_trigram_indexes():
+        return ensure_virtual_tables(
+            lambda: ensure_name_indexes(controller),
+            'name trigram indexes',
+        )
+
+    def ensure_virtual_tables(ensure_tables, what):
+        try:
+            return ensure_tables()
+        except OperationalError as err:
+            # E.g., "no such module: fts5", if SQLite was built without it,
+            # or "no such tokenizer: trigram", if SQLite is older than 3.34.
+            # Searches will use LIKE instead, as they always have.
+            session.rollback()
+            controller.client_logger.warning(
+                'Could not create the {}: {}'.format(what, err)
+            )
+            return []
+
+    def must_be_sqlite():
+        if controller.config['db.engine'] != 'sqlite':
+            dob_in_user_exit(_('Only a SQLite store can be optimized.'))
+
+    def echo_report(created, size_before, size_after, timings_before, timings_after):
+        if created:
+            click_echo(_('Created indexes: {}').format(
+                highlight_value(', '.join(created)),
+            ))
+        else:
+            click_echo(_('All indexes already exist.'))
+        click_echo(_('Analyzed the store.'))
+        if vacuum:
+            click_echo(_('Vacuumed the store.'))
+        click_echo(_('Store size: {} → {} (unused: {} → {})').format(
+            highlight_value(format_bytes(size_before['bytes'])),
+            highlight_value(format_bytes(size_after['bytes'])),
+            format_bytes(size_before['free_bytes']),
+            format_bytes(size_after['free_bytes']),
+        ))
+        for label, _query in TIMED_QUERIES:
+            click_echo(_('{}: {:.3f} ms → {} ms').format(
+                label,
+                timings_before[label],
+                highlight_value('{:.3f}'.format(timings_after[label])),
+            ))
+
+    return _optimize_store()
+
+
+def optimize_overdue(controller):
+    """Returns why the store should be optimized, or None if it need not be."""
+    if controller.config['db.engine'] != 'sqlite':
+        return None
+    session = controller.store.session
+    n_facts = session.execute(text('SELECT COUNT(*) FROM facts')).scalar()
+    if n_facts < OVERDUE_MIN_FACTS:
+        return None
+    missing = missing_dob_indexes(controller)
+    if not lineage_index_exists(controller):
+        missing.append(LINEAGE_TABLE)
+    # The full-text index is trigrams, too (see fts_index).
+    if trigram_available(controller) and not fts_index_exists(controller):
+        missing.append(FTS_TABLE)
+    if trigram_available(controller):
+        missing += missing_name_indexes(controller)
+    if missing:
+        return _('missing indexes: {}').format(', '.join(missing))
+    n_analyzed = analyzed_facts_count(controller)
+    if n_analyzed is None:
+        return _('never analyzed')
+    if n_facts - n_analyzed > n_analyzed * OVERDUE_GROWTH:
+        return _('{} Facts added since last analyzed').format(n_facts - n_analyzed)
+    size = store_size(controller)
+    if size['free_bytes'] > size['bytes'] * OVERDUE_FREE_RATIO:
+        return _('{} of the store file is unused (use --vacuum)').format(
+            format_bytes(size['free_bytes']),
+        )
+    return None
+
+
+def analyzed_facts_count(controller):
+    # The first number in each facts index's stat is the table row count,
+    # as of the last ANALYZE.
+    session = controller.store.session
+    has_stats = session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    )).scalar()
+    if not has_stats:
+        return None
+    stat = session.execute(text(
+        "SELECT stat FROM sqlite_stat1 WHERE tbl = 'facts' LIMIT 1"
+    )).scalar()
+    if not stat:
+        return None
+    return int(stat.split()[0])
+
+
+def store_size(controller):
+    session = controller.store.session
+    page_size = session.execute(text('PRAGMA page_size')).scalar()
+    page_count = session.execute(text('PRAGMA page_count')).scalar()
+    freelist_count = session.execute(text('PRAGMA freelist_count')).scalar()
+    return {
+        'bytes': page_size * page_count,
+        'free_bytes': page_size * freelist_count,
+    }
+
+
+def time_queries(controller, repeat=3):
+    """Returns the best time of each TIMED_QUERIES, in milliseconds."""
+    session = controller.store.session
+    timings = {}
+    for label, query in TIMED_QUERIES:
+        best = None
+        for _idx in range(repeat):
+            began = time.perf_counter()
+            session.execute(text(query)).fetchall()
+            elapsed = (time.perf_counter() - began) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = best
+    return timings
+
+
+def format_bytes(n_bytes):
+    if n_bytes < 1024:
+        return '{} B'.format(n_bytes)
+    for unit in ('KB', 'MB', 'GB'):
+        n_bytes /= 1024.0
+        if n_bytes < 1024 or unit == 'GB':
+            return '{:.1f} {}'.format(n_bytes, unit)
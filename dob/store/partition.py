@@ -0,0 +1,268 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Moves the Facts of past years (or months) to a store file for each."""
+
+from gettext import gettext as _
+
+import datetime
+import os
+
+from sqlalchemy import text
+
+from nark.helpers.parse_time import parse_dated
+
+from dob_bright.termio import click_echo, dob_in_user_exit, highlight_value
+
+from .archive import move_facts
+from .db_file import sqlite_db_path
+from .fts_index import merge_fts_index
+from .optimize import format_bytes, store_size
+from .store_union import (
+    ARCHIVE_TIME_FORMAT,
+    PARTITIONS_TABLE,
+    as_datetime,
+    partition_rows
+)
+
+__all__ = (
+    'PARTITION_KEY_LENGTHS',
+    'partition_db_path',
+    'partition_store',
+    # Private:
+    #  'PARTITION_IDS_TABLE',
+    #  'PARTITION_SCHEMA',
+)
+
+
+# A partition is named for the period it holds, e.g., '2015' or '2015-03',
+# which is also the start of the Facts' start_time, e.g., '2015-03-14 ...'.
+PARTITION_KEY_LENGTHS = {
+    'year': len('2015'),
+    'month': len('2015-03'),
+}
+
+# The schema name a partition store is ATTACHed as.
+PARTITION_SCHEMA = 'dob_partition'
+
+# The temporary table of IDs of the Facts being moved to a partition.
+PARTITION_IDS_TABLE = 'dob_partition_ids'
+
+
+def partition_db_path(controller, name, partition_dir=None):
+    """Returns the path to the partition store named ``name``.
+
+    E.g., the 2015 partition of ``dob.sqlite`` is kept in ``dob-2015.sqlite``,
+    next to the store file, or in ``partition_dir``. Returns None if the store
+    is not a SQLite file, and there's no ``partition_dir``.
+    """
+    db_path = sqlite_db_path(controller)
+    if db_path is None:
+        if partition_dir is None:
+            return None
+        db_path = 'dob.sqlite'
+    root, ext = os.path.splitext(os.path.basename(db_path))
+    return os.path.abspath(os.path.join(
+        partition_dir or os.path.dirname(db_path),
+        '{}-{}{}'.format(root, name, ext),
+    ))
+
+
+def partition_store(controller, by='year', before=None, partition_dir=None):
+    """Moves the Facts that started before ``before`` to a store for each period.
+
+    Each Fact goes to the partition of the year (or month) it started in,
+    so a Fact that crosses into the next period is kept whole, and the
+    partition's last end (see partition_rows) covers it. The default
+    ``before`` is the start of the current period, so every period
+    before it gets its own partition, and new Facts stay in the store.
+
+    Saving a Fact always writes to the store. But a Fact in a partitioned
+    period, or that overlaps a partition's Facts, is refused, because the
+    store cannot check it for conflicts with the partitioned Facts (see
+    MovedFacts). A new Fact in a past period that's not partitioned is
+    moved to its own partition the next time the store is partitioned.
+    (The ongoing Fact is never moved.)
+
+    Queries include the partitions that their since and until overlap (see
+    ``store_union``), so queries of recent Facts only read the store.
+    """
+    session = controller.store.session
+
+    def _partition_store():
+        must_be_sqlite()
+        key_length = must_match_layout()
+        partitioned_before = must_parse_before()
+        paths = {name: path for name, path, _first, _last in partition_rows(controller)}
+        size_before = store_size(controller)
+        # The temporary table and the ATTACH belong to the connection (see
+        # compact_store), so do all the work on one connection.
+        with session.get_bind().connect() as connection:
+            names = period_names(connection, key_length, partitioned_before)
+            n_moved = partition_facts(
+                connection, names, paths, key_length, partitioned_before,
+            )
+        if not n_moved:
+            click_echo(_('No Facts started before {}.').format(
+                partitioned_before.strftime(ARCHIVE_TIME_FORMAT),
+            ))
+            return
+        size_after = store_size(controller)
+        echo_report(n_moved, names, partitioned_before, size_before, size_after)
+
+    def must_be_sqlite():
+        if controller.config['db.engine'] != 'sqlite':
+            dob_in_user_exit(_('Only a SQLite store can be partitioned.'))
+
+    def must_match_layout():
+        key_length = PARTITION_KEY_LENGTHS.get(by)
+        if key_length is None:
+            dob_in_user_exit(_('Not a partition period: ‘{}’').format(by))
+        for name, path, _first, _last in partition_rows(controller):
+            if len(name) != key_length:
+                dob_in_user_exit(_(
+                    'The store is already partitioned by a different period: {}'
+                ).format(path))
+        return key_length
+
+    def must_parse_before():
+        if before is None:
+            # The start of the current year, or month.
+            today = controller.now.date()
+            if by == 'year':
+                return datetime.datetime(today.year, 1, 1)
+            return datetime.datetime(today.year, today.month, 1)
+        try:
+            partitioned_before = as_datetime(parse_dated(before, controller.now))
+        except Exception:
+            partitioned_before = None
+        if partitioned_before is None:
+            dob_in_user_exit(_('Not a date: ‘{}’').format(before))
+        return partitioned_before.replace(microsecond=0)
+
+    # ***
+
+    def partition_facts(connection, names, paths, key_length, partitioned_before):
+        n_moved = 0
+        for name in names:
+            path = paths.get(name) or must_have_partition_path(name)
+            n_moved += partition_period(
+                connection, name, path, key_length, partitioned_before,
+            )
+        if n_moved:
+            with connection.begin():
+                merge_fts_index(connection)
+            # Reclaim the space, so the store file is as small as its Facts.
+            connection.execute(text('VACUUM'))
+            connection.execute(text('ANALYZE'))
+        return n_moved
+
+    def period_names(connection, key_length, partitioned_before):
+        return [row[0] for row in connection.execute(text(
+            'SELECT DISTINCT substr(start_time, 1, :length) FROM main.facts'
+            ' WHERE end_time IS NOT NULL AND start_time < :before ORDER BY 1'
+        ), {
+            'length': key_length,
+            'before': partitioned_before.strftime(ARCHIVE_TIME_FORMAT),
+        }).fetchall()]
+
+    def must_have_partition_path(name):
+        partition_path = partition_db_path(controller, name, partition_dir)
+        if not partition_path:
+            dob_in_user_exit(_(
+                'The store is not a file, so specify --partition-dir.'
+            ))
+        if partition_path == sqlite_db_path(controller):
+            dob_in_user_exit(_('The partition cannot be the store itself.'))
+        return partition_path
+
+    def partition_period(connection, name, path, key_length, partitioned_before):
+        # ATTACH cannot run inside a transaction (see compact_store).
+        connection.execute(
+            text('ATTACH DATABASE :path AS {}'.format(PARTITION_SCHEMA)),
+            {'path': path},
+        )
+        try:
+            with connection.begin():
+                n_moved = mark_partition_ids(
+                    connection, name, key_length, partitioned_before,
+                )
+                if n_moved:
+                    move_facts(connection, PARTITION_SCHEMA, PARTITION_IDS_TABLE)
+                    record_partition(connection, name, path)
+        finally:
+            connection.execute(text(
+                'DROP TABLE IF EXISTS temp.{}'.format(PARTITION_IDS_TABLE)
+            ))
+            connection.execute(text('DETACH DATABASE {}'.format(PARTITION_SCHEMA)))
+        return n_moved
+
+    def mark_partition_ids(connection, name, key_length, partitioned_before):
+        connection.execute(text(
+            'CREATE TEMP TABLE {} (id INTEGER PRIMARY KEY)'.format(PARTITION_IDS_TABLE)
+        ))
+        return connection.execute(text(
+            'INSERT INTO {} (id) SELECT id FROM main.facts'
+            ' WHERE end_time IS NOT NULL AND start_time < :before'
+            ' AND substr(start_time, 1, :length) = :name'
+            .format(PARTITION_IDS_TABLE)
+        ), {
+            'before': partitioned_before.strftime(ARCHIVE_TIME_FORMAT),
+            'length': key_length,
+            'name': name,
+        }).rowcount
+
+    def record_partition(connection, name, path):
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS main.{} ('
+            ' name TEXT PRIMARY KEY,'
+            ' path TEXT NOT NULL,'
+            ' first_start TEXT NOT NULL,'
+            ' last_end TEXT NOT NULL,'
+            ' fact_count INTEGER NOT NULL'
+            ')'.format(PARTITIONS_TABLE)
+        ))
+        # Recount from the partition, which may have Facts from earlier moves.
+        # (The times are recorded in whole seconds, though the store may have
+        # saved them with microseconds.)
+        connection.execute(text(
+            'INSERT OR REPLACE INTO main.{table}'
+            ' (name, path, first_start, last_end, fact_count)'
+            ' SELECT :name, :path,'
+            ' substr(MIN(start_time), 1, 19), substr(MAX(end_time), 1, 19), COUNT(*)'
+            ' FROM {schema}.facts'.format(
+                table=PARTITIONS_TABLE, schema=PARTITION_SCHEMA,
+            )
+        ), {'name': name, 'path': path})
+
+    # ***
+
+    def echo_report(n_moved, names, partitioned_before, size_before, size_after):
+        click_echo(_('Moved {} Facts to the partitions from {} to {}.').format(
+            highlight_value(n_moved),
+            highlight_value(names[0]),
+            highlight_value(names[-1]),
+        ))
+        click_echo(_(
+            'Queries that reach back before {} will include the partitions they overlap.'
+        ).format(highlight_value(partitioned_before.strftime(ARCHIVE_TIME_FORMAT))))
+        click_echo(_('Store size: {} → {}').format(
+            highlight_value(format_bytes(size_before['bytes'])),
+            highlight_value(format_bytes(size_after['bytes'])),
+        ))
+
+    return _partition_store()
@@ -0,0 +1,146 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Opens the store read-only for the commands that only report on it."""
+
+from gettext import gettext as _
+
+import pathlib
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from nark.config import ConfigRoot
+
+from .db_file import sqlite_db_path
+
+__all__ = (
+    'DobConfigurableReports',
+    'open_store_read_only',
+    'read_only_engine',
+    # Private:
+    #  'MEBIBYTE',
+)
+
+
+MEBIBYTE = 1024 * 1024
+
+
+# ***
+
+@ConfigRoot.section('reports')
+class DobConfigurableReports(object):
+    """"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("If True, the commands that only read the store (list, find, report,"
+          " usage, export, and stats) open it read-only, so they never take"
+          " a write lock."),
+    )
+    def read_only(self):
+        return True
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("If True, the read-only commands open the store as an immutable"
+          " snapshot, without any locking. Only use for a copy of the store"
+          " that nothing writes to, or reports may be wrong."),
+    )
+    def immutable(self):
+        return False
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("KiB of page cache for the read-only commands (0 uses SQLite's default)."),
+    )
+    def cache_size(self):
+        return 65536
+
+    # ***
+
+    @property
+    @ConfigRoot.setting(
+        _("MiB of the store file the read-only commands map into memory"
+          " (0 disables memory-mapped I/O)."),
+    )
+    def mmap_size(self):
+        return 256
+
+
+# ***
+
+def read_only_engine(db_path, immutable=False, cache_size=0, mmap_size=0):
+    """Returns an Engine that opens ``db_path`` read-only.
+
+    A read-only connection never takes more than a shared lock, so a
+    concurrent save only waits (briefly) for a query that is reading,
+    and never for the whole command. With ``immutable``, SQLite skips
+    locking altogether, which is only safe for a store file that is
+    not changing, e.g., a backup or a copy of another machine's store.
+
+    The stores that ``store_union`` ATTACHes are opened read-only, too,
+    but the temporary tables and views it makes still work.
+    """
+    uri = '{}?mode=ro'.format(pathlib.Path(db_path).as_uri())
+    if immutable:
+        uri += '&immutable=1'
+
+    def connect():
+        connection = sqlite3.connect(uri, uri=True)
+        if cache_size:
+            # A negative cache_size is in KiB, rather than in pages.
+            connection.execute('PRAGMA cache_size = {:d}'.format(-cache_size))
+        connection.execute('PRAGMA mmap_size = {:d}'.format(mmap_size * MEBIBYTE))
+        return connection
+
+    return create_engine('sqlite://', creator=connect)
+
+
+def open_store_read_only(controller, immutable_ok=True):
+    """Arranges for the store to be opened read-only, when it's stood up.
+
+    Does nothing if ``reports.read_only`` is off, or if the store is not a
+    SQLite file. The ``reports.immutable`` setting is ignored unless
+    ``immutable_ok``, e.g., not for ``--watch``, which reads the store as
+    it changes.
+    """
+    if not controller.config['reports.read_only']:
+        return
+    db_path = sqlite_db_path(controller)
+    if db_path is None:
+        return
+
+    def create_storage_engine():
+        return read_only_engine(
+            db_path,
+            immutable=immutable_ok and controller.config['reports.immutable'],
+            cache_size=controller.config['reports.cache_size'],
+            mmap_size=controller.config['reports.mmap_size'],
+        )
+
+    # Replace the store's engine maker for this command (see SQLAlchemyStore).
+    controller.store.create_storage_engine = create_storage_engine
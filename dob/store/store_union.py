@@ -0,0 +1,448 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Includes the archived, partitioned and other stores' Facts in the queries."""
+
+import datetime
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from nark.helpers.parse_time import parse_dated
+from nark.managers.query_terms import QueryTerms
+
+from .federation import federate_stores, federated_paths, unfederate_stores
+
+__all__ = (
+    'ARCHIVE_STATE_TABLE',
+    'ARCHIVE_TIME_FORMAT',
+    'PARTITIONS_TABLE',
+    'MovedFacts',
+    'archive_state',
+    'as_datetime',
+    'fact_in_store',
+    'get_fact',
+    'get_moved_fact',
+    'partition_rows',
+    'store_union',
+    'store_union_active',
+    # Private:
+    #  'MAX_ATTACHED',
+    #  'SPILL_SCHEMA',
+    #  'UNION_SCHEMA',
+    #  'UNION_TABLES',
+    #  'archive_reaches',
+    #  'attach_segments',
+    #  'create_union_views',
+    #  'detach_segments',
+    #  'partitions_overlap',
+    #  'query_dated',
+    #  'query_window',
+    #  'segment_exists',
+    #  'spill_segment',
+    #  'spill_table',
+    #  'table_exists',
+    #  'union_segments',
+    #  'union_sources',
+)
+
+
+# The one-row table in the store that records where the archive is, and
+# that every Fact that ended before ``archived_before`` was moved there.
+ARCHIVE_STATE_TABLE = 'dob_archive_state'
+
+# The table in the store that lists the partition stores, and the times
+# of the first and last Fact in each (see partition_store).
+PARTITIONS_TABLE = 'dob_partitions'
+
+# The format of the stored times, which is how the store saves datetimes
+# (and how nark formats them for comparison).
+ARCHIVE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# The tables that are split between the store, the archive and the
+# partitions. (The names tables, activities, categories, and tags, stay
+# in the store.)
+UNION_TABLES = ('facts', 'fact_tags')
+
+# The schema names the archive and partitions are ATTACHed as, numbered.
+UNION_SCHEMA = 'dob_union_{}'
+
+# The schema name of a store whose Facts are copied to a TEMP table,
+# because there are more stores than SQLite will attach at once.
+SPILL_SCHEMA = 'dob_union_spill'
+
+# SQLite's default SQLITE_MAX_ATTACHED, which Python's sqlite3 builds with.
+MAX_ATTACHED = 10
+
+
+def archive_state(controller):
+    """Returns the archive's (path, archived_before), or None if there's none."""
+    if not table_exists(controller, ARCHIVE_STATE_TABLE):
+        return None
+    row = controller.store.session.execute(text(
+        'SELECT path, archived_before FROM main.{}'.format(ARCHIVE_STATE_TABLE)
+    )).fetchone()
+    if row is None:
+        return None
+    path, archived_before = row
+    return path, datetime.datetime.strptime(archived_before, ARCHIVE_TIME_FORMAT)
+
+
+def partition_rows(controller):
+    """Returns the (name, path, first_start, last_end) of each partition, in order.
+
+    The times are datetimes. Returns an empty list if there are no partitions.
+    """
+    if not table_exists(controller, PARTITIONS_TABLE):
+        return []
+    rows = controller.store.session.execute(text(
+        'SELECT name, path, first_start, last_end FROM main.{} ORDER BY name'
+        .format(PARTITIONS_TABLE)
+    )).fetchall()
+    return [
+        (
+            name,
+            path,
+            datetime.datetime.strptime(first_start, ARCHIVE_TIME_FORMAT),
+            datetime.datetime.strptime(last_end, ARCHIVE_TIME_FORMAT),
+        )
+        for name, path, first_start, last_end in rows
+    ]
+
+
+class MovedFacts(object):
+    """The times of the Facts moved to the archive and to the partitions.
+
+    The store only checks a Fact being saved against the Facts still in the
+    store, so a Fact saved over the time of a moved Fact would overlap it,
+    and would be moved alongside it the next time the store is archived or
+    partitioned. So the save path refuses such Facts (see ``overlaps``).
+
+    The times are read once, so make one of these per batch of saves.
+    """
+
+    def __init__(self, controller):
+        state = archive_state(controller)
+        self.archived_before = state and state[1]
+        self.archive_path = state and state[0]
+        self.partitions = partition_rows(controller)
+
+    def overlaps(self, start, end):
+        """Returns the path of the store whose moved Facts the time might overlap.
+
+        That's the archive, if ``start`` is before ``archived_before``, or the
+        partition of the period ``start`` is in, or a partition whose Facts'
+        span the time overlaps. Returns None if the time is clear.
+        """
+        if start is None:
+            return None
+        if self.archived_before is not None and start < self.archived_before:
+            return self.archive_path
+        start_time = start.strftime(ARCHIVE_TIME_FORMAT)
+        for name, path, first_start, last_end in self.partitions:
+            if start_time.startswith(name):
+                return path
+            if start < last_end and (end is None or end > first_start):
+                return path
+        return None
+
+
+def table_exists(controller, table_name):
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': table_name}).scalar())
+
+
+def store_union_active(controller):
+    """Returns True while the Facts queries include other stores (see store_union)."""
+    if controller.config['db.engine'] != 'sqlite':
+        return False
+    return bool(controller.store.session.execute(text(
+        "SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = 'facts'"
+    )).scalar())
+
+
+def fact_in_store(controller, pk):
+    """Returns False if there's no Fact with the PK in the store (as it was moved)."""
+    if controller.config['db.engine'] != 'sqlite':
+        return True
+    return bool(controller.store.session.execute(text(
+        'SELECT 1 FROM main.facts WHERE id = :pk'
+    ), {'pk': pk}).scalar())
+
+
+def get_fact(controller, pk, deleted=None):
+    """Returns the Fact with the PK, from the store, or the archive or a partition.
+
+    Raises KeyError if there's no such Fact, like ``facts.get``.
+    """
+    if fact_in_store(controller, pk):
+        return controller.facts.get(pk, deleted=deleted)
+    return get_moved_fact(controller, pk, deleted=deleted)
+
+
+def get_moved_fact(controller, pk, deleted=None):
+    """Returns the Fact with the PK from the archive or a partition.
+
+    Raises KeyError if the Fact was not moved (or there's no such Fact).
+    """
+    with store_union(controller, QueryTerms(deleted=None)) as unioned:
+        if not unioned:
+            raise KeyError(pk)
+        return controller.facts.get(pk, deleted=deleted)
+
+
+@contextmanager
+def store_union(controller, qt, stores=()):
+    """Includes the archived, partitioned and ``stores``' Facts that ``qt`` reaches.
+
+    The archive is included if the query's ``since`` is before the archive's
+    ``archived_before`` (or if there's no ``since``), and each partition is
+    included if its Facts' times overlap the query's ``since`` and ``until``.
+    Those stores are attached, and TEMP views named ``facts`` and
+    ``fact_tags``, which are the UNION ALL of the store's tables and theirs,
+    shadow the store's tables. (SQLite looks for an unqualified table name in
+    the temp schema first.) So nark's queries read from all of them, without
+    knowing it.
+
+    Otherwise, the queries only read the store, which is the point of the
+    archive and partitions.
+
+    The Facts of the other dob ``stores`` (paths to their files), in the
+    query's window, are included, too, renumbered, and with their names
+    combined with the store's (see federate_stores).
+
+    The views are read-only, so don't save anything in the block.
+
+    Yields True if other stores are included.
+    """
+    if store_union_active(controller):
+        yield True
+        return
+    segment_paths = union_segments(controller, qt)
+    store_paths = federated_paths(controller, stores)
+    if not segment_paths and not store_paths:
+        yield False
+        return
+    # Leave an attach slot for copying the other stores (see attach_segments).
+    schemas, n_spill = attach_segments(
+        controller, segment_paths, max_attached=MAX_ATTACHED - bool(store_paths),
+    )
+    try:
+        sources = union_sources(schemas, n_spill)
+        if store_paths:
+            since, until = query_window(controller, qt)
+            federate_stores(
+                controller,
+                store_paths,
+                since=since and since.strftime(ARCHIVE_TIME_FORMAT),
+                until=until and until.strftime(ARCHIVE_TIME_FORMAT),
+                sources=sources,
+            )
+        create_union_views(controller, sources)
+        yield True
+    finally:
+        detach_segments(controller, schemas, n_spill)
+        unfederate_stores(controller, len(store_paths))
+
+
+def union_segments(controller, qt):
+    """Returns the paths of the archive and the partitions that the query reaches."""
+    since, until = query_window(controller, qt)
+    segment_paths = []
+    archive_path = archive_reaches(controller, since)
+    if archive_path is not None:
+        segment_paths.append(archive_path)
+    segment_paths.extend(partitions_overlap(controller, since, until))
+    return segment_paths
+
+
+def archive_reaches(controller, since):
+    """Returns the archive path, if the query reaches before archived_before."""
+    state = archive_state(controller)
+    if state is None:
+        return None
+    archive_path, archived_before = state
+    if since is not None and since >= archived_before:
+        return None
+    if not segment_exists(controller, archive_path):
+        return None
+    return archive_path
+
+
+def partitions_overlap(controller, since, until):
+    """Returns the paths of the partitions that hold Facts between since and until.
+
+    nark matches a Fact if its start or its end is in the query's window
+    (and with ``partial=False``, if both are), so a partition is pruned if
+    the window misses the span from its first start to its last end. A
+    Fact that crosses a partition boundary belongs to the partition of its
+    start, and that partition's last end reaches past the boundary with it.
+    """
+    return [
+        path for name, path, first_start, last_end in partition_rows(controller)
+        if (since is None or last_end >= since)
+        and (until is None or first_start <= until)
+        and segment_exists(controller, path)
+    ]
+
+
+def segment_exists(controller, path):
+    if os.path.exists(path):
+        return True
+    controller.client_logger.warning(
+        'A store is missing, so its Facts are not included: {}'.format(path)
+    )
+    return False
+
+
+def attach_segments(controller, segment_paths, max_attached):
+    """Attaches the stores; returns the schema names, and the number spilled.
+
+    If there are more stores than SQLite will attach at once, the earliest
+    are attached one at a time, and their Facts copied to TEMP tables, which
+    the views include instead.
+    """
+    session = controller.store.session
+    n_attach = len(segment_paths)
+    if n_attach > max_attached:
+        # Leave one slot to attach the spilled stores.
+        n_attach = max_attached - 1
+    n_spill = len(segment_paths) - n_attach
+    for number, path in enumerate(segment_paths[:n_spill]):
+        spill_segment(controller, path, number)
+    schemas = []
+    for path in segment_paths[n_spill:]:
+        schema = UNION_SCHEMA.format(len(schemas))
+        session.execute(
+            text('ATTACH DATABASE :path AS {}'.format(schema)), {'path': path},
+        )
+        schemas.append(schema)
+    return schemas, n_spill
+
+
+def union_sources(schemas, n_spill):
+    """Returns the tables to union in each view, by the name of the view."""
+    return {
+        table_name: (
+            ['main.{}'.format(table_name)]
+            + [
+                'temp.{}'.format(spill_table(table_name, number))
+                for number in range(n_spill)
+            ]
+            + ['{}.{}'.format(schema, table_name) for schema in schemas]
+        )
+        for table_name in UNION_TABLES
+    }
+
+
+def create_union_views(controller, sources):
+    session = controller.store.session
+    for table_name in UNION_TABLES:
+        session.execute(text('CREATE TEMP VIEW {} AS {}'.format(
+            table_name,
+            ' UNION ALL '.join(
+                'SELECT * FROM {}'.format(source) for source in sources[table_name]
+            ),
+        )))
+
+
+def spill_segment(controller, path, number):
+    # Only DDL here: pysqlite begins a transaction before an INSERT, and
+    # the store cannot be detached until it ends.
+    session = controller.store.session
+    session.execute(
+        text('ATTACH DATABASE :path AS {}'.format(SPILL_SCHEMA)), {'path': path},
+    )
+    try:
+        for table_name in UNION_TABLES:
+            session.execute(text(
+                'CREATE TEMP TABLE {spill} AS SELECT * FROM {schema}.{table}'.format(
+                    spill=spill_table(table_name, number),
+                    schema=SPILL_SCHEMA,
+                    table=table_name,
+                )
+            ))
+    finally:
+        session.execute(text('DETACH DATABASE {}'.format(SPILL_SCHEMA)))
+    # The copies have no keys, so index the columns the queries join on.
+    session.execute(text(
+        'CREATE INDEX temp.{spill}_id ON {spill} (id)'
+        .format(spill=spill_table('facts', number))
+    ))
+    session.execute(text(
+        'CREATE INDEX temp.{spill}_fact_id ON {spill} (fact_id)'
+        .format(spill=spill_table('fact_tags', number))
+    ))
+
+
+def spill_table(table_name, number):
+    return 'dob_union_{}_{}'.format(table_name, number)
+
+
+def detach_segments(controller, schemas, n_spill):
+    session = controller.store.session
+    for table_name in UNION_TABLES:
+        session.execute(text('DROP VIEW IF EXISTS temp.{}'.format(table_name)))
+        for number in range(n_spill):
+            session.execute(text(
+                'DROP TABLE IF EXISTS temp.{}'.format(spill_table(table_name, number))
+            ))
+    for schema in schemas:
+        session.execute(text('DETACH DATABASE {}'.format(schema)))
+
+
+def query_window(controller, qt):
+    """Returns the query's ``since`` and ``until`` as datetimes (or None).
+
+    nark parses them when the query runs, but the stores must be attached
+    before then. If either cannot be parsed, it's None (and the query will
+    include more stores than it needs, before nark complains about it).
+    """
+    since = query_dated(controller, qt.since)
+    until = query_dated(controller, qt.until)
+    if until is not None and until.time() == datetime.time():
+        # nark uses the end of the day for a date, so err on the next day.
+        until += datetime.timedelta(days=1)
+    return since, until
+
+
+def query_dated(controller, dated):
+    if not dated:
+        return None
+    if isinstance(dated, str):
+        try:
+            dated = parse_dated(dated, controller.now)
+        except Exception:
+            return None
+    return as_datetime(dated)
+
+
+def as_datetime(dated):
+    """Returns the date or time as a datetime, e.g., a date at midnight."""
+    if isinstance(dated, datetime.datetime):
+        return dated
+    if isinstance(dated, datetime.date):
+        # nark uses the day_start for a date, which is midnight or later,
+        # so midnight errs on the side of including the archive.
+        return datetime.datetime.combine(dated, datetime.time())
+    if isinstance(dated, datetime.time):
+        return datetime.datetime.combine(datetime.date.today(), dated)
+    return None
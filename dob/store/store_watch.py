@@ -0,0 +1,124 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Re-renders command output whenever the store changes."""
+
+from gettext import gettext as _
+
+import sys
+
+import click_hotoffthehamster as click
+
+from dob_bright.termio import click_echo, dob_in_user_exit
+from dob_bright.termio.paging import ClickEchoPager
+
+from ..helpers.file_watch import FileWatcher
+from .db_file import db_change_stamp, sqlite_db_path
+
+__all__ = (
+    'StoreWatcher',
+    'watch_store',
+)
+
+
+class StoreWatcher(object):
+    """Blocks until the store file is changed.
+
+    The watcher wakes up as soon as the store file is written (if inotify
+    is available), or every ``poll_secs`` seconds, and then compares the
+    store's change stamp (see ``db_change_stamp``), which is just a stat
+    and a 4-byte read. The stamp is checked on every wake-up, because in
+    WAL mode, the store file itself is not written until a checkpoint.
+    """
+
+    POLL_SECS = 1.0
+
+    # A dob command often commits more than once (e.g., saving a Fact and
+    # its edits), so wait for the store to settle before saying it changed.
+    SETTLE_SECS = 0.25
+
+    def __init__(self, db_path, poll_secs=POLL_SECS, settle_secs=SETTLE_SECS):
+        self.db_path = db_path
+        self.poll_secs = poll_secs
+        self.settle_secs = settle_secs
+        self.file_watcher = FileWatcher(db_path, poll_secs=poll_secs)
+        self.change_stamp = db_change_stamp(db_path)
+
+    def close(self):
+        self.file_watcher.close()
+
+    def wait(self, timeout=None):
+        """Returns True once the store changes, or False after ``timeout`` seconds."""
+        waited = 0
+        while timeout is None or waited < timeout:
+            self.file_watcher.wait(self.poll_secs)
+            waited += self.poll_secs
+            change_stamp = db_change_stamp(self.db_path)
+            if change_stamp != self.change_stamp:
+                self.change_stamp = self.settle(change_stamp)
+                return True
+        return False
+
+    def settle(self, change_stamp):
+        while True:
+            self.file_watcher.wait(self.settle_secs)
+            settled_stamp = db_change_stamp(self.db_path)
+            if settled_stamp == change_stamp:
+                return change_stamp
+            change_stamp = settled_stamp
+
+
+# ***
+
+def watch_store(controller, render, poll_secs=StoreWatcher.POLL_SECS):
+    """Calls ``render``, and again whenever the store changes, until ^C.
+
+    The same Controller (and store connection) is used for every render.
+    A render that exits (e.g., dob_in_user_exit, because no Facts matched)
+    does not end the watch, but waits for the next change.
+    """
+
+    def _watch_store():
+        db_path = sqlite_db_path(controller)
+        if db_path is None:
+            dob_in_user_exit(_('Cannot --watch a store that is not a SQLite file.'))
+        watcher = StoreWatcher(db_path, poll_secs=poll_secs)
+        # Each render is output immediately, not saved for the pager.
+        was_paging = ClickEchoPager.set_paging(False)
+        try:
+            while True:
+                render_once()
+                watcher.wait()
+        except KeyboardInterrupt:
+            click_echo()
+        finally:
+            watcher.close()
+            ClickEchoPager.set_paging(was_paging)
+
+    def render_once():
+        # End the read transaction, and forget the items loaded, so the
+        # render sees what changed.
+        controller.store.session.rollback()
+        if sys.stdout.isatty():
+            click.clear()
+        try:
+            render()
+        except SystemExit:
+            # The render already told the user why (e.g., no results).
+            pass
+
+    return _watch_store()
@@ -0,0 +1,338 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Bitmaps of the Facts that use each Tag, to answer tag queries without joins."""
+
+import base64
+import hashlib
+import json
+import os
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import and_, text
+
+from dob_bright.config.app_dirs import AppDirs, get_appdirs_subdir_file_path
+
+from .db_file import db_change_stamp, sqlite_db_path
+from .store_union import store_union_active
+
+__all__ = (
+    'TagBitmaps',
+    'bitmap_pks',
+    'popcount',
+    'refresh_tag_bitmaps',
+    'tag_bitmaps_filter',
+    'tag_bitmaps_usage',
+    # Private:
+    #  'decode_bitmap',
+    #  'encode_bitmap',
+    #  'tag_ids_by_name',
+)
+
+
+class TagBitmaps(object):
+    """A bitmap of Fact PKs for each Tag, saved to a file in the user cache.
+
+    Each bitmap is a Python int, with bit N set if the Fact with PK N uses
+    the Tag, so that the Facts with any or all of some Tags are found with
+    bitwise OR and AND, and a Tag's usage count is a popcount. The bitmaps
+    are zlib-compressed when saved, which squeezes the long runs of zeros
+    (sparse Tags) and ones (popular Tags) in the bitmaps.
+
+    The bitmaps are caught up to the store before they're used: the rows
+    added to fact_tags since are OR'ed in, or, if any rows were deleted,
+    all the bitmaps are rebuilt. Catching up is skipped entirely if the
+    store file is unchanged (see ``db_change_stamp``).
+
+    Only a SQLite store file has bitmaps; otherwise, ``refresh`` returns
+    False, and the caller should query the store as usual.
+    """
+
+    BITMAPS_DIR = 'tag-bitmaps'
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.db_path = sqlite_db_path(controller)
+        self.path = None
+        # The Tag PK → bitmap.
+        self.tags = {}
+        # The fact_tags rowid and row count, and store file change stamp,
+        # when the bitmaps were last caught up.
+        self.state = None
+        if self.db_path is None:
+            return
+        path_hash = hashlib.sha256(self.db_path.encode('utf-8')).hexdigest()
+        self.path = get_appdirs_subdir_file_path(
+            file_basename='{}.json'.format(path_hash),
+            dir_dirname=self.BITMAPS_DIR,
+            appdirs_dir=AppDirs.user_cache_dir,
+        )
+
+    @property
+    def exists(self):
+        return self.path is not None and os.path.exists(self.path)
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as bitmaps_f:
+                saved = json.load(bitmaps_f)
+            self.tags = {
+                int(tag_id): decode_bitmap(bitmap)
+                for tag_id, bitmap in saved['tags'].items()
+            }
+            self.state = saved['state']
+        except (OSError, ValueError, KeyError, TypeError, zlib.error):
+            self.tags = {}
+            self.state = None
+
+    def save(self):
+        # Write-and-rename, so a crash never leaves a partial file.
+        temp_path = '{}.tmp'.format(self.path)
+        try:
+            with open(temp_path, 'w') as bitmaps_f:
+                json.dump({
+                    'state': self.state,
+                    'tags': {
+                        str(tag_id): encode_bitmap(bitmap)
+                        for tag_id, bitmap in self.tags.items()
+                    },
+                }, bitmaps_f)
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            # The bitmaps are just a cache, and they'll be rebuilt next time.
+            self.controller.client_logger.warning(
+                'Could not save the tag bitmaps: {}'.format(err)
+            )
+
+    def refresh(self):
+        """Loads the bitmaps, and catches them up to the store, and saves them.
+
+        Returns False if the store is not a SQLite file.
+        """
+        if self.path is None:
+            return False
+        if self.state is None:
+            self.load()
+        change_stamp = db_change_stamp(self.db_path)
+        if self.state is not None and self.state['change_stamp'] == change_stamp:
+            return True
+        session = self.controller.store.session
+        max_rowid, n_rows = session.execute(text(
+            'SELECT MAX(rowid), COUNT(*) FROM fact_tags'
+        )).fetchone()
+        if self.state is None or not self.catch_up(max_rowid, n_rows):
+            self.rebuild()
+        self.state = {
+            'change_stamp': change_stamp,
+            'fact_tags_rowid': max_rowid or 0,
+            'fact_tags_count': n_rows,
+        }
+        self.save()
+        return True
+
+    def catch_up(self, max_rowid, n_rows):
+        new_rows = self.controller.store.session.execute(text(
+            'SELECT fact_id, tag_id FROM fact_tags WHERE rowid > :rowid'
+        ), {'rowid': self.state['fact_tags_rowid']}).fetchall()
+        # If rows were deleted, the count will not add up, and it's simplest
+        # to start over. (A Fact edit only adds rows, for the new version.)
+        if self.state['fact_tags_count'] + len(new_rows) != n_rows:
+            return False
+        self.add_rows(new_rows)
+        return True
+
+    def rebuild(self):
+        self.tags = {}
+        self.add_rows(self.controller.store.session.execute(text(
+            'SELECT fact_id, tag_id FROM fact_tags'
+        )))
+
+    def add_rows(self, rows):
+        for fact_id, tag_id in rows:
+            if fact_id is None or tag_id is None:
+                continue
+            self.tags[tag_id] = self.tags.get(tag_id, 0) | (1 << fact_id)
+
+    # ***
+
+    def facts_with_any(self, tag_ids):
+        bitmap = 0
+        for tag_id in tag_ids:
+            bitmap |= self.tags.get(tag_id, 0)
+        return bitmap
+
+    def facts_with_all(self, tag_ids):
+        if not tag_ids:
+            return 0
+        bitmap = -1
+        for tag_id in tag_ids:
+            bitmap &= self.tags.get(tag_id, 0)
+        return bitmap
+
+    def count(self, tag_id):
+        return popcount(self.tags.get(tag_id, 0))
+
+
+def encode_bitmap(bitmap):
+    raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    return base64.b64encode(zlib.compress(raw)).decode('ascii')
+
+
+def decode_bitmap(encoded):
+    return int.from_bytes(zlib.decompress(base64.b64decode(encoded)), 'little')
+
+
+def popcount(bitmap):
+    # (lb): int.bit_count() is new in Python 3.10.
+    return bin(bitmap).count('1')
+
+
+def bitmap_pks(bitmap):
+    """Returns the PKs, i.e., the positions of the bits set, in the bitmap."""
+    bits = bin(bitmap)[:1:-1]
+    pks = []
+    pk = bits.find('1')
+    while pk >= 0:
+        pks.append(pk)
+        pk = bits.find('1', pk + 1)
+    return pks
+
+
+# ***
+
+def refresh_tag_bitmaps(controller):
+    """Adds the tags of the Facts just saved to the tag bitmaps, if there are any.
+
+    The bitmaps are just a cache, which the next tag query catches up, too,
+    so a failure is logged, rather than raised (the Facts are saved).
+    (And the bitmaps are not made if they do not exist yet, i.e., if the
+    user has not queried tags.)
+    """
+    bitmaps = TagBitmaps(controller)
+    if not bitmaps.exists:
+        return
+    try:
+        bitmaps.refresh()
+    except Exception as err:
+        controller.client_logger.warning(
+            'Could not refresh the tag bitmaps: {}'.format(err)
+        )
+
+
+# ***
+
+def tag_ids_by_name(controller, tag_names):
+    rows = controller.store.session.execute(text(
+        'SELECT name, id FROM tags WHERE name IN ({})'.format(
+            ', '.join(':name{}'.format(idx) for idx in range(len(tag_names))),
+        )
+    ), {'name{}'.format(idx): name for idx, name in enumerate(tag_names)})
+    return dict(rows.fetchall())
+
+
+@contextmanager
+def tag_bitmaps_filter(controller, qt, all_tags=False):
+    """Answers the ``qt.match_tags`` of the Facts query using the tag bitmaps.
+
+    While installed, the store only considers the Facts whose PKs are found
+    from the bitmaps, rather than joining every Fact to its Tags first. If
+    ``all_tags``, a Fact must use all of the Tags, rather than any of them.
+
+    If the store has no bitmaps (it's not a SQLite file), or if the query
+    includes the archive or partitions (which the bitmaps do not cover), the
+    store filters as usual (and checks each Tag separately, if ``all_tags``).
+    """
+    facts = controller.store.facts
+    query_filter_by_tags = facts.query_filter_by_tags
+    tag_names = [getattr(tag, 'name', tag) for tag in qt.match_tags or []]
+    criterion = None
+    # A None name (from `-t ''`) matches the Facts without Tags, which the
+    # bitmaps don't know, so leave that query to the store.
+    if tag_names and None not in tag_names and not store_union_active(controller):
+        bitmaps = TagBitmaps(controller)
+        if bitmaps.refresh():
+            tag_ids = tag_ids_by_name(controller, tag_names).values()
+            if all_tags and len(tag_ids) < len(set(tag_names)):
+                # An unknown Tag name matches nothing.
+                bitmap = 0
+            elif all_tags:
+                bitmap = bitmaps.facts_with_all(tag_ids)
+            else:
+                bitmap = bitmaps.facts_with_any(tag_ids)
+            criterion = text(
+                'facts.id IN (SELECT value FROM json_each(:tag_fact_pks))'
+            ).bindparams(tag_fact_pks=json.dumps(bitmap_pks(bitmap)))
+        elif all_tags:
+            criterion = and_(*[
+                text(
+                    'facts.id IN (SELECT fact_tags.fact_id FROM fact_tags'
+                    ' JOIN tags ON tags.id = fact_tags.tag_id'
+                    ' WHERE tags.name = :tag_name{})'.format(idx)
+                ).bindparams(**{'tag_name{}'.format(idx): tag_name})
+                for idx, tag_name in enumerate(tag_names)
+            ])
+
+    def filter_by_tags_using_bitmaps(query, query_terms):
+        if not all_tags:
+            # Keep the name match, too, so the results show the same tags.
+            query = query_filter_by_tags(query, query_terms)
+        return query.filter(criterion)
+
+    if criterion is not None:
+        facts.query_filter_by_tags = filter_by_tags_using_bitmaps
+    try:
+        yield criterion
+    finally:
+        if criterion is not None:
+            # Remove the instance attribute, which restores the class method.
+            del facts.query_filter_by_tags
+
+
+def tag_bitmaps_usage(controller, qt):
+    """Returns the ``dob usage tags`` counts from the tag bitmaps, or None.
+
+    The counts are popcounts, which only works for a plain usage report
+    (no time window, search term, or other filter, and no durations), and
+    only if the store has bitmaps (and the query does not include the
+    archive or partitions). Otherwise, returns None, and the caller should query the
+    store as usual.
+    """
+    if (
+        store_union_active(controller)
+        or qt.since or qt.until or qt.endless
+        or qt.search_terms or qt.key is not None
+        or qt.match_activities or qt.match_categories
+        or (qt.sort_cols and tuple(qt.sort_cols) not in (('usage',), ('name',)))
+    ):
+        return None
+    bitmaps = TagBitmaps(controller)
+    if not bitmaps.refresh():
+        return None
+    tags = controller.tags.get_all(sort_cols=('name',))
+    # Like the usage query, which inner joins fact_tags, skip unused Tags.
+    results = [(tag, bitmaps.count(tag.pk), None) for tag in tags]
+    results = [result for result in results if result[1]]
+    reverse = bool(qt.sort_orders) and qt.sort_orders[0] == 'desc'
+    if not qt.sort_cols or qt.sort_cols[0] == 'usage':
+        results.sort(key=lambda result: result[1], reverse=reverse)
+    elif reverse:
+        results.reverse()
+    offset = qt.offset or 0
+    if qt.limit:
+        return results[offset:offset + qt.limit]
+    return results[offset:]
@@ -0,0 +1,130 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+"""Saves a set of Facts in one store transaction, with a savepoint per Fact."""
+
+from contextlib import contextmanager
+
+__all__ = (
+    'StoreTransaction',
+    'fact_savepoint',
+    'store_transaction',
+)
+
+
+class StoreTransaction(object):
+    """Defers the store's commits, so many saves share one transaction.
+
+    The store managers commit the session after each item they save. While
+    a StoreTransaction is installed (see ``store_transaction``), those
+    commits only flush the session, and the transaction is committed once,
+    at the end (or rolled back, if anything fails).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.session = store.session
+        self.n_commits = 0
+
+    def install(self):
+        self.session.commit = self.defer_commit
+        self.begin()
+
+    def uninstall(self):
+        # Remove the instance attribute, which restores the class method.
+        del self.session.commit
+
+    def begin(self):
+        # (lb): The pysqlite driver does not emit BEGIN until the first
+        # INSERT/UPDATE/DELETE, but a SAVEPOINT outside a transaction is
+        # its own transaction, and releasing it would commit. So begin the
+        # transaction now, so that the savepoints nest inside it.
+        dbapi_conn = self.session.connection().connection
+        if getattr(dbapi_conn, 'in_transaction', True):
+            return
+        dbapi_conn.cursor().execute('BEGIN')
+
+    def defer_commit(self):
+        self.session.flush()
+
+    # ***
+
+    def commit(self, begin_again=True):
+        """Commits everything saved so far, and begins a new transaction."""
+        type(self.session).commit(self.session)
+        self.n_commits += 1
+        begin_again and self.begin()
+
+    def rollback(self):
+        self.session.rollback()
+
+    @contextmanager
+    def savepoint(self):
+        """Rolls back the saves in the block if it fails."""
+        nested = self.session.begin_nested()
+        try:
+            yield
+        except BaseException:
+            nested.rollback()
+            raise
+        else:
+            nested.commit()
+
+
+# ***
+
+@contextmanager
+def store_transaction(controller, enabled=True):
+    """Saves everything in the block in one transaction, committed at the end.
+
+    If the block raises (including SystemExit, e.g., from dob_in_user_exit),
+    the whole transaction is rolled back, so no partial save is ever left.
+
+    If a transaction is already installed, it's reused, so nested saves
+    commit with the outermost one. If not ``enabled``, yields None (and
+    the store commits as it normally does).
+    """
+    session = controller.store.session
+    active_transaction = getattr(session.commit, '__self__', None)
+    if isinstance(active_transaction, StoreTransaction):
+        yield active_transaction
+        return
+    if not enabled:
+        yield None
+        return
+
+    transaction = StoreTransaction(controller.store)
+    transaction.install()
+    try:
+        yield transaction
+        transaction.commit(begin_again=False)
+    except BaseException:
+        transaction.rollback()
+        raise
+    finally:
+        transaction.uninstall()
+
+
+@contextmanager
+def fact_savepoint(controller):
+    """Wraps the block in a savepoint, if a store transaction is installed."""
+    active_transaction = getattr(controller.store.session.commit, '__self__', None)
+    if not isinstance(active_transaction, StoreTransaction):
+        yield
+        return
+    with active_transaction.savepoint():
+        yield
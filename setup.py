@@ -22,6 +22,10 @@ requirements = [
     # "textwrap, but savvy to ANSI colors"
     #  https://github.com/jonathaneunice/ansiwrap
     'ansiwrap >= 0.8.4, < 1',
+    # Per-user cache dir locator (also used by nark). Used directly by the
+    # dob-status command, which avoids importing nark.
+    #  https://github.com/ActiveState/appdirs
+    'appdirs >= 1.4.3, < 2',
     # Vocabulary word pluralizer.
     #  https://github.com/ixmatus/inflector
     'Inflector >= 3.0.1, < 4',
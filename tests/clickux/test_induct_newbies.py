@@ -0,0 +1,104 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+import pytest
+
+from dob.clickux import induct_newbies
+from dob.store import integrity_stamp
+from dob.store.indexes import missing_dob_indexes
+
+
+@pytest.fixture
+def db_path(controller_with_logging, tmpdir, stand_in_db_path, mocker):
+    cache_dir = tmpdir.mkdir('cache').strpath
+    mocker.patch.object(integrity_stamp, 'AppDirs', user_cache_dir=cache_dir)
+    mocker.patch.object(
+        integrity_stamp, 'sqlite_db_path', return_value=stand_in_db_path,
+    )
+    return stand_in_db_path
+
+
+class TestBackendIntegrity(object):
+    """Tests for the cached integrity preflight."""
+
+    def test_stamp_is_stale_after_outside_change(self, controller_with_logging, db_path):
+        stamp = integrity_stamp.IntegrityStamp(controller_with_logging)
+        assert not stamp.is_fresh()
+        stamp.save()
+        assert stamp.is_fresh()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('INSERT INTO facts DEFAULT VALUES')
+        assert not stamp.is_fresh()
+
+    def test_checks_skipped_while_store_unchanged(
+        self, controller_with_logging, db_path, mocker,
+    ):
+        controller = controller_with_logging
+        mocker.patch.object(induct_newbies.migrate, 'version', return_value=1)
+        mocker.patch.object(induct_newbies.migrate, 'latest_version', return_value=1)
+        mocker.spy(controller.facts, 'endless')
+        mocker.spy(induct_newbies, 'ensure_endless_facts_index')
+        commands = []
+
+        @induct_newbies.backend_integrity
+        def command(ctx, controller):
+            commands.append(True)
+
+        command(None, controller)
+        command(None, controller)
+        assert len(commands) == 2
+        assert controller.facts.endless.call_count == 1
+        assert induct_newbies.migrate.latest_version.call_count == 1
+        # The checks make the endless Facts index, so the saves need not.
+        assert induct_newbies.ensure_endless_facts_index.call_count == 1
+        assert 'dob_facts_endless' not in missing_dob_indexes(controller)
+
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('INSERT INTO facts DEFAULT VALUES')
+        command(None, controller)
+        assert controller.facts.endless.call_count == 2
+
+    def test_change_during_unchecked_command_is_checked_after(
+        self, controller_with_logging, db_path, mocker,
+    ):
+        controller = controller_with_logging
+        mocker.patch.object(induct_newbies.migrate, 'version', return_value=1)
+        mocker.patch.object(induct_newbies.migrate, 'latest_version', return_value=1)
+        mocker.spy(controller.facts, 'endless')
+
+        def change_store():
+            with sqlite3.connect(db_path) as conn:
+                conn.execute('INSERT INTO facts DEFAULT VALUES')
+
+        @induct_newbies.backend_integrity
+        def command(ctx, controller, during=None):
+            during and during()
+
+        # The checks run before the command, so the change made meanwhile is
+        # stamped as good.
+        command(None, controller, during=change_store)
+        assert controller.facts.endless.call_count == 1
+        # The checks are skipped, so the change made meanwhile is checked
+        # after the command, and then stamped.
+        command(None, controller, during=change_store)
+        assert controller.facts.endless.call_count == 2
+        assert induct_newbies.migrate.latest_version.call_count == 1
+        command(None, controller)
+        command(None, controller)
+        assert controller.facts.endless.call_count == 2
@@ -0,0 +1,121 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+from dob_bright.controller import Controller
+
+from dob.clickux import plugin_group
+from dob.clickux.plugin_group import ClickPluginGroup, load_plugin_timings
+from dob.clickux.post_processor import run_post_processors
+
+HOOKLESS_PLUGIN = """
+import os
+with open(os.path.join(os.path.dirname(__file__), 'loaded.txt'), 'a') as loaded_f:
+    loaded_f.write('loaded\\n')
+"""
+
+HOOKED_PLUGIN = """
+from dob_bright.controller import Controller
+
+@Controller.post_processor
+def hooked_plugin_hook(ctx, controller, facts, **kwargs):
+    pass
+"""
+
+
+class TestEnsureHooksPluggedIn(object):
+    """Tests for skipping plugins that register no post-processors."""
+
+    def test_hookless_plugins_are_not_reloaded(
+        self, controller_with_logging, tmpdir, mocker,
+    ):
+        controller = controller_with_logging
+        cache_dir = tmpdir.mkdir('cache').strpath
+        mocker.patch.object(plugin_group, 'AppDirs', user_cache_dir=cache_dir)
+        plugins_dir = tmpdir.mkdir('plugins')
+        plugins_dir.join('hookless.py').write(HOOKLESS_PLUGIN)
+        mocker.patch.object(controller, 'replay_config')
+
+        def n_loaded():
+            return len(plugins_dir.join('loaded.txt').readlines())
+
+        def new_group():
+            group = ClickPluginGroup()
+            group.plugins_basepath = plugins_dir.strpath
+            return group
+
+        new_group().ensure_hooks_plugged_in(controller)
+        assert n_loaded() == 1
+        # The next command knows the plugins add no post-processors.
+        new_group().ensure_hooks_plugged_in(controller)
+        assert n_loaded() == 1
+        # But a changed plugin is loaded again.
+        plugins_dir.join('hookless.py').write(HOOKLESS_PLUGIN + '\n# Changed.\n')
+        new_group().ensure_hooks_plugged_in(controller)
+        assert n_loaded() == 2
+
+    def test_unwritable_cache_is_ignored(
+        self, controller_with_logging, tmpdir, mocker,
+    ):
+        controller = controller_with_logging
+        cache_dir = tmpdir.mkdir('cache').strpath
+        mocker.patch.object(plugin_group, 'AppDirs', user_cache_dir=cache_dir)
+        plugins_dir = tmpdir.mkdir('plugins')
+        plugins_dir.join('hookless.py').write(HOOKLESS_PLUGIN)
+        mocker.patch.object(controller, 'replay_config')
+        mocker.patch.object(plugin_group.os, 'replace', side_effect=OSError('Disk full'))
+
+        group = ClickPluginGroup()
+        group.plugins_basepath = plugins_dir.strpath
+        group.ensure_hooks_plugged_in(controller)
+        assert len(plugins_dir.join('loaded.txt').readlines()) == 1
+
+
+class TestPluginTimings(object):
+    """Tests for the per-plugin load and post-processor timings."""
+
+    def test_plugin_load_and_hook_timings_are_saved(
+        self, controller_with_logging, tmpdir, mocker,
+    ):
+        controller = controller_with_logging
+        cache_dir = tmpdir.mkdir('cache').strpath
+        mocker.patch.object(plugin_group, 'AppDirs', user_cache_dir=cache_dir)
+        mocker.patch.object(Controller, 'POST_PROCESSORS', [])
+        mocker.patch.dict(plugin_group.PLUGIN_HOOK_PATHS, clear=True)
+        mocker.patch.object(controller, 'replay_config')
+        mocker.patch.object(controller, 'ctx', None, create=True)
+        plugins_dir = tmpdir.mkdir('plugins')
+        py_path = plugins_dir.join('hooked.py')
+        py_path.write(HOOKED_PLUGIN)
+
+        group = ClickPluginGroup()
+        group.plugins_basepath = plugins_dir.strpath
+        group.ensure_plugged_in(controller)
+
+        timings = load_plugin_timings()[py_path.strpath]
+        assert timings['hooks'] == 1
+        assert timings['commands'] == 0
+        assert timings['compile_secs'] >= 0 and timings['eval_secs'] >= 0
+        assert 'hook_calls' not in timings
+
+        hook, = Controller.POST_PROCESSORS
+        assert plugin_group.plugin_hook_path(hook) == py_path.strpath
+        run_post_processors(controller, [hook], [])
+        run_post_processors(controller, [hook], [])
+
+        timings = load_plugin_timings()[py_path.strpath]
+        assert timings['hook_calls'] == 2
+        assert timings['hook_secs'] >= timings['last_hook_secs'] >= 0
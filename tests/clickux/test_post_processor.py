@@ -0,0 +1,77 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from nark.backends.sqlalchemy import objects
+
+from dob.clickux import post_processor
+from dob.clickux.post_processor import detach_post_processors, run_post_processors
+
+
+class TestRunPostProcessors(object):
+    """Tests for running the plugin post-processors on threads."""
+
+    def test_threaded_hooks_use_their_own_sessions(
+        self, controller_with_logging, tmpdir,
+    ):
+        controller = controller_with_logging
+        # Use a store file, which each thread can open (unlike ':memory:').
+        engine = create_engine('sqlite:///{}'.format(tmpdir.join('dob.sqlite')))
+        objects.metadata.create_all(engine)
+        command_session = sessionmaker(bind=engine)()
+        controller.store.session = command_session
+        # Open the command's connection, on the command's thread.
+        assert controller.facts.get_all() == []
+        controller.config['hooks.detached'] = False
+        hook_sessions = []
+
+        def hook(ctx, controller, facts, **kwargs):
+            # Raises if the command's connection is shared with this thread.
+            facts = controller.facts.get_all()
+            hook_sessions.append((
+                threading.current_thread(), controller.store.session.registry(), facts,
+            ))
+
+        run_post_processors(controller, [hook, hook], [])
+        assert len(hook_sessions) == 2
+        for thread, session, facts in hook_sessions:
+            assert facts == []
+            assert thread is not threading.current_thread()
+            assert session is not command_session
+        # The command's session still works, on the command's thread.
+        assert controller.store.session.registry() is command_session
+        assert controller.facts.get_all() == []
+
+    def test_detached_worker_does_not_detach_again(
+        self, controller_with_logging, mocker,
+    ):
+        controller = controller_with_logging
+        controller.configfile_path = None
+        controller.config_keyvals = ['hooks.detached=True', 'log.level=debug']
+        popen = mocker.patch.object(post_processor.subprocess, 'Popen')
+        popen.return_value.pid = 1234
+        fact = mocker.Mock(pk=7)
+
+        assert detach_post_processors(controller, [fact])
+        argv = popen.call_args[0][0]
+        keyvals = [argv[idx + 1] for idx, arg in enumerate(argv) if arg == '-C']
+        assert keyvals == ['log.level=debug', 'hooks.detached=False']
+        assert argv[-2:] == ['post-process', '7']
@@ -26,10 +26,15 @@ Fixtures available to the tests/.
   ``_parametrized`` to imply it has increased complexity.
 """
 
+import io
+import sqlite3
+
 import pytest
 
 from dob_bright.crud.fact_dressed import FactDressed
 
+from dob.facts.import_facts import import_facts
+
 # We leave this conftest out of pytest_plugins, otherwise its
 # test_fact_cls fixture is not overridden by the one below.
 # (lb): I tested a workaround, putting the test_fact_cls below in
@@ -69,6 +74,37 @@ def test_fact_cls_ro():
     return FactDressed
 
 
+# ***
+
+@pytest.fixture
+def import_factoids(controller_with_logging):
+    """Returns a function that imports the Factoids text straight into the store."""
+    def _import_factoids(factoids, **kwargs):
+        return import_facts(
+            controller_with_logging,
+            file_in=io.StringIO(factoids),
+            use_carousel=False,
+            backup=False,
+            **kwargs
+        )
+    return _import_factoids
+
+
+@pytest.fixture
+def stand_in_db_path(tmpdir):
+    """Returns the path to a SQLite file with a facts table of two rows.
+
+    The test store is in memory, so this stands in for a store file.
+    """
+    db_path = tmpdir.join('stand-in.sqlite').strpath
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute('CREATE TABLE facts (id INTEGER PRIMARY KEY)')
+        conn.execute('INSERT INTO facts (id) VALUES (1), (2)')
+    conn.close()
+    return db_path
+
+
 # ***
 
 # (lb): Possible scope values: function, class, module, package or session.
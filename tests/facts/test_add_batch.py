@@ -0,0 +1,58 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import io
+import json
+
+from dob.facts.add_batch import add_facts_batch
+
+
+class TestAddFactsBatch(object):
+    """Tests for adding many Facts from one stream of Factoids."""
+
+    def test_add_facts_batch(self, controller_with_logging, capsys):
+        controller = controller_with_logging
+        input_stream = io.StringIO(
+            'from 2015-12-25 10:00 to 2015-12-25 11:00 foo@bar: #baz: first\n'
+            '\n'
+            '# A comment.\n'
+            'bogus 2015-12-25 11:00 foo@bar\n'
+            'from 2015-12-25 13:00 to 2015-12-25 12:00 foo@bar\n'
+            'at: 2015-12-25 11:30 qux@bar: second\n'
+        )
+        saved_facts = add_facts_batch(controller, input_stream)
+        assert len(saved_facts) == 2
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [result['line'] for result in results] == [1, 4, 5, 6]
+        assert results[0]['facts'][0]['start'] == '2015-12-25 10:00:00'
+        assert 'bogus' in results[1]['error']
+        assert results[2]['error']
+        assert results[3]['facts'][0]['end'] is None
+
+        facts = controller.facts.get_all()
+        assert [fact.description for fact in facts] == ['first', 'second']
+
+    def test_add_facts_batch_null_separated(self, controller_with_logging, capsys):
+        controller = controller_with_logging
+        input_stream = io.StringIO(
+            'from 2015-12-25 10:00 to 2015-12-25 11:00 foo@bar: two\nlines\0'
+            'from 2015-12-25 11:00 to 2015-12-25 12:00 foo@bar: one line\0'
+        )
+        add_facts_batch(controller, input_stream, null=True)
+        facts = controller.facts.get_all()
+        assert [fact.description for fact in facts] == ['two\nlines', 'one line']
@@ -16,6 +16,7 @@
 # or visit <http://www.gnu.org/licenses/>.
 
 import datetime
+import time
 
 from freezegun import freeze_time
 import pytest
@@ -218,3 +219,30 @@ class TestStop(object):
                 use_carousel=False,
             )
 
+
+# ***
+
+class TestAddFactLatency(object):
+    """Latency budget for the non-interactive add-fact fast path."""
+
+    # The budget for one `dob at/now/start/stop/...` once the modules are
+    # loaded, i.e., parsing the factoid, mending times, and saving.
+    LATENCY_BUDGET_SECS = 0.1
+
+    def test_add_fact_within_latency_budget(self, controller_with_logging):
+        controller = controller_with_logging
+        timings = []
+        for hour in range(10, 16):
+            started_at = time.monotonic()
+            add_fact(
+                controller,
+                '2015-12-25 {0}:00 to 2015-12-25 {0}:30: foo@bar: #baz: hour {0}'
+                .format(hour),
+                time_hint='verify_both',
+                use_carousel=False,
+            )
+            timings.append(time.monotonic() - started_at)
+        assert len(controller.facts.get_all()) == 6
+        # Ignore the first add, which warms up the store (and lazy loads).
+        timings = sorted(timings[1:])
+        assert timings[len(timings) // 2] < self.LATENCY_BUDGET_SECS
@@ -0,0 +1,125 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import datetime
+import json
+
+from dob_bright.crud.fact_dressed import FactDressed
+
+from dob.facts import save_confirmer
+from dob.facts.edit_journal import (
+    EditJournal,
+    is_journal_header,
+    journal_as_factoids,
+    replay_journal
+)
+from dob.facts.import_facts import import_facts
+
+
+def _read_journal(path):
+    with open(path, 'r') as journal_f:
+        lines = journal_f.readlines()
+    assert is_journal_header(lines[0])
+    return lines[1:]
+
+
+def _new_facts(fact_factory, *pks):
+    facts = []
+    for idx, pk in enumerate(pks):
+        fact = fact_factory()
+        start = datetime.datetime(2015, 12, 10, 12 + idx, 30)
+        facts.append(FactDressed(
+            fact.activity,
+            start,
+            start + datetime.timedelta(minutes=15),
+            pk=pk,
+            description=fact.description,
+            tags=fact.tags,
+        ))
+    return facts
+
+
+class TestEditJournal(object):
+    """Tests for the append-only backup journal."""
+
+    def test_record_appends_only_changed_facts(self, fact_factory, tmpdir):
+        facts = _new_facts(fact_factory, -1, -2)
+        journal = EditJournal(open(str(tmpdir.join('journal')), 'w'))
+        journal.record(facts)
+        journal.record(facts)
+        assert journal.n_records == 2
+
+        edited = facts[1].copy()
+        edited.description = 'edited'
+        journal.record([facts[0], edited])
+        assert journal.n_records == 3
+        journal.close(compact=False)
+
+        records = [json.loads(line) for line in _read_journal(journal.name)]
+        assert [(rec['pk'], rec['ver']) for rec in records] == [
+            (-1, 1), (-2, 1), (-2, 2),
+        ]
+
+    def test_dropped_fact_and_compaction(self, fact_factory, tmpdir):
+        facts = _new_facts(fact_factory, -1, -2)
+        journal = EditJournal(open(str(tmpdir.join('journal')), 'w'))
+        journal.record(facts)
+        edited = facts[0].copy()
+        edited.description = 'edited'
+        journal.record([edited])
+        journal.close()
+
+        lines = _read_journal(journal.name)
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        assert (record['pk'], record['ver']) == (-1, 2)
+
+    def test_replay_rebuilds_latest_facts(self, fact_factory, tmpdir):
+        facts = _new_facts(fact_factory, -1, -2)
+        journal = EditJournal(open(str(tmpdir.join('journal')), 'w'))
+        journal.record(facts)
+        edited = facts[1].copy()
+        edited.description = 'edited'
+        journal.record([facts[0], edited])
+        journal.close(compact=False)
+
+        lines = _read_journal(journal.name)
+        # Simulate a crash mid-write.
+        lines.append('{"pk": -1, "ver": 9, "fac')
+        records = replay_journal(lines)
+        assert sorted(record['pk'] for record in records) == [-2, -1]
+        assert [
+            record['ver'] for record in records if record['pk'] == -2
+        ] == [2]
+
+        factoids = journal_as_factoids(records).read()
+        assert 'edited' in factoids
+
+    def test_import_recovers_from_journal(
+        self, controller_with_logging, fact_factory, tmpdir, mocker,
+    ):
+        facts = _new_facts(fact_factory, -1, -2)
+        journal = EditJournal(open(str(tmpdir.join('journal')), 'w'))
+        journal.record(facts)
+        journal.close()
+
+        confirmer = mocker.patch.object(save_confirmer, 'prompt_and_save_confirmer')
+        with open(journal.name, 'r') as journal_f:
+            import_facts(controller_with_logging, file_in=journal_f, backup=False)
+        edit_facts = confirmer.call_args[1]['edit_facts']
+        assert len(edit_facts) == 2
+        assert edit_facts[0].start == facts[0].start
@@ -0,0 +1,86 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+from dob.facts.echo_fact import echo_fact_history
+from dob.store.compact import compact_store
+from dob.store.lineage import (
+    LINEAGE_TABLE,
+    ensure_lineage_index,
+    fact_versions,
+    lineage_index_exists
+)
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+"""
+
+
+class TestFactLineage(object):
+    """Tests for the lineage index, and the Fact history it answers."""
+
+    def edit_description(self, controller, pk, description):
+        fact = controller.facts.get(pk)
+        fact.description = description
+        return controller.facts.save(fact)
+
+    def version_pks(self, controller, key):
+        return [fact.pk for fact in fact_versions(controller, key)]
+
+    def test_versions_with_and_without_index(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.edit_description(controller, 1, 'first, edited')
+        self.edit_description(controller, 3, 'first, edited again')
+        # Without the index, the chain of split_from_ids is walked.
+        assert not lineage_index_exists(controller)
+        assert self.version_pks(controller, 1) == [1, 3, 4]
+        assert self.version_pks(controller, 4) == [1, 3, 4]
+        assert self.version_pks(controller, 2) == [2]
+        assert self.version_pks(controller, 99) == []
+        # The index is filled from the existing chains.
+        assert ensure_lineage_index(controller)
+        assert not ensure_lineage_index(controller)
+        assert controller.store.session.execute(
+            'SELECT fact_id, origin_id FROM {} ORDER BY fact_id'.format(LINEAGE_TABLE)
+        ).fetchall() == [(1, 1), (2, 2), (3, 1), (4, 1)]
+        assert self.version_pks(controller, 3) == [1, 3, 4]
+        # And the triggers keep it up to date.
+        self.edit_description(controller, 4, 'first, edited thrice')
+        assert self.version_pks(controller, 1) == [1, 3, 4, 5]
+        # Compacting removes the old versions, but the latest keeps its origin.
+        compact_store(controller, keep_history=0, discard=True)
+        assert self.version_pks(controller, 5) == [5]
+        self.edit_description(controller, 5, 'first, edited at last')
+        assert self.version_pks(controller, 5) == [5, 6]
+
+    def test_echo_fact_history(
+        self, controller_with_logging, import_factoids, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        ensure_lineage_index(controller)
+        self.edit_description(controller, 1, 'first, edited')
+        capsys.readouterr()
+        echo_fact_history(controller, 3)
+        out = capsys.readouterr().out
+        assert 'Version 1 (key 1), edited' in out
+        assert 'Version 2 (key 3)\n' in out
+        assert out.index('first') < out.index('first, edited')
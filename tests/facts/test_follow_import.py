@@ -0,0 +1,135 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from dob.facts import follow_import
+from dob.helpers import file_watch
+
+
+@pytest.fixture
+def follow_path(tmpdir, mocker):
+    cache_dir = tmpdir.mkdir('cache').strpath
+    mocker.patch.object(follow_import, 'AppDirs', user_cache_dir=cache_dir)
+    # Use the polling watcher, whether or not inotify_simple is installed.
+    mocker.patch.object(file_watch, 'inotify_simple', None)
+    path = tmpdir.join('follow.facts')
+    path.write('')
+    return path
+
+
+def _follower(controller, follow_path):
+    return follow_import.FollowImport(
+        controller, follow_path.strpath, settle_secs=0.1, poll_secs=0.01,
+    )
+
+
+class TestFollowImport(object):
+    """Tests for import --follow."""
+
+    def test_follow_saves_complete_factoids(
+        self, controller_with_logging, follow_path,
+    ):
+        controller = controller_with_logging
+        follower = _follower(controller, follow_path)
+        follow_path.write(
+            '2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first\n'
+            '\n'
+            '2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second\n',
+        )
+        # The second Factoid is not complete until the file stops changing.
+        assert follower.watcher.wait(0.1)
+        saved = follower.catch_up(settled=False)
+        assert [fact.description for fact in saved] == ['first']
+
+        # An unfinished line is ignored, even once settled.
+        follow_path.write(
+            '\n2015-12-10 13:00 to 2015-12-10 13:30: foo@bar: thi', mode='a',
+        )
+        assert follower.watcher.wait(0.1)
+        saved = follower.catch_up(settled=True)
+        assert [fact.description for fact in saved] == ['second']
+
+        follow_path.write('rd\n', mode='a')
+        assert follower.watcher.wait(0.1)
+        saved = follower.catch_up(settled=True)
+        assert [fact.description for fact in saved] == ['third']
+        follower.close()
+
+        descriptions = [fact.description for fact in controller.facts.get_all()]
+        assert descriptions == ['first', 'second', 'third']
+
+    def test_follow_resumes_from_saved_offset(
+        self, controller_with_logging, follow_path,
+    ):
+        controller = controller_with_logging
+        follow_path.write('2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first\n')
+        follower = _follower(controller, follow_path)
+        follower.catch_up()
+        follower.close()
+
+        follow_path.write(
+            '\n2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second\n', mode='a',
+        )
+        follower = _follower(controller, follow_path)
+        assert follower.offset.offset > 0
+        saved = follower.catch_up()
+        follower.close()
+        assert [fact.description for fact in saved] == ['second']
+        assert len(controller.facts.get_all()) == 2
+
+    def test_follow_skips_factoid_it_cannot_save(
+        self, controller_with_logging, follow_path,
+    ):
+        controller = controller_with_logging
+        follow_path.write(
+            '2015-12-10 12:00 to 2015-12-10 11:00: foo@bar: backwards\n'
+            '\n'
+            '2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second\n',
+        )
+        follower = _follower(controller, follow_path)
+        saved = follower.catch_up()
+        follower.close()
+        assert [fact.description for fact in saved] == ['second']
+        assert follower.offset.offset == follow_path.size()
+
+        # The next run does not try the bad Factoid again.
+        follower = _follower(controller, follow_path)
+        assert follower.catch_up() == []
+        follower.close()
+        assert len(controller.facts.get_all()) == 1
+
+    def test_follow_skips_conflict_without_prompting(
+        self, controller_with_logging, follow_path, mocker,
+    ):
+        controller = controller_with_logging
+        confirm = mocker.patch('click_hotoffthehamster.confirm')
+        follow_path.write(
+            '2015-12-10 12:00 to 2015-12-10 13:00: foo@bar: first\n'
+            '\n'
+            '2015-12-10 12:30 to 2015-12-10 13:30: foo@bar: overlaps\n'
+            '\n'
+            '2015-12-10 14:00 to 2015-12-10 14:30: foo@bar: third\n',
+        )
+        follower = _follower(controller, follow_path)
+        saved = follower.catch_up()
+        follower.close()
+        assert not confirm.called
+        assert [fact.description for fact in saved] == ['first', 'third']
+        descriptions = [fact.description for fact in controller.facts.get_all()]
+        assert descriptions == ['first', 'third']
+        assert follower.offset.offset == follow_path.size()
@@ -0,0 +1,110 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+from nark.managers.query_terms import QueryTerms
+
+from dob.store.fts_index import ensure_fts_index, fact_search_index, fts_index_exists
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: zoo@outing: #fun: quokka dance
+
+2015-12-10 12:30 to 2015-12-10 13:00: zoo@outing: quokka quokka quokka
+
+2015-12-10 13:00 to 2015-12-10 13:30: desk@work: writing quarterly report
+"""
+
+
+class TestFactSearchIndex(object):
+    """Tests for matching search terms using the full-text index."""
+
+    def search(self, controller, *search_terms, fts_query=False, **kwargs):
+        qt = QueryTerms(search_terms=list(search_terms), **kwargs)
+        with fact_search_index(controller, qt, fts_query=fts_query):
+            results = controller.facts.get_all(query_terms=qt)
+        return [fact.description for fact in results]
+
+    def test_search_uses_index_and_fts_syntax(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        assert ensure_fts_index(controller)
+        assert fts_index_exists(controller)
+        # And it's only created once.
+        assert not ensure_fts_index(controller)
+        assert self.search(
+            controller, 'quarterly AND report', fts_query=True,
+        ) == ['writing quarterly report']
+        assert self.search(
+            controller, '"quokka dance"', fts_query=True,
+        ) == ['quokka dance']
+        # The names are only matched when broad.
+        assert self.search(controller, 'fun', fts_query=True) == []
+        assert self.search(
+            controller, 'fun', broad_match=True, fts_query=True,
+        ) == ['quokka dance']
+        # The best match sorts first, unless reversed.
+        best = self.search(controller, 'quokka', sort_cols=['rank'], fts_query=True)
+        assert best == ['quokka quokka quokka', 'quokka dance']
+        worst = self.search(
+            controller, 'quokka', sort_cols=['rank'], sort_orders=['desc'],
+            fts_query=True,
+        )
+        assert worst == list(reversed(best))
+
+    def test_search_terms_match_parts_of_words(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        ensure_fts_index(controller)
+        # Matches the same Facts as LIKE, with or without the index.
+        for term, expect in (
+            ('arterl', ['writing quarterly report']),
+            ('QUOKKA D', ['quokka dance']),
+            ('ka', ['quokka dance', 'quokka quokka quokka']),
+            ('quar*', []),
+        ):
+            assert self.search(controller, term, sort_cols=['start']) == expect
+        assert self.search(controller, 'dance', 'report', sort_cols=['start']) == [
+            'quokka dance', 'writing quarterly report',
+        ]
+        # A broad match matches parts of the Activity, Category and Tag names.
+        assert self.search(controller, 'un', broad_match=True) == ['quokka dance']
+        assert self.search(controller, 'uti', broad_match=True, sort_cols=['start']) == [
+            'quokka dance', 'quokka quokka quokka',
+        ]
+        assert self.search(controller, 'or', broad_match=True) == [
+            'writing quarterly report',
+        ]
+
+    def test_triggers_sync_index_and_like_fallback(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        # Without the index, terms are matched with LIKE, as before.
+        import_factoids(IMPORT_FACTOIDS)
+        assert self.search(controller, 'dance') == ['quokka dance']
+        ensure_fts_index(controller)
+        controller.store.session.commit()
+        fact = controller.facts.get(1)
+        fact.description = 'quokka: tango'
+        controller.facts.save(fact)
+        assert self.search(controller, 'dance') == []
+        assert self.search(controller, 'tango') == ['quokka: tango']
+        # Invalid FTS5 syntax (no such column) falls back to LIKE, rather than fail.
+        assert self.search(controller, 'ka: tan') == ['quokka: tango']
@@ -0,0 +1,73 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from dob.store import head_record
+from dob.store.head_record import HeadRecord
+
+
+@pytest.fixture
+def change_stamp(controller_with_logging, tmpdir, stand_in_db_path, mocker):
+    cache_dir = tmpdir.mkdir('cache').strpath
+    mocker.patch.object(head_record, 'AppDirs', user_cache_dir=cache_dir)
+    # Fake the stand-in file's stamp.
+    mocker.patch.object(head_record, 'sqlite_db_path', return_value=stand_in_db_path)
+    change_stamp = [1]
+    mocker.patch.object(
+        head_record, 'db_change_stamp', side_effect=lambda path: list(change_stamp),
+    )
+    return change_stamp
+
+
+class TestHeadRecord(object):
+    """Tests for the record of the ongoing and latest Facts."""
+
+    def test_lookup_recorded_until_store_changes(
+        self, controller_with_logging, change_stamp, fact_factory, mocker,
+    ):
+        controller = controller_with_logging
+        ongoing = fact_factory()
+        ongoing.end = None
+        ongoing = controller.facts.save(ongoing)
+        mocker.spy(controller.facts, 'find_latest_fact')
+
+        assert HeadRecord(controller).find_latest_fact().pk == ongoing.pk
+        assert controller.facts.find_latest_fact.call_count == 1
+        # The second lookup is a PK read.
+        assert HeadRecord(controller).find_latest_fact().pk == ongoing.pk
+        assert controller.facts.find_latest_fact.call_count == 1
+        # No ended Fact, which is recorded, too.
+        assert HeadRecord(controller).find_latest_fact(restrict='ended') is None
+        assert HeadRecord(controller).find_latest_fact(restrict='ended') is None
+        assert controller.facts.find_latest_fact.call_count == 2
+
+        change_stamp[0] += 1
+        assert HeadRecord(controller).find_latest_fact().pk == ongoing.pk
+        assert controller.facts.find_latest_fact.call_count == 3
+
+    def test_recorded_fact_is_verified(
+        self, controller_with_logging, change_stamp, fact_factory,
+    ):
+        controller = controller_with_logging
+        ongoing = fact_factory()
+        ongoing.end = None
+        ongoing = controller.facts.save(ongoing)
+        HeadRecord(controller).refresh()
+        # Sneak an edit past the (faked) change stamp.
+        controller.facts.remove(ongoing)
+        assert HeadRecord(controller).find_latest_fact(restrict='ongoing') is None
@@ -0,0 +1,118 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import json
+import os
+
+import pytest
+
+from dob.facts import import_checkpoint, save_confirmer
+from dob.facts import import_facts as import_facts_module
+from dob.facts.import_facts import import_facts
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+
+2015-12-10 13:00 to 2015-12-10 13:30: foo@bar: third
+"""
+
+
+@pytest.fixture
+def import_path(tmpdir, mocker):
+    cache_dir = tmpdir.mkdir('cache').strpath
+    mocker.patch.object(import_checkpoint, 'AppDirs', user_cache_dir=cache_dir)
+    path = tmpdir.join('import.facts')
+    path.write(IMPORT_FACTOIDS)
+    return path.strpath
+
+
+def _import_file(controller, import_path, use_carousel=False, **kwargs):
+    with open(import_path, 'r') as file_in:
+        return import_facts(
+            controller,
+            file_in=file_in,
+            use_carousel=use_carousel,
+            backup=False,
+            **kwargs
+        )
+
+
+class TestImportCheckpoint(object):
+    """Tests for import checkpointing and --resume."""
+
+    def test_checkpoint_removed_after_complete_import(
+        self, controller_with_logging, import_path,
+    ):
+        controller = controller_with_logging
+        _import_file(controller, import_path)
+        assert len(controller.facts.get_all()) == 3
+        checkpoint = import_checkpoint.ImportCheckpoint(import_path)
+        assert not os.path.exists(checkpoint.path)
+
+    def test_resume_after_interrupted_import(
+        self, controller_with_logging, import_path, mocker,
+    ):
+        controller = controller_with_logging
+        # Commit (and checkpoint) after each Fact.
+        mocker.patch.object(save_confirmer, 'CHECKPOINT_COMMIT_SIZE', 1)
+        save_fact = controller.facts.save
+        saves = []
+
+        def save_twice(*args, **kwargs):
+            if len(saves) == 2:
+                raise KeyboardInterrupt()
+            saves.append(True)
+            return save_fact(*args, **kwargs)
+
+        controller.facts.save = save_twice
+        with pytest.raises(SystemExit):
+            _import_file(controller, import_path)
+
+        checkpoint = import_checkpoint.ImportCheckpoint(import_path)
+        with open(checkpoint.path, 'r') as checkpoint_f:
+            saved = json.load(checkpoint_f)
+        assert saved['fact_index'] == 1
+        assert saved['byte_offset'] == IMPORT_FACTOIDS.index('\n2015-12-10 13:00') + 1
+
+        controller.facts.save = save_fact
+        _import_file(controller, import_path, resume=True)
+        descriptions = [fact.description for fact in controller.facts.get_all()]
+        assert descriptions == ['first', 'second', 'third']
+        assert not os.path.exists(checkpoint.path)
+
+    def test_carousel_import_not_checkpointed(
+        self, controller_with_logging, import_path, mocker,
+    ):
+        controller = controller_with_logging
+        save_backedup = mocker.patch.object(
+            import_facts_module, 'prompt_and_save_backedup', return_value=[],
+        )
+        _import_file(controller, import_path, use_carousel=True)
+        assert save_backedup.call_args[1]['checkpoint'] is None
+
+    def test_resume_rejected_with_carousel(
+        self, controller_with_logging, import_path, mocker,
+    ):
+        controller = controller_with_logging
+        save_backedup = mocker.patch.object(
+            import_facts_module, 'prompt_and_save_backedup', return_value=[],
+        )
+        with pytest.raises(SystemExit):
+            _import_file(controller, import_path, use_carousel=True, resume=True)
+        assert not save_backedup.called
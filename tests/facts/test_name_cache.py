@@ -0,0 +1,98 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import datetime
+
+from sqlalchemy import event
+
+from dob.store.name_cache import ItemNameCache, item_name_cache
+
+
+def _many_factoids(count):
+    factoids = []
+    for idx in range(count):
+        factoids.append(
+            '2015-12-10 {hour:02d}:00 to 2015-12-10 {hour:02d}:30:'
+            ' act{act}@cat{cat}: #tag{tag} #all: fact {idx}\n\n'.format(
+                hour=idx, act=idx % 3, cat=idx % 2, tag=idx % 4, idx=idx,
+            )
+        )
+    return ''.join(factoids)
+
+
+class TestItemNameCache(object):
+    """Tests for the per-operation item name cache."""
+
+    def test_import_resolves_names_in_bulk(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(
+            controller.store.session.get_bind(),
+            'before_cursor_execute',
+            record_statement,
+        )
+        import_factoids(_many_factoids(20))
+
+        name_lookups = [
+            statement for statement in statements
+            if (
+                'tags.name' in statement.split('WHERE')[-1]
+                or 'activities.name' in statement.split('WHERE')[-1]
+                or 'categories.name' in statement.split('WHERE')[-1]
+            )
+        ]
+        # One query per table, regardless of the number of Facts.
+        assert len(name_lookups) == 3
+
+        facts = controller.facts.get_all()
+        assert len(facts) == 20
+        assert facts[5].activity.name == 'act2'
+        assert facts[5].category.name == 'cat1'
+        assert sorted(tag.name for tag in facts[5].tags) == ['all', 'tag1']
+        assert len(controller.tags.get_all()) == 5
+
+    def test_nested_caches_are_shared(self, controller_with_logging, fact_factory):
+        controller = controller_with_logging
+        with item_name_cache(controller, []) as outer_cache:
+            assert isinstance(outer_cache, ItemNameCache)
+            with item_name_cache(controller, [fact_factory()]) as inner_cache:
+                assert inner_cache is outer_cache
+                assert len(outer_cache.activities) == 1
+        # The store's own lookup methods are restored.
+        assert 'get_or_create' not in vars(controller.store.activities)
+        assert 'get_or_create' not in vars(controller.store.tags)
+
+    def test_split_fact_gets_new_pk(self, controller_with_logging, fact_factory):
+        controller = controller_with_logging
+        ongoing = fact_factory()
+        ongoing.end = None
+        fact = controller.facts.save(ongoing)
+        edited = fact.copy()
+        edited.activity = fact_factory().activity
+        edited.end = fact.start + datetime.timedelta(hours=1)
+        with item_name_cache(controller, [edited]):
+            # Editing more than the end time splits the Fact, which adds
+            # the new Fact without committing, and expects it has a PK.
+            new_fact = controller.facts.save(edited)
+        assert new_fact.pk > fact.pk
+        assert new_fact.activity.name == edited.activity.name
@@ -0,0 +1,113 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from dob import cmds_list
+from dob.complete import choices_tags
+from dob.store.name_index import (
+    ensure_name_indexes,
+    missing_name_indexes,
+    names_starting_with
+)
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: meeting@work: #planning #animals: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: lunch@home: #animation: second
+
+2015-12-10 13:00 to 2015-12-10 13:30: walk@home: #dog: third
+"""
+
+
+class TestNameIndex(object):
+    """Tests for matching item names using the trigram index."""
+
+    def list_names(self, controller, capsys, list_items, *search_terms, **kwargs):
+        list_items(controller, output_format='csv', search_terms=list(search_terms),
+                   **kwargs)
+        return capsys.readouterr().out.splitlines()[1:]
+
+    def test_substring_and_fuzzy_search(
+        self, controller_with_logging, import_factoids, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        capsys.readouterr()
+        list_tags = cmds_list.tag.list_tags
+        # The search works the same, whether the names are indexed or not.
+        for indexed in (False, True):
+            if indexed:
+                assert len(ensure_name_indexes(controller)) == 3
+                assert missing_name_indexes(controller) == []
+            assert self.list_names(controller, capsys, list_tags, 'anim') == [
+                'animals', 'animation',
+            ]
+            # A misspelling only matches when fuzzy.
+            with pytest.raises(SystemExit):
+                self.list_names(controller, capsys, list_tags, 'anmals')
+            assert 'No tags were found' in capsys.readouterr().err
+            assert self.list_names(
+                controller, capsys, list_tags, 'anmals', fuzzy=True,
+            ) == ['animals']
+        list_activities = cmds_list.activity.list_activities
+        assert self.list_names(
+            controller, capsys, list_activities, 'meating', fuzzy=True,
+        ) == ['meeting,work']
+        # The fuzzy matches' TEMP table is dropped after the query.
+        assert not controller.store.session.execute(
+            "SELECT 1 FROM sqlite_temp_master WHERE name = 'dob_fuzzy_match_ids'"
+        ).scalar()
+
+    def test_index_follows_renames_and_serves_completion(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        # Without the index, completion uses its usual, recent tags.
+        assert names_starting_with(controller, 'tags', 'an') is None
+        assert set(choices_tags(controller, '@an')) == {'@animals', '@animation'}
+        ensure_name_indexes(controller)
+        controller.store.session.commit()
+        tag = controller.tags.get_by_name('dog')
+        tag.name = 'animal-dog'
+        controller.tags.save(tag)
+        assert names_starting_with(controller, 'tags', 'an') == [
+            'animal-dog', 'animals', 'animation',
+        ]
+        assert choices_tags(controller, '@anima') == [
+            '@animal-dog', '@animals', '@animation',
+        ]
+
+    def test_completion_escapes_wildcards_and_skips_hidden(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        ensure_name_indexes(controller)
+        controller.store.session.commit()
+        tag = controller.tags.get_by_name('dog')
+        tag.name = 'an_imal'
+        controller.tags.save(tag)
+        # The prefix's wildcards are matched as themselves.
+        assert names_starting_with(controller, 'tags', 'an_') == ['an_imal']
+        assert names_starting_with(controller, 'tags', 'an%') == []
+        # Hidden (and deleted) names are not suggested.
+        controller.store.session.execute(
+            "UPDATE tags SET hidden = 1 WHERE name = 'animals'"
+        )
+        assert names_starting_with(controller, 'tags', 'ani') == ['animation']
@@ -0,0 +1,101 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+from dob.facts.skip_existing import skip_existing_factoids
+from dob.store.content_hash import (
+    fact_hash_table_exists,
+    hash_fact,
+    update_fact_hashes,
+)
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: #baz: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+with more description.
+"""
+
+MORE_FACTOIDS = """
+2015-12-10 13:00 to 2015-12-10 13:30: foo@bar: third
+"""
+
+
+class TestSkipExisting(object):
+    """Tests for the content hash index and dob import --skip-existing."""
+
+    def test_stored_hashes_match_imported_facts(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        assert update_fact_hashes(controller) == 2
+        # Already hashed.
+        assert update_fact_hashes(controller) == 0
+
+        lines = IMPORT_FACTOIDS.splitlines(keepends=True)
+        filtered, n_skipped, n_kept = skip_existing_factoids(controller, lines)
+        assert (n_skipped, n_kept) == (2, 0)
+        # Line numbers are preserved.
+        assert len(filtered) == len(lines)
+        assert not ''.join(filtered).strip()
+
+        stored_hashes = [hash_fact(fact) for fact in controller.facts.get_all()]
+        assert len(set(stored_hashes)) == 2
+
+    def test_reimport_skips_existing(self, controller_with_logging, import_factoids):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        import_factoids(IMPORT_FACTOIDS + MORE_FACTOIDS, skip_existing=True)
+        descriptions = [fact.description for fact in controller.facts.get_all()]
+        assert descriptions == [
+            'first', 'second\nwith more description.', 'third',
+        ]
+
+    def test_edited_fact_is_not_existing(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        update_fact_hashes(controller)
+        fact = controller.facts.get_all()[0]
+        fact.description = 'edited'
+        controller.facts.save(fact)
+
+        lines = IMPORT_FACTOIDS.splitlines(keepends=True)
+        _filtered, n_skipped, n_kept = skip_existing_factoids(controller, lines)
+        assert (n_skipped, n_kept) == (1, 1)
+
+    def test_dry_run_does_not_save_hashes(
+        self, controller_with_logging, import_factoids, mocker,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        mocker.spy(controller.store.session, 'commit')
+        lines = (IMPORT_FACTOIDS + MORE_FACTOIDS).splitlines(keepends=True)
+        _filtered, n_skipped, n_kept = skip_existing_factoids(
+            controller, lines, dry=True,
+        )
+        assert (n_skipped, n_kept) == (2, 1)
+        assert not controller.store.session.commit.called
+        assert not fact_hash_table_exists(controller)
+
+        # Once hashed for real, a dry run also finds the saved hashes.
+        assert update_fact_hashes(controller) == 2
+        _filtered, n_skipped, n_kept = skip_existing_factoids(
+            controller, lines, dry=True,
+        )
+        assert (n_skipped, n_kept) == (2, 1)
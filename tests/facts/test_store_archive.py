@@ -0,0 +1,170 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+import pytest
+
+from nark.managers.query_terms import QueryTerms
+
+from dob.store.archive import archive_store
+from dob.store.store_union import (
+    archive_state,
+    get_fact,
+    store_union,
+    store_union_active
+)
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: #fun: old
+
+2016-06-10 12:00 to 2016-06-10 12:30: foo@bar: #fun: middle
+
+2017-01-10 12:00 to 2017-01-10 12:30: foo@bar: #fun: recent
+"""
+
+
+class TestStoreArchive(object):
+    """Tests for `dob store archive`, and the queries that union the archive."""
+
+    def archive(self, controller, tmpdir, before='2017-01-01'):
+        archive_db = tmpdir.join('archive.sqlite').strpath
+        archive_store(controller, before=before, archive_db=archive_db)
+        return archive_db
+
+    def descriptions(self, controller, **kwargs):
+        qt = QueryTerms(sort_cols=['start'], **kwargs)
+        with store_union(controller, qt):
+            return [fact.description for fact in controller.facts.get_all(qt)]
+
+    def test_archive_moves_old_facts(
+        self, controller_with_logging, import_factoids, tmpdir, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        archive_db = self.archive(controller, tmpdir)
+        assert 'Moved 2 Facts' in capsys.readouterr().out
+        assert controller.store.session.execute(
+            'SELECT description FROM facts'
+        ).fetchall() == [('recent',)]
+        archive = sqlite3.connect(archive_db)
+        assert archive.execute(
+            'SELECT description FROM facts ORDER BY id'
+        ).fetchall() == [('old',), ('middle',)]
+        assert archive.execute('SELECT COUNT(*) FROM fact_tags').fetchone() == (2,)
+        archive.close()
+        path, archived_before = archive_state(controller)
+        assert path == archive_db
+        assert archived_before.isoformat() == '2017-01-01T00:00:00'
+
+    def test_queries_union_the_archive_when_they_reach_it(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.archive(controller, tmpdir)
+        assert self.descriptions(controller) == ['old', 'middle', 'recent']
+        assert self.descriptions(controller, since='2016-01-01') == [
+            'middle', 'recent',
+        ]
+        # A query that starts after the archived date leaves the archive be.
+        qt = QueryTerms(since='2017-01-05')
+        with store_union(controller, qt):
+            assert not store_union_active(controller)
+            assert len(controller.facts.get_all(qt)) == 1
+        assert not store_union_active(controller)
+        # The usage counts include the archived Facts.
+        qt = QueryTerms()
+        with store_union(controller, qt):
+            usage = controller.tags.get_all_by_usage(query_terms=qt)
+        assert [(tag.name, count) for tag, count, _span in usage] == [('fun', 3)]
+
+    def test_archive_again_keeps_the_archive_path(
+        self, controller_with_logging, import_factoids, tmpdir, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        archive_db = self.archive(controller, tmpdir, before='2016-01-01')
+        assert 'Moved 1 Facts' in capsys.readouterr().out
+        archive_store(controller, before='2017-01-01')
+        assert 'Moved 1 Facts' in capsys.readouterr().out
+        assert archive_state(controller)[0] == archive_db
+        assert self.descriptions(controller) == ['old', 'middle', 'recent']
+        with pytest.raises(SystemExit):
+            archive_store(
+                controller,
+                before='2017-02-01',
+                archive_db=tmpdir.join('other.sqlite').strpath,
+            )
+
+    def test_new_facts_never_reuse_archived_ids(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        # Archive every Fact, including the one with the highest ID.
+        import_factoids(IMPORT_FACTOIDS)
+        archive_db = self.archive(controller, tmpdir, before='2018-01-01')
+        import_factoids(
+            '2018-03-01 12:00 to 2018-03-01 12:30: baz@bar: new\n'
+            '\n'
+            '2018-03-01 12:30 to 2018-03-01 13:00: baz@bar: newer\n'
+        )
+        archive = sqlite3.connect(archive_db)
+        archived_ids = [row[0] for row in archive.execute('SELECT id FROM facts')]
+        archive.close()
+        new_ids = [row[0] for row in controller.store.session.execute(
+            'SELECT id FROM facts ORDER BY id'
+        )]
+        assert new_ids == [max(archived_ids) + 1, max(archived_ids) + 2]
+        assert self.descriptions(controller, since='2000-01-01') == [
+            'old', 'middle', 'recent', 'new', 'newer',
+        ]
+        # nark's facts table is left as it is.
+        table_sql = controller.store.session.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'facts'"
+        ).scalar()
+        assert 'AUTOINCREMENT' not in table_sql
+        qt = QueryTerms()
+        with store_union(controller, qt):
+            usage = controller.tags.get_all_by_usage(query_terms=qt)
+        assert [(tag.name, count) for tag, count, _span in usage] == [('fun', 3)]
+
+    def test_saving_over_archived_facts_is_refused(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.archive(controller, tmpdir)
+        with pytest.raises(SystemExit):
+            import_factoids('2015-12-10 12:10 to 2015-12-10 12:20: foo@bar: over\n')
+        assert self.descriptions(controller, since='2000-01-01') == [
+            'old', 'middle', 'recent',
+        ]
+
+    def test_archived_fact_found_by_key(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.archive(controller, tmpdir)
+        with pytest.raises(KeyError):
+            controller.facts.get(1)
+        assert get_fact(controller, 1).description == 'old'
+        assert get_fact(controller, 3).description == 'recent'
+        assert not store_union_active(controller)
+        with pytest.raises(KeyError):
+            get_fact(controller, 4)
@@ -0,0 +1,91 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+from dob.store.compact import HISTORY_SUCCESSORS_TABLE, compact_store
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: #fun: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+"""
+
+
+class TestStoreCompact(object):
+    """Tests for `dob store compact`."""
+
+    def edit_and_remove(self, controller):
+        # Edit the first Fact twice, which leaves two deleted versions,
+        # and remove the second Fact, which leaves one more.
+        fact = controller.facts.get(1)
+        fact.description = 'first, edited'
+        fact = controller.facts.save(fact)
+        fact.description = 'first, edited again'
+        fact = controller.facts.save(fact)
+        controller.facts.remove(controller.facts.get(2))
+        return fact
+
+    def facts_rows(self, controller):
+        return controller.store.session.execute(
+            'SELECT id, deleted, split_from_id FROM facts ORDER BY id'
+        ).fetchall()
+
+    def test_compact_moves_versions_to_history(
+        self, controller_with_logging, import_factoids, tmpdir, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        live_fact = self.edit_and_remove(controller)
+        assert live_fact.pk == 4
+        assert len(self.facts_rows(controller)) == 4
+        history_db = tmpdir.join('history.sqlite').strpath
+        compact_store(controller, keep_history=30, history_db=history_db)
+        out = capsys.readouterr().out
+        assert 'Moved 3 deleted Fact versions' in out
+        assert 'Unlinked 1 Facts' in out
+        # Only the live Fact is left, unlinked from the version before it.
+        assert [tuple(row) for row in self.facts_rows(controller)] == [(4, 0, None)]
+        assert controller.facts.get(4).tags[0].name == 'fun'
+        history = sqlite3.connect(history_db)
+        assert history.execute(
+            'SELECT id, split_from_id, description FROM facts ORDER BY id'
+        ).fetchall() == [
+            (1, None, 'first'),
+            (2, None, 'second'),
+            (3, 1, 'first, edited'),
+        ]
+        assert history.execute(
+            'SELECT fact_id, successor_id FROM {}'.format(HISTORY_SUCCESSORS_TABLE)
+        ).fetchall() == [(3, 4)]
+        assert history.execute('SELECT COUNT(*) FROM fact_tags').fetchone() == (2,)
+        assert history.execute('SELECT name FROM activities').fetchall() == [('foo',)]
+        history.close()
+
+    def test_compact_keeps_recent_history_or_discards(
+        self, controller_with_logging, import_factoids, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.edit_and_remove(controller)
+        # The Facts are from 2015, so a long enough history keeps them all.
+        compact_store(controller, keep_history=365 * 100, discard=True)
+        assert 'No deleted Fact versions' in capsys.readouterr().out
+        assert len(self.facts_rows(controller)) == 4
+        compact_store(controller, keep_history=0, discard=True)
+        assert 'Discarded 3 deleted Fact versions.' in capsys.readouterr().out
+        assert [tuple(row) for row in self.facts_rows(controller)] == [(4, 0, None)]
@@ -0,0 +1,122 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+import pytest
+
+from nark.managers.query_terms import QueryTerms
+
+from dob.store.federation import store_names_federated
+from dob.store.store_union import store_union, store_union_active
+
+IMPORT_FACTOIDS = """\
+2016-01-10 12:00 to 2016-01-10 12:30: foo@bar: #fun: here
+
+2016-01-11 12:00 to 2016-01-11 12:30: baz@bar: also here
+"""
+
+# Another machine's store, whose IDs overlap the store's, with some of the
+# same names (foo@bar and #fun) and some new ones (other@qux and #work).
+OTHER_STORE_ROWS = (
+    "INSERT INTO categories VALUES (1, 'qux', 0, 0), (2, 'bar', 0, 0)",
+    "INSERT INTO activities VALUES (1, 'other', 0, 0, 1), (2, 'foo', 0, 0, 2)",
+    "INSERT INTO tags VALUES (1, 'work', 0, 0), (2, 'fun', 0, 0)",
+    "INSERT INTO facts VALUES"
+    " (1, 0, NULL, '2016-01-05 12:00:00', '2016-01-05 12:30:00', 2, 'there'),"
+    " (2, 0, NULL, '2016-02-05 12:00:00', '2016-02-05 12:30:00', 1, 'also there')",
+    "INSERT INTO fact_tags VALUES (1, 2), (2, 1)",
+)
+
+
+class TestStoreFederation(object):
+    """Tests for the --store option, which includes the Facts of other stores."""
+
+    def make_other_store(self, controller, tmpdir):
+        other_db = tmpdir.join('other.sqlite').strpath
+        schema = controller.store.session.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table'"
+            " AND name IN ('categories', 'activities', 'tags', 'facts', 'fact_tags')"
+        ).fetchall()
+        other = sqlite3.connect(other_db)
+        for create_sql, in schema:
+            other.execute(create_sql)
+        for insert_sql in OTHER_STORE_ROWS:
+            other.execute(insert_sql)
+        other.commit()
+        other.close()
+        return other_db
+
+    def test_facts_include_other_stores(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        other_db = self.make_other_store(controller, tmpdir)
+        qt = QueryTerms(sort_cols=['start'])
+        with store_union(controller, qt, stores=[other_db]):
+            assert store_names_federated(controller)
+            facts = controller.facts.get_all(qt)
+            assert [
+                (fact.description, fact.activity.name, fact.category.name,
+                 [tag.name for tag in fact.tags])
+                for fact in facts
+            ] == [
+                ('there', 'foo', 'bar', ['fun']),
+                ('here', 'foo', 'bar', ['fun']),
+                ('also here', 'baz', 'bar', []),
+                ('also there', 'other', 'qux', ['work']),
+            ]
+            # The other store's Facts are renumbered after the store's.
+            assert len(set(fact.pk for fact in facts)) == 4
+        assert not store_union_active(controller)
+        assert not store_names_federated(controller)
+        # Only the other store's Facts in the query's window are included.
+        qt = QueryTerms(since='2016-02-01')
+        with store_union(controller, qt, stores=[other_db]):
+            assert [
+                fact.description for fact in controller.facts.get_all(qt)
+            ] == ['also there']
+
+    def test_usage_combines_the_same_names(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        other_db = self.make_other_store(controller, tmpdir)
+        qt = QueryTerms()
+        with store_union(controller, qt, stores=[other_db, other_db]):
+            activities = controller.activities.get_all_by_usage(query_terms=qt)
+            tags = controller.tags.get_all_by_usage(query_terms=qt)
+            categories = controller.categories.get_all(query_terms=QueryTerms())
+        assert sorted(
+            (activity.name, activity.category.name, count)
+            for activity, count, _span in activities
+        ) == [('baz', 'bar', 1), ('foo', 'bar', 2), ('other', 'qux', 1)]
+        assert sorted((tag.name, count) for tag, count, _span in tags) == [
+            ('fun', 2), ('work', 1),
+        ]
+        assert sorted(category.name for category in categories) == ['bar', 'qux']
+
+    def test_not_a_store(self, controller_with_logging, tmpdir):
+        controller = controller_with_logging
+        not_db = tmpdir.join('not.sqlite').strpath
+        sqlite3.connect(not_db).close()
+        with pytest.raises(SystemExit):
+            with store_union(controller, QueryTerms(), stores=[not_db]):
+                pass
+        assert not store_union_active(controller)
@@ -0,0 +1,58 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+from dob.store import optimize
+from dob.store.indexes import DOB_INDEXES, missing_dob_indexes
+from dob.store.optimize import optimize_overdue, optimize_store
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+"""
+
+
+class TestStoreOptimize(object):
+    """Tests for `dob store optimize`, and knowing when it's due."""
+
+    def test_optimize_creates_indexes_and_analyzes(
+        self, controller_with_logging, capsys,
+    ):
+        controller = controller_with_logging
+        assert len(missing_dob_indexes(controller)) == len(DOB_INDEXES)
+        optimize_store(controller)
+        assert missing_dob_indexes(controller) == []
+        out = capsys.readouterr().out
+        assert 'Created indexes: dob_facts_deleted_start' in out
+        assert 'List latest Facts' in out
+        # Running it again is harmless, and there's nothing left to create.
+        optimize_store(controller, vacuum=True)
+        out = capsys.readouterr().out
+        assert 'All indexes already exist.' in out
+        assert 'Vacuumed the store.' in out
+
+    def test_optimize_overdue(
+        self, controller_with_logging, import_factoids, mocker,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        # A small store is never due.
+        assert optimize_overdue(controller) is None
+        mocker.patch.object(optimize, 'OVERDUE_MIN_FACTS', 1)
+        assert optimize_overdue(controller).startswith('missing indexes')
+        optimize_store(controller)
+        assert optimize_overdue(controller) is None
@@ -0,0 +1,166 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from nark.managers.query_terms import QueryTerms
+
+from dob.store import store_union as store_union_module
+from dob.store.partition import partition_store
+from dob.store.store_union import partition_rows, store_union, store_union_active
+
+IMPORT_FACTOIDS = """\
+2015-06-10 12:00 to 2015-06-10 12:30: foo@bar: #fun: summer
+
+2015-12-31 23:30 to 2016-01-01 00:30: foo@bar: #fun: new year
+
+2016-06-10 12:00 to 2016-06-10 12:30: foo@bar: later
+
+2017-01-10 12:00 to 2017-01-10 12:30: foo@bar: #fun: recent
+"""
+
+IMPORT_BACKDATED = """\
+2015-03-10 12:00 to 2015-03-10 12:30: foo@bar: backdated
+"""
+
+IMPORT_OVERLAPPING = """\
+2015-06-10 12:10 to 2015-06-10 12:20: foo@bar: overlapping
+"""
+
+
+class TestStorePartition(object):
+    """Tests for `dob store partition`, and the queries that union the partitions."""
+
+    def partition(self, controller, tmpdir, by='year'):
+        partition_store(
+            controller,
+            by=by,
+            before='2017-01-01',
+            partition_dir=tmpdir.strpath,
+        )
+
+    def descriptions(self, controller, **kwargs):
+        qt = QueryTerms(sort_cols=['start'], **kwargs)
+        with store_union(controller, qt):
+            return [fact.description for fact in controller.facts.get_all(qt)]
+
+    def test_partition_by_start_year(
+        self, controller_with_logging, import_factoids, tmpdir, capsys,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.partition(controller, tmpdir)
+        assert 'Moved 3 Facts to the partitions from 2015 to 2016.' in (
+            capsys.readouterr().out
+        )
+        assert controller.store.session.execute(
+            'SELECT description FROM facts'
+        ).fetchall() == [('recent',)]
+        # The Fact that crosses into 2016 is kept in 2015, which reaches 2016.
+        assert [
+            (name, first_start.isoformat(), last_end.isoformat())
+            for name, path, first_start, last_end in partition_rows(controller)
+        ] == [
+            ('2015', '2015-06-10T12:00:00', '2016-01-01T00:30:00'),
+            ('2016', '2016-06-10T12:00:00', '2016-06-10T12:30:00'),
+        ]
+        assert partition_rows(controller)[0][1] == tmpdir.join('dob-2015.sqlite')
+        # A month layout cannot be mixed in.
+        with pytest.raises(SystemExit):
+            self.partition(controller, tmpdir, by='month')
+
+    def test_queries_union_the_partitions_they_overlap(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.partition(controller, tmpdir)
+        assert self.descriptions(controller) == [
+            'summer', 'new year', 'later', 'recent',
+        ]
+        assert self.descriptions(controller, since='2016-01-01', partial=True) == [
+            'new year', 'later', 'recent',
+        ]
+        assert self.descriptions(controller, until='2015-12-01') == ['summer']
+        # A query of recent Facts only reads the store.
+        qt = QueryTerms(since='2017-01-01')
+        with store_union(controller, qt):
+            assert not store_union_active(controller)
+        # The usage counts include the partitioned Facts.
+        qt = QueryTerms()
+        with store_union(controller, qt):
+            usage = controller.tags.get_all_by_usage(query_terms=qt)
+        assert [(tag.name, count) for tag, count, _span in usage] == [('fun', 3)]
+
+    def test_new_facts_move_to_their_partition(
+        self, controller_with_logging, import_factoids, tmpdir, monkeypatch,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.partition(controller, tmpdir, by='month')
+        # New Facts are saved to the store, even in a past month (but not
+        # in a partitioned month).
+        import_factoids(IMPORT_BACKDATED)
+        self.partition(controller, tmpdir, by='month')
+        assert [row[0] for row in partition_rows(controller)] == [
+            '2015-03', '2015-06', '2015-12', '2016-06',
+        ]
+        all_facts = ['backdated', 'summer', 'new year', 'later', 'recent']
+        assert self.descriptions(controller) == all_facts
+        # More partitions than SQLite attaches are copied to TEMP tables.
+        monkeypatch.setattr(store_union_module, 'MAX_ATTACHED', 2)
+        assert self.descriptions(controller) == all_facts
+        assert not store_union_active(controller)
+
+    def test_new_facts_never_reuse_partitioned_ids(
+        self, controller_with_logging, import_factoids, tmpdir,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        # Partition every Fact, including the one with the highest ID.
+        partition_store(
+            controller, before='2018-01-01', partition_dir=tmpdir.strpath,
+        )
+        import_factoids('2018-03-01 12:00 to 2018-03-01 12:30: foo@bar: newest\n')
+        new_id, = controller.store.session.execute('SELECT id FROM facts').fetchone()
+        assert new_id == 5
+        assert self.descriptions(controller, since='2015-01-01') == [
+            'summer', 'new year', 'later', 'recent', 'newest',
+        ]
+
+    @pytest.mark.parametrize(
+        ('by', 'factoids'),
+        (
+            ('month', IMPORT_OVERLAPPING),
+            ('year', IMPORT_BACKDATED),
+        ),
+        ids=('overlapping', 'backdated'),
+    )
+    def test_saving_in_partitioned_period_is_refused(
+        self, controller_with_logging, import_factoids, tmpdir, by, factoids,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        self.partition(controller, tmpdir, by=by)
+        n_partitions = len(partition_rows(controller))
+        with pytest.raises(SystemExit):
+            import_factoids(factoids)
+        self.partition(controller, tmpdir, by=by)
+        assert len(partition_rows(controller)) == n_partitions
+        assert self.descriptions(controller) == [
+            'summer', 'new year', 'later', 'recent',
+        ]
@@ -0,0 +1,71 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from dob.store import read_only
+from dob.store.read_only import open_store_read_only, read_only_engine
+
+
+class TestStoreReadOnly(object):
+    """Tests for the read-only store of the reporting commands."""
+
+    def test_read_only_engine_cannot_write(self, stand_in_db_path):
+        db_path = stand_in_db_path
+        engine = read_only_engine(db_path, cache_size=1024, mmap_size=8)
+        with engine.connect() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM facts').scalar() == 2
+            assert conn.execute('PRAGMA cache_size').scalar() == -1024
+            assert conn.execute('PRAGMA mmap_size').scalar() == 8 * 1024 * 1024
+            # The temporary tables that store_union makes still work.
+            conn.execute('CREATE TEMP TABLE ids AS SELECT id FROM main.facts')
+            assert conn.execute('SELECT COUNT(*) FROM temp.ids').scalar() == 2
+            with pytest.raises(OperationalError):
+                conn.execute('INSERT INTO main.facts (id) VALUES (3)')
+
+    def test_immutable_engine_ignores_locks(self, stand_in_db_path):
+        db_path = stand_in_db_path
+        writer = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            writer.execute('BEGIN EXCLUSIVE')
+            writer.execute('INSERT INTO facts (id) VALUES (3)')
+            engine = read_only_engine(db_path, immutable=True)
+            with engine.connect() as conn:
+                assert conn.execute('SELECT COUNT(*) FROM facts').scalar() == 2
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+
+    def test_open_store_read_only(
+        self, controller_with_logging, stand_in_db_path, mocker,
+    ):
+        controller = controller_with_logging
+        db_path = stand_in_db_path
+        mocker.patch.object(read_only, 'sqlite_db_path', return_value=db_path)
+        controller.config['reports.read_only'] = False
+        open_store_read_only(controller)
+        assert 'create_storage_engine' not in vars(controller.store)
+        controller.config['reports.read_only'] = True
+        open_store_read_only(controller)
+        engine = controller.store.create_storage_engine()
+        with engine.connect() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM facts').scalar() == 2
+            with pytest.raises(OperationalError):
+                conn.execute('DELETE FROM facts')
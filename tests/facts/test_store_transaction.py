@@ -0,0 +1,78 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import pytest
+from sqlalchemy import event
+
+from dob.store.transaction import StoreTransaction, store_transaction
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: second
+
+2015-12-10 13:00 to 2015-12-10 13:30: foo@bar: third
+"""
+
+
+class TestStoreTransaction(object):
+    """Tests for saving many Facts in one store transaction."""
+
+    def test_import_commits_once(self, controller_with_logging, import_factoids):
+        controller = controller_with_logging
+        commits = []
+        event.listen(
+            controller.store.session.get_bind(),
+            'commit',
+            lambda conn: commits.append(True),
+        )
+        import_factoids(IMPORT_FACTOIDS)
+        assert len(commits) == 1
+        assert len(controller.facts.get_all()) == 3
+        # The store commits normally again.
+        assert 'commit' not in vars(controller.store.session)
+
+    def test_import_failure_rolls_back_all_facts(
+        self, controller_with_logging, import_factoids,
+    ):
+        controller = controller_with_logging
+        save_fact = controller.facts.save
+        saves = []
+
+        def fail_third_save(*args, **kwargs):
+            if len(saves) == 2:
+                raise ValueError('Not today.')
+            saves.append(True)
+            return save_fact(*args, **kwargs)
+
+        controller.facts.save = fail_third_save
+        with pytest.raises(SystemExit):
+            import_factoids(IMPORT_FACTOIDS)
+        controller.facts.save = save_fact
+
+        assert len(saves) == 2
+        assert controller.facts.get_all() == []
+        assert controller.activities.get_all() == []
+
+    def test_nested_transactions_are_shared(self, controller_with_logging):
+        controller = controller_with_logging
+        with store_transaction(controller) as outer_transaction:
+            assert isinstance(outer_transaction, StoreTransaction)
+            with store_transaction(controller) as inner_transaction:
+                assert inner_transaction is outer_transaction
+        with store_transaction(controller, enabled=False) as transaction:
+            assert transaction is None
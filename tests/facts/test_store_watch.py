@@ -0,0 +1,56 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import sqlite3
+
+from dob.store import store_watch
+
+
+def _insert_fact(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('INSERT INTO facts DEFAULT VALUES')
+
+
+class TestStoreWatch(object):
+    """Tests for re-rendering when the store changes."""
+
+    def test_store_watcher_wait(self, stand_in_db_path):
+        db_path = stand_in_db_path
+        watcher = store_watch.StoreWatcher(db_path, poll_secs=0.01, settle_secs=0.01)
+        assert not watcher.wait(timeout=0.05)
+        _insert_fact(db_path)
+        assert watcher.wait(timeout=0.05)
+        assert not watcher.wait(timeout=0.05)
+        watcher.close()
+
+    def test_watch_store_renders_on_change(
+        self, controller_with_logging, stand_in_db_path, mocker,
+    ):
+        db_path = stand_in_db_path
+        mocker.patch.object(store_watch, 'sqlite_db_path', return_value=db_path)
+        renders = []
+
+        def render():
+            renders.append(True)
+            if len(renders) == 1:
+                _insert_fact(db_path)
+                # E.g., dob_in_user_exit, because no Facts were found.
+                raise SystemExit(1)
+            raise KeyboardInterrupt
+
+        store_watch.watch_store(controller_with_logging, render, poll_secs=0.01)
+        assert len(renders) == 2
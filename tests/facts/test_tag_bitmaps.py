@@ -0,0 +1,127 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import itertools
+
+import pytest
+from nark.managers.query_terms import QueryTerms
+
+from dob.store import tag_bitmaps
+from dob.store.tag_bitmaps import (
+    TagBitmaps,
+    bitmap_pks,
+    refresh_tag_bitmaps,
+    tag_bitmaps_filter,
+    tag_bitmaps_usage
+)
+
+IMPORT_FACTOIDS = """\
+2015-12-10 12:00 to 2015-12-10 12:30: foo@bar: #fun #work: first
+
+2015-12-10 12:30 to 2015-12-10 13:00: foo@bar: #fun: second
+
+2015-12-10 13:00 to 2015-12-10 13:30: foo@bar: #work: third
+"""
+
+MORE_FACTOIDS = """\
+2015-12-10 14:00 to 2015-12-10 14:30: foo@bar: #fun #work: fourth
+"""
+
+
+@pytest.fixture
+def bitmaps_file(controller_with_logging, tmpdir, stand_in_db_path, mocker):
+    cache_dir = tmpdir.mkdir('cache').strpath
+    mocker.patch.object(tag_bitmaps, 'AppDirs', user_cache_dir=cache_dir)
+    # Pretend the stand-in file changes every time it's checked,
+    # so the bitmaps are always caught up.
+    mocker.patch.object(tag_bitmaps, 'sqlite_db_path', return_value=stand_in_db_path)
+    change_counter = itertools.count()
+    mocker.patch.object(
+        tag_bitmaps, 'db_change_stamp', side_effect=lambda path: next(change_counter),
+    )
+
+
+class TestTagBitmaps(object):
+    """Tests for the tag bitmaps, and the tag queries they answer."""
+
+    def find_descriptions(self, controller, *tags, all_tags=False):
+        qt = QueryTerms(match_tags=list(tags), sort_cols=['start'])
+        with tag_bitmaps_filter(controller, qt, all_tags=all_tags):
+            results = controller.facts.get_all(query_terms=qt)
+        return [fact.description for fact in results]
+
+    def test_bitmaps_follow_saves_and_deletes(
+        self, controller_with_logging, import_factoids, bitmaps_file,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        bitmaps = TagBitmaps(controller)
+        assert not bitmaps.exists
+        assert bitmaps.refresh()
+        assert bitmaps.exists
+        fun = controller.tags.get_by_name('fun')
+        work = controller.tags.get_by_name('work')
+        assert bitmap_pks(bitmaps.tags[fun.pk]) == [1, 2]
+        # The save commands catch up the bitmaps after saving (see
+        # post_processor), because they exist.
+        import_factoids(MORE_FACTOIDS)
+        refresh_tag_bitmaps(controller)
+        bitmaps = TagBitmaps(controller)
+        bitmaps.load()
+        assert bitmap_pks(bitmaps.facts_with_all([fun.pk, work.pk])) == [1, 4]
+        # If a row is deleted, the bitmaps are rebuilt.
+        controller.store.session.execute(
+            'DELETE FROM fact_tags WHERE fact_id = 4 AND tag_id = {}'.format(work.pk)
+        )
+        controller.store.session.commit()
+        assert bitmaps.refresh()
+        assert bitmap_pks(bitmaps.facts_with_all([fun.pk, work.pk])) == [1]
+        assert bitmaps.count(fun.pk) == 3
+
+    def test_tag_filters_and_usage_counts(
+        self, controller_with_logging, import_factoids, bitmaps_file,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        assert self.find_descriptions(controller, 'work') == ['first', 'third']
+        assert self.find_descriptions(controller, 'fun', 'work') == [
+            'first', 'second', 'third',
+        ]
+        assert self.find_descriptions(controller, 'fun', 'work', all_tags=True) == [
+            'first',
+        ]
+        assert self.find_descriptions(controller, 'fun', 'nope', all_tags=True) == []
+        qt = QueryTerms(sort_cols=['usage'], sort_orders=['desc'])
+        usage = tag_bitmaps_usage(controller, qt)
+        assert [(tag.name, uses) for tag, uses, _span in usage] == [
+            ('fun', 2), ('work', 2),
+        ]
+        # A filtered usage report is left to the store.
+        assert tag_bitmaps_usage(controller, QueryTerms(search_terms=['fun'])) is None
+
+    def test_refresh_failure_does_not_fail_the_save(
+        self, controller_with_logging, import_factoids, bitmaps_file, mocker,
+    ):
+        controller = controller_with_logging
+        import_factoids(IMPORT_FACTOIDS)
+        assert TagBitmaps(controller).refresh()
+        mocker.patch.object(TagBitmaps, 'refresh', side_effect=OSError('Disk full'))
+        warning = mocker.spy(controller.client_logger, 'warning')
+        import_factoids(MORE_FACTOIDS)
+        assert len(controller.facts.get_all()) == 4
+        refresh_tag_bitmaps(controller)
+        assert 'Disk full' in warning.call_args[0][0]
@@ -0,0 +1,69 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+
+from dob.helpers.hook_pool import run_hooks
+
+
+class TestRunHooks(object):
+    """Tests for the bounded, timed hook runner."""
+
+    def test_slow_hook_is_abandoned(self):
+        release = threading.Event()
+        called = []
+
+        def call_hook(hook):
+            called.append(hook)
+            if hook == 'slow':
+                release.wait(10)
+
+        began = time.monotonic()
+        outcomes = run_hooks(['slow', 'fast'], call_hook, max_workers=1, timeout=0.2)
+        elapsed = time.monotonic() - began
+        release.set()
+
+        assert elapsed < 5
+        # With one worker, the fast hook ran after the slow one was abandoned.
+        assert called == ['slow', 'fast']
+        assert [outcome.hook for outcome in outcomes] == ['slow', 'fast']
+        assert outcomes[0].timed_out
+        assert not outcomes[1].timed_out and outcomes[1].error is None
+
+    def test_failing_hook_is_reported(self):
+        running = []
+        most_running = []
+        lock = threading.Lock()
+
+        def call_hook(hook):
+            with lock:
+                running.append(hook)
+                most_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(hook)
+            if hook == 2:
+                raise RuntimeError('boom')
+
+        outcomes = run_hooks(range(6), call_hook, max_workers=2, timeout=None)
+
+        assert max(most_running) <= 2
+        assert [outcome.hook for outcome in outcomes] == list(range(6))
+        assert str(outcomes[2].error) == 'boom'
+        assert all(outcome.error is None for outcome in outcomes if outcome.hook != 2)
+        assert not any(outcome.timed_out for outcome in outcomes)
@@ -0,0 +1,76 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import json
+import os
+
+from dob.helpers.progress import RateProgress
+
+
+def _progress_records(read_fd):
+    with os.fdopen(read_fd, 'r') as progress_f:
+        return [json.loads(line) for line in progress_f]
+
+
+class TestRateProgress(object):
+    """Tests for the rate-limited progress reporter."""
+
+    def test_progress_fd_is_rate_limited(self):
+        read_fd, write_fd = os.pipe()
+        progress = RateProgress(
+            enabled=False, interval_ms=60 * 1000, progress_fd=write_fd,
+        )
+        progress.start_crude_progressor('Saving facts', total=1000)
+        for _idx in range(1000):
+            progress.step_crude_progressor('Saving facts')
+        progress.click_echo_current_task('')
+        progress.close()
+        os.close(write_fd)
+
+        records = _progress_records(read_fd)
+        # Once when started, and once when finished, but not per step.
+        assert len(records) == 2
+        assert records[0]['done'] == 0
+        assert records[-1]['task'] == 'Saving facts'
+        assert records[-1]['done'] == records[-1]['total'] == 1000
+        assert records[-1]['unit'] == 'facts'
+        assert records[-1]['eta'] == 0
+
+    def test_progress_tracks_input_lines(self):
+        read_fd, write_fd = os.pipe()
+        progress = RateProgress(enabled=False, interval_ms=0, progress_fd=write_fd)
+        # The total is in bytes, so the lines are, too (and 'é' is two).
+        lines = ['one\n', 'two\n', 'thrée\n']
+        tracked = progress.track_lines(lines, 'Reading', total_bytes=15)
+        assert list(tracked) == lines
+        progress.close()
+        os.close(write_fd)
+
+        records = _progress_records(read_fd)
+        assert [record['done'] for record in records] == [0, 4, 8, 15, 15]
+        assert records[-1]['total'] == 15
+
+    def test_progress_disabled_costs_nothing(self, capsys):
+        progress = RateProgress(enabled=False)
+        assert not progress.reporting
+        lines = ['one\n']
+        assert progress.track_lines(lines, 'Reading') is lines
+        state = progress.start_crude_progressor('Saving facts', total=1)
+        progress.step_crude_progressor('Saving facts', *state)
+        progress.click_echo_current_task('')
+        progress.close()
+        assert capsys.readouterr().out == ''
@@ -0,0 +1,53 @@
+# This file exists within 'dob':
+#
+#   https://github.com/hotoffthehamster/dob
+#
+# Copyright © 2018-2020 Landon Bouma,  2015-2016 Eric Goller.  All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import datetime
+import subprocess
+import sys
+
+from dob import status_line
+
+
+class TestStatusLine(object):
+    """Tests for the dob-status state file and printer."""
+
+    def test_status_round_trip(self, fact, tmpdir, mocker, capsys):
+        state_path = tmpdir.join('status.json').strpath
+        mocker.patch.object(status_line, 'status_state_path', return_value=state_path)
+        fact.end = None
+        state = status_line.status_state(fact)
+        status_line.write_status_state(state)
+        assert status_line.read_status_state() == state
+
+        now = fact.start + datetime.timedelta(hours=1, minutes=5)
+        assert status_line.format_elapsed(state, now=now) == '1:05'
+
+        status_line.main([])
+        assert capsys.readouterr().out.startswith(state['short'])
+
+        status_line.write_status_state(status_line.status_state(None))
+        status_line.main([])
+        assert capsys.readouterr().out == ''
+
+    def test_status_line_skips_heavy_imports(self):
+        script = (
+            'import sys; import dob.status_line;'
+            ' print(any(mod.split(".")[0] in ("click_hotoffthehamster", "nark",'
+            ' "sqlalchemy") for mod in sys.modules))'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script])
+        assert output.strip() == b'False'